@@ -0,0 +1,172 @@
+# -----------------------------------------------------------------------------
+# Company: KARIM Technologies
+# Author: Sayed Amir Karim
+# Copyright: 2024 KARIM Technologies
+#
+# License: All Rights Reserved
+#
+# Module: Adaptive Timeout
+# Description: Antwort-Timeouts pro Gerät aus einem rollierenden
+#              Latenz-Histogramm lernen
+# -----------------------------------------------------------------------------
+
+import os
+import json
+import bisect
+import logging
+from collections import deque
+
+# Obergrenzen der Histogramm-Buckets in Millisekunden (grob logarithmisch)
+BUCKET_EDGES_MS = (2, 3, 5, 7, 10, 15, 20, 30, 40, 50, 70, 100, 150, 200, 300, 500, 700, 1000, 1500, 2000, 3000, 5000)
+
+class LatencyHistogram:
+    """Histogramm der letzten ``window`` Antwortzeiten.
+
+    Die Rohwerte werden in einer deque gehalten, damit alte Messungen beim
+    Überlauf wieder aus ihrem Bucket genommen werden können. Perzentile werden
+    als Obergrenze des Buckets angegeben, in dem sie liegen.
+    """
+
+    def __init__(self, window=200, edges=BUCKET_EDGES_MS):
+        self.edges = tuple(edge / 1000 for edge in edges)
+        self.counts = [0] * (len(self.edges) + 1)
+        self.samples = deque(maxlen=window)
+
+    def __len__(self):
+        return len(self.samples)
+
+    def record(self, latency):
+        if len(self.samples) == self.samples.maxlen:
+            self.counts[self._bucket(self.samples[0])] -= 1
+        self.samples.append(latency)
+        self.counts[self._bucket(latency)] += 1
+
+    def percentile(self, percent):
+        """Obergrenze des Buckets mit dem Perzentil in Sekunden (None ohne Messungen)"""
+        if not self.samples:
+            return None
+        rank = percent / 100 * len(self.samples)
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank and count:
+                # Letzter Bucket ist offen - dort zählt die größte Messung
+                return self.edges[index] if index < len(self.edges) else max(self.samples)
+        return max(self.samples)
+
+    def _bucket(self, latency):
+        return bisect.bisect_left(self.edges, latency)
+
+class AdaptiveTimeouts:
+    """Gelernte Antwort-Timeouts pro Gerät (Slave-ID).
+
+    Timeout = p99 der letzten Antwortzeiten x ``factor``, begrenzt auf
+    [``min_timeout``, ``max_timeout``]. Bis ``min_samples`` Messungen
+    vorliegen, gilt ``max_timeout``. Nach einem Timeout wird das Timeout des
+    Geräts verdoppelt; die nächste (langsamere) Antwort geht ins Histogramm
+    ein, so dass ein zu knapp gelerntes Timeout von selbst wächst.
+
+    Konfiguration unter ``rs485_settings.adaptive_timeout``::
+
+        "adaptive_timeout": {"factor": 3.0, "min": 0.05, "max": 1.0, "min_samples": 20,
+                             "window": 200, "state_file": "data/response_timeouts_{bus}.json"}
+    """
+
+    def __init__(self, max_timeout, factor=3.0, min_timeout=0.05, min_samples=20, window=200,
+                 state_file=None):
+        self.max_timeout = max_timeout
+        self.factor = factor
+        self.min_timeout = min_timeout
+        self.min_samples = min_samples
+        self.window = window
+        self.state_file = state_file
+        self.logger = logging.getLogger('AdaptiveTimeouts')
+        self.histograms = {}
+        self._timeouts = {}
+        self._load()
+
+    @classmethod
+    def from_config(cls, settings, max_timeout, bus_name=''):
+        """Aus rs485_settings.adaptive_timeout, None wenn nicht konfiguriert"""
+        if not settings:
+            return None
+        state_file = settings.get('state_file')
+        if state_file:
+            state_file = state_file.format(bus=bus_name.replace('/', '_'))
+        return cls(
+            max_timeout=settings.get('max', max_timeout),
+            factor=settings.get('factor', 3.0),
+            min_timeout=settings.get('min', 0.05),
+            min_samples=settings.get('min_samples', 20),
+            window=settings.get('window', 200),
+            state_file=state_file
+        )
+
+    def timeout_for(self, device_id):
+        return self._timeouts.get(device_id, self.max_timeout)
+
+    def record(self, device_id, latency):
+        histogram = self.histograms.get(device_id)
+        if histogram is None:
+            histogram = self.histograms[device_id] = LatencyHistogram(self.window)
+        histogram.record(latency)
+        self._update(device_id, histogram)
+
+    def record_timeout(self, device_id):
+        """Verdoppelt das gelernte Timeout bis zur nächsten erfolgreichen Antwort"""
+        if device_id in self._timeouts:
+            self._timeouts[device_id] = min(self.max_timeout, self._timeouts[device_id] * 2)
+
+    def _update(self, device_id, histogram):
+        if len(histogram) < self.min_samples:
+            return
+        timeout = histogram.percentile(99) * self.factor
+        self._timeouts[device_id] = min(self.max_timeout, max(self.min_timeout, timeout))
+
+    def diagnostics(self):
+        result = {}
+        for device_id, histogram in list(self.histograms.items()):
+            p50, p99 = histogram.percentile(50), histogram.percentile(99)
+            result[str(device_id)] = {
+                'timeout_ms': round(self.timeout_for(device_id) * 1000, 1),
+                'p50_ms': None if p50 is None else round(p50 * 1000, 1),
+                'p99_ms': None if p99 is None else round(p99 * 1000, 1),
+                'samples': len(histogram)
+            }
+        return result
+
+    def save(self):
+        if not self.state_file:
+            return
+        state = {
+            str(device_id): [round(latency, 5) for latency in list(histogram.samples)]
+            for device_id, histogram in list(self.histograms.items())
+        }
+        try:
+            directory = os.path.dirname(self.state_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_file = f"{self.state_file}.tmp"
+            with open(temp_file, 'w') as f:
+                json.dump(state, f)
+            os.replace(temp_file, self.state_file)
+        except OSError as e:
+            self.logger.error(f"Fehler beim Speichern der gelernten Timeouts: {e}")
+
+    def _load(self):
+        if not self.state_file:
+            return
+        try:
+            with open(self.state_file, 'r') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, json.JSONDecodeError) as e:
+            self.logger.warning(f"Gelernte Timeouts nicht lesbar, lerne neu: {e}")
+            return
+        for device_id, samples in state.items():
+            for latency in samples:
+                self.record(int(device_id), latency)
+        if self._timeouts:
+            learned = ', '.join(f"{device_id}: {timeout * 1000:.0f} ms" for device_id, timeout in self._timeouts.items())
+            self.logger.info(f"Gelernte Timeouts geladen ({learned})")
@@ -0,0 +1,216 @@
+# -----------------------------------------------------------------------------
+# Company: KARIM Technologies
+# Author: Sayed Amir Karim
+# Copyright: 2024 KARIM Technologies
+#
+# License: All Rights Reserved
+#
+# Module: Frame CPU Benchmark
+# Description: CPU-Zeit und Allokationen für Anfragerahmen, CRC-Prüfung und
+#              Empfangspfad pro Transaktion, ohne Slave (Mikrobenchmark für das Gateway)
+#
+# Aufruf aus dem Projektverzeichnis:
+#   python -m benchmarks.frame_cpu [--iterations 20000] [--output results.json] [--compare baseline.json]
+# -----------------------------------------------------------------------------
+
+import os
+import tty
+import json
+import time
+import struct
+import timeit
+import argparse
+import platform
+import statistics
+import tracemalloc
+
+from modbus_crc import crc16, crc16_table, crc_ok, CRC_BACKEND
+from modbus_manager import DeviceManager, request_frame, decode_value
+
+SLAVE_ID = 3
+START_ADDRESS = 0x0001
+REGISTER_COUNT = 4
+
+def response_frame():
+    """Gültige FC03-Antwort auf die Benchmark-Anfrage"""
+    payload = struct.pack('>BBB', SLAVE_ID, 0x03, REGISTER_COUNT * 2) + bytes(range(REGISTER_COUNT * 2))
+    return payload + struct.pack('<H', crc16_table(payload))
+
+def legacy_transaction(response):
+    """Bisheriger Ablauf: CRC-Funktion pro Aufruf neu erzeugen, Rahmen packen, Antwort zerschneiden"""
+    import crcmod.predefined
+
+    def transaction():
+        message = struct.pack('>B B H H', SLAVE_ID, 0x03, START_ADDRESS, REGISTER_COUNT)
+        message += struct.pack('<H', crcmod.predefined.mkPredefinedCrcFun('modbus')(message))
+        received_crc = struct.unpack('<H', response[-2:])[0]
+        return received_crc == crcmod.predefined.mkPredefinedCrcFun('modbus')(response[:-2])
+    return transaction
+
+def built_transaction(crc_function, response):
+    """Rahmen pro Aufruf packen, CRC-Funktion einmal erzeugt"""
+    def transaction():
+        message = struct.pack('>B B H H', SLAVE_ID, 0x03, START_ADDRESS, REGISTER_COUNT)
+        message += struct.pack('<H', crc_function(message))
+        return crc_function(response) == 0
+    return transaction
+
+def cached_transaction(response):
+    """Aktueller Ablauf: gecachter Anfragerahmen, CRC-Prüfung über den ganzen Rahmen"""
+    def transaction():
+        request_frame(SLAVE_ID, 0x03, START_ADDRESS, REGISTER_COUNT)
+        return crc_ok(response)
+    return transaction
+
+class Loopback:
+    """pty-Paar statt Slave: die Antwort wird vor dem Lesen im selben Thread eingespeist"""
+
+    def __init__(self, response):
+        self.response = response
+        self.master_fd, self.slave_fd = os.openpty()
+        tty.setraw(self.slave_fd)
+        self.dev_manager = DeviceManager(port=os.ttyname(self.slave_fd), baudrate=115200, parity='N',
+                                         stopbits=1, bytesize=8, timeout=0.5)
+
+    def feed(self):
+        os.write(self.master_fd, self.response)
+
+    def close(self):
+        self.dev_manager.ser.close()
+        os.close(self.master_fd)
+        os.close(self.slave_fd)
+
+def legacy_receive(loopback):
+    """Bisheriger Empfangspfad: header + Rest, Slices für CRC und Daten, Wort-Tausch per Verkettung"""
+    ser = loopback.dev_manager.ser
+
+    def transaction():
+        loopback.feed()
+        ser.timeout = 0.5
+        header = ser.read(3)
+        response = header + ser.read(header[2] + 2)
+        if struct.unpack('<H', response[-2:])[0] != crc16(response[:-2]):
+            return None
+        data = response[3:-2]
+        return struct.unpack('>f', data[2:4] + data[0:2])[0] is not None
+    return transaction
+
+def buffered_receive(loopback):
+    """Aktueller Empfangspfad: os.readv in den Empfangspuffer, memoryview, Codec"""
+    dev_manager = loopback.dev_manager
+
+    def transaction():
+        loopback.feed()
+        response = dev_manager._read_frame(0x03)
+        data = dev_manager._check_read_response(response, SLAVE_ID, START_ADDRESS, REGISTER_COUNT)
+        return decode_value(data, 'float32', 'CDAB') is not None
+    return transaction
+
+def cases(response, loopback):
+    result = []
+    try:
+        import crcmod.predefined  # noqa: F401
+        result.append(('legacy_mkPredefinedCrcFun', legacy_transaction(response)))
+    except ImportError:
+        pass
+    result.append(('crc_table', built_transaction(crc16_table, response)))
+    if CRC_BACKEND != 'table':
+        result.append((f'crc_{CRC_BACKEND}', built_transaction(crc16, response)))
+    result.append(('cached_frame', cached_transaction(response)))
+    result.append(('receive_legacy', legacy_receive(loopback)))
+    result.append(('receive_buffer', buffered_receive(loopback)))
+    return result
+
+def measure(transaction, iterations, repeat):
+    """Bester von ``repeat`` Läufen in µs pro Transaktion (wie timeit)"""
+    assert transaction(), "Benchmark-Antwort ungültig"
+    best = min(timeit.repeat(transaction, number=iterations, repeat=repeat, timer=time.process_time))
+    return round(best / iterations * 1e6, 3)
+
+def measure_allocations(transaction, iterations=200):
+    """Zusätzlicher Python-Heap, den eine Transaktion höchstens belegt (tracemalloc, Median in Bytes).
+
+    Alles läuft in einem Thread, die Spitze zeigt die gleichzeitig lebenden
+    Zwischenobjekte (Rahmenkopien, Slices, Lesepuffer) einer Transaktion.
+    """
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(iterations):
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            transaction()
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+    return int(statistics.median(peaks))
+
+def run(args):
+    response = response_frame()
+    loopback = Loopback(response)
+    results = []
+    baseline = None
+    try:
+        for name, transaction in cases(response, loopback):
+            # Empfangsfälle lesen vom Port und sind um Größenordnungen teurer
+            iterations = args.iterations if not name.startswith('receive') else max(1, args.iterations // 20)
+            us_per_tx = measure(transaction, iterations, args.repeat)
+            alloc_peak_bytes = measure_allocations(transaction)
+            baseline = baseline or us_per_tx
+            results.append({'case': name, 'us_per_tx': us_per_tx, 'speedup': round(baseline / us_per_tx, 1),
+                            'alloc_peak_bytes': alloc_peak_bytes})
+            print(f"{name:<28} | {us_per_tx:9.2f} | {baseline / us_per_tx:7.1f}x | {alloc_peak_bytes:7d}")
+    finally:
+        loopback.close()
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'crc_backend': CRC_BACKEND,
+        'iterations': args.iterations,
+        'results': results,
+    }
+
+def compare(report, baseline_path):
+    with open(baseline_path, 'r') as f:
+        baseline = {r['case']: r for r in json.load(f)['results']}
+
+    print(f"\nVergleich mit {baseline_path}")
+    print(f"{'Fall':<28} | {'µs vorher':>9} {'µs jetzt':>9} {'Δ':>7} | {'Alloc B vorher':>14} {'jetzt':>6}")
+    print("-" * 85)
+    for result in report['results']:
+        before = baseline.get(result['case'])
+        if before is None:
+            continue
+        print(f"{result['case']:<28} | {before['us_per_tx']:9.2f} {result['us_per_tx']:9.2f} "
+              f"{(result['us_per_tx'] / before['us_per_tx'] - 1):+7.1%} | "
+              f"{before.get('alloc_peak_bytes', '-'):>14} {result.get('alloc_peak_bytes', '-'):>6}")
+
+def main():
+    parser = argparse.ArgumentParser(description='CPU-Zeit und Allokationen für Rahmenbau, CRC und Empfangspfad')
+    parser.add_argument('--iterations', type=int, default=20000, help='Transaktionen pro Lauf')
+    parser.add_argument('--repeat', type=int, default=5, help='Läufe pro Fall, gewertet wird der beste')
+    parser.add_argument('--output', default=None,
+                        help='JSON-Ergebnisdatei (Standard: benchmarks/results/frame_cpu-<Zeit>.json)')
+    parser.add_argument('--compare', default=None, metavar='BASELINE',
+                        help='Früheres JSON-Ergebnis zum Vergleich (z.B. von einer anderen Plattform)')
+    args = parser.parse_args()
+
+    print(f"{platform.machine()}, Python {platform.python_version()}, CRC-Backend {CRC_BACKEND}")
+    print(f"\n{'Fall':<28} | {'µs/tx':>9} | {'Faktor':>8} | {'Alloc B':>7}")
+    print("-" * 62)
+    report = run(args)
+
+    output = args.output or os.path.join('benchmarks', 'results', f"frame_cpu-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nErgebnisse gespeichert: {output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# -----------------------------------------------------------------------------
+# Company: KARIM Technologies
+# Author: Sayed Amir Karim
+# Copyright: 2024 KARIM Technologies
+#
+# License: All Rights Reserved
+#
+# Module: Frame Latency Benchmark
+# Description: Latenz pro Modbus-Transaktion, feste Wartezeiten vs. Rahmenerkennung
+#
+# Aufruf aus dem Projektverzeichnis:
+#   python -m benchmarks.frame_latency [--iterations 50] [--response-delay 0.005]
+# -----------------------------------------------------------------------------
+
+"""Latenz pro Modbus-Transaktion gegen den RTU-Slave-Simulator: feste Wartezeit vor dem Lesen (alt) vs. Rahmenerkennung"""
+
+import argparse
+import statistics
+import time
+
+from modbus_manager import DeviceManager
+from simulator.rtu_slave import RtuSlaveSimulator, SimulatedDevice
+
+SLAVE_ID = 1
+
+class FixedSleepDeviceManager(DeviceManager):
+    """Bildet das alte Verhalten nach: feste Wartezeit vor dem Lesen der Antwort"""
+
+    def __init__(self, *args, fixed_sleep=0.1, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fixed_sleep = fixed_sleep
+
+    def _send_and_receive(self, message, timeout=None):
+        with self._lock:
+            self.ser.reset_input_buffer()
+            self.ser.write(message)
+            time.sleep(self.fixed_sleep)
+            return self._read_frame(message[1], timeout)
+
+def make_devices():
+    return {SLAVE_ID: SimulatedDevice.from_profile('ph', ph_value=7.1, temperature=21.5)}
+
+def measure(dev_manager, call, iterations):
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        call(dev_manager)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--baudrate', type=int, default=9600)
+    parser.add_argument('--response-delay', type=float, default=0.005,
+                        help='Simulierte Verarbeitungszeit des Slaves in Sekunden')
+    args = parser.parse_args()
+
+    cases = [
+        ('read_register (2 Reg.)', 0.2, lambda dm: dm.read_register(SLAVE_ID, 0x0001, 2)),
+        ('read_radar_sensor', 0.1, lambda dm: dm.read_radar_sensor(SLAVE_ID, 0x0001)),
+        ('read_flow_sensor', 0.1, lambda dm: dm.read_flow_sensor(SLAVE_ID, 0x0001)),
+    ]
+
+    print(f"\nBaudrate {args.baudrate}, Antwortverzögerung {args.response_delay * 1000:.1f} ms, "
+          f"{args.iterations} Transaktionen pro Messung\n")
+    print(f"{'Transaktion':<24} | {'feste Wartezeit':>16} | {'Rahmenerkennung':>16} | {'Faktor':>6}")
+    print("-" * 72)
+
+    with RtuSlaveSimulator(make_devices(), args.baudrate, args.response_delay) as slave:
+        settings = dict(port=slave.port, baudrate=args.baudrate, parity='N',
+                        stopbits=1, bytesize=8, timeout=1)
+        for name, fixed_sleep, call in cases:
+            before = FixedSleepDeviceManager(fixed_sleep=fixed_sleep, **settings)
+            before_ms = statistics.median(measure(before, call, args.iterations)) * 1000
+            before.ser.close()
+
+            after = DeviceManager(**settings)
+            after_ms = statistics.median(measure(after, call, args.iterations)) * 1000
+            after.ser.close()
+
+            print(f"{name:<24} | {before_ms:13.1f} ms | {after_ms:13.1f} ms | {before_ms / after_ms:5.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# -----------------------------------------------------------------------------
+# Company: KARIM Technologies
+# Author: Sayed Amir Karim
+# Copyright: 2024 KARIM Technologies
+#
+# License: All Rights Reserved
+#
+# Module: Telemetry Store Benchmark
+# Description: Einstell-Durchsatz und Abbaurate der persistenten Telemetrie-Queue
+#
+# Aufruf aus dem Projektverzeichnis (Pfad auf die SD-Karte des Gateways legen):
+#   python -m benchmarks.telemetry_store --path /home/owipex_adm/bench.db
+# -----------------------------------------------------------------------------
+
+import os
+import time
+import argparse
+
+from telemetry.publisher import TelemetryEntry
+from telemetry.store import TelemetryStore
+
+def sample_reading(index):
+    """Telemetrie in der Form von SensorManager.format_sensor_data"""
+    return {
+        "simple": {"turbidity_1_turbidity": 12.5 + index % 10, "turbidity_1_temperature": 21.3},
+        "json": {
+            "turbidity_1_data": {
+                "info": {"name": "Trübungssensor 1", "location": "Kundenbecken",
+                         "type": "turbidity", "device_id": 2},
+                "metadata": {"manufacturer": "OWIPEX", "model": "TU5300sc", "serial": "18D4422"},
+                "measurements": {"turbidity": 12.5 + index % 10, "temperature": 21.3},
+                "timestamp": int(time.time() * 1000),
+                "status": "active"
+            }
+        }
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark der persistenten Telemetrie-Queue')
+    parser.add_argument('--path', default='bench_telemetry_store.db')
+    parser.add_argument('--entries', type=int, default=5000)
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--synchronous', default='NORMAL', choices=['OFF', 'NORMAL', 'FULL'])
+    args = parser.parse_args()
+
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(args.path + suffix):
+            os.remove(args.path + suffix)
+
+    store = TelemetryStore(args.path, synchronous=args.synchronous)
+    entries = [TelemetryEntry('turbidity_1', sample_reading(i)) for i in range(args.entries)]
+
+    start = time.perf_counter()
+    for entry in entries:
+        store.append(entry)
+    enqueue_time = time.perf_counter() - start
+    stored_bytes = store.bytes
+
+    start = time.perf_counter()
+    drained = 0
+    while len(store):
+        batch = store.peek(args.batch_size)
+        store.ack(batch)
+        drained += len(batch)
+    drain_time = time.perf_counter() - start
+    store.close()
+
+    print(f"\nTelemetry Store: {args.path} (synchronous={args.synchronous})")
+    print("-" * 60)
+    print(f"Einträge:            {args.entries} ({stored_bytes / 1024:.0f} KiB Nutzdaten)")
+    print(f"Einstellen:          {args.entries / enqueue_time:10.0f} Einträge/s "
+          f"({enqueue_time / args.entries * 1e6:.0f} µs/Eintrag)")
+    print(f"Abbau (Batch {args.batch_size:3}):    {drained / drain_time:10.0f} Einträge/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+# -----------------------------------------------------------------------------
+# Company: KARIM Technologies
+# Author: Sayed Amir Karim
+# Copyright: 2024 KARIM Technologies
+#
+# License: All Rights Reserved
+#
+# Module: Transaction Benchmark
+# Description: Durchsatz, Latenz, CPU-Zeit und Busauslastung des Modbus-Hot-Paths
+#              gegen den RTU-Slave-Simulator, Ergebnisse als JSON
+#
+# Aufruf aus dem Projektverzeichnis:
+#   python -m benchmarks.transactions [--output results.json] [--compare baseline.json]
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import tempfile
+import statistics
+import tracemalloc
+
+from modbus_manager import DeviceManager
+from bus_config import sensor_configs
+from simulator.rtu_slave import RtuSlaveSimulator, SimulatedDevice, sine, ramp
+
+BAUDRATES = (9600, 19200, 38400)
+CONFIG_PATH = 'config/sensors.json'
+
+PH_ID = 3
+RADAR_ID = 1
+FLOW_ID = 40
+
+# Einzeltransaktionen: (Name, Aufruf); ein Ergebnis None zählt als Fehler
+CASES = [
+    ('read_register', lambda dm: dm.read_register(PH_ID, 0x0001, 2)),
+    ('read_radar_sensor', lambda dm: dm.read_radar_sensor(RADAR_ID, 0x0001)),
+    ('read_flow_sensor', lambda dm: dm.read_flow_sensor(FLOW_ID, 0x0001)),
+    ('write_registers', lambda dm: dm.write_registers(PH_ID, 0x0010, [1, 2])),
+]
+
+def make_devices(sensor_configs=()):
+    """Simulierte Geräte für die Einzeltransaktionen und alle Sensoren aus der Konfiguration"""
+    devices = {
+        PH_ID: SimulatedDevice.from_profile('ph', ph_value=sine(7.0, 0.3, 60), temperature=21.5),
+        RADAR_ID: SimulatedDevice.from_profile('radar', measured_air_distance=sine(3000, 50, 60)),
+        FLOW_ID: SimulatedDevice.from_profile('flow', flow_rate=sine(12.0, 2.0, 30), velocity=0.4,
+                                              total_flow=ramp(1000.0, 0.1)),
+    }
+    for sensor_config in sensor_configs:
+        if sensor_config['device_id'] not in devices:
+            devices[sensor_config['device_id']] = SimulatedDevice.from_profile(sensor_config['type'])
+    return devices
+
+def percentile(sorted_values, percent):
+    """Nearest-Rank-Perzentil einer sortierten Liste"""
+    index = max(0, min(len(sorted_values) - 1, int(round(percent / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def measure(simulator, call, iterations):
+    """Führt ``call`` iterations-mal aus und sammelt Latenz, CPU-Zeit und Bytes auf dem Bus.
+
+    Die CPU-Zeit wird mit time.thread_time() nur für den aufrufenden Thread
+    gemessen, der Simulator läuft im selben Prozess und zählt nicht mit.
+    """
+    latencies = []
+    errors = 0
+    bytes_before = simulator.bytes_received + simulator.bytes_sent
+    cpu_start = time.thread_time()
+    wall_start = time.perf_counter()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        try:
+            if call() is None:
+                errors += 1
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+    wall_time = time.perf_counter() - wall_start
+    cpu_time = time.thread_time() - cpu_start
+    bus_bytes = simulator.bytes_received + simulator.bytes_sent - bytes_before
+    # Anteil der Wandzeit, in der Zeichen auf der Leitung waren; der Simulator
+    # taktet Anfragen und Antworten, auf einer Halbduplex-Leitung also höchstens 100 %
+    utilisation = bus_bytes * simulator.char_time / wall_time
+    assert utilisation <= 1.0, f"Busauslastung {utilisation:.0%} über 100 % - Simulator taktet nicht alle Bytes"
+
+    latencies.sort()
+    return {
+        'transactions': iterations,
+        'errors': errors,
+        'tx_per_s': round(iterations / wall_time, 2),
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50) * 1000, 3),
+            'p95': round(percentile(latencies, 95) * 1000, 3),
+            'p99': round(percentile(latencies, 99) * 1000, 3),
+            'max': round(latencies[-1] * 1000, 3),
+        },
+        'cpu_us_per_tx': round(cpu_time / iterations * 1e6, 1),
+        'bus_bytes': bus_bytes,
+        'bus_utilisation': round(utilisation, 4),
+    }
+
+def measure_allocations(call, iterations):
+    """Zusätzlicher Python-Heap, den eine Transaktion höchstens belegt (tracemalloc, Median in Bytes).
+
+    CPython zählt Allokationen nicht einzeln; die Spitze über dem Stand vor
+    der Transaktion zeigt, wie viele Zwischenobjekte (Rahmenkopien, Slices,
+    Lesepuffer) gleichzeitig leben. Eigener Durchlauf, weil tracemalloc die
+    Laufzeit verfälscht. Der Simulator-Thread ist mitgezählt, sein Anteil ist
+    für alle Versionen gleich.
+    """
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(iterations):
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            try:
+                call()
+            except Exception:
+                pass
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+    return int(statistics.median(peaks))
+
+def simulated_config(port, baudrate):
+    """Konfiguration aus config/sensors.json, alle Sensoren auf einem Bus am Simulator und ohne Persistenz"""
+    with open(CONFIG_PATH, 'r') as f:
+        config = json.load(f)
+    config['buses'] = [{
+        'name': 'simulator',
+        'rs485_settings': {'port': port, 'baudrate': baudrate},
+        'sensors': sensor_configs(config)
+    }]
+    config.get('telemetry', {}).pop('store', None)
+    config.get('circuit_breaker', {}).pop('state_file', None)
+    return config
+
+def run_cycle(manager):
+    """Ein vollständiger Abfragezyklus: jeder Sensor einmal wie in SensorManager.run"""
+    now = time.monotonic()
+    for sensor_id, sensor_info in manager.sensors.items():
+        manager.poll_sensor(sensor_id, sensor_info, now)
+    return True
+
+def bench_sensor_manager(simulator, baudrate, cycles):
+    from sensors.sensor_manager import SensorManager
+
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+        json.dump(simulated_config(simulator.port, baudrate), f)
+    try:
+        manager = SensorManager(config_path=f.name)
+    finally:
+        os.remove(f.name)
+
+    result = measure(simulator, lambda: run_cycle(manager), cycles)
+    result['alloc_peak_bytes'] = measure_allocations(lambda: run_cycle(manager), min(cycles, 10))
+    result['sensors'] = len(manager.sensors)
+    for bus in manager.buses:
+        bus.dev_manager.ser.close()
+    return result
+
+def run(args):
+    with open(CONFIG_PATH, 'r') as f:
+        sensors = sensor_configs(json.load(f))
+
+    results = []
+    for baudrate in args.baudrates:
+        with RtuSlaveSimulator(make_devices(sensors), baudrate, args.response_delay) as simulator:
+            dev_manager = DeviceManager(port=simulator.port, baudrate=baudrate, parity='N',
+                                        stopbits=1, bytesize=8, timeout=1)
+            for name, call in CASES:
+                result = measure(simulator, lambda: call(dev_manager), args.iterations)
+                result['alloc_peak_bytes'] = measure_allocations(lambda: call(dev_manager), min(args.iterations, 50))
+                results.append(dict(case=name, baudrate=baudrate, **result))
+                print_result(results[-1])
+            dev_manager.ser.close()
+
+            if args.cycles:
+                result = bench_sensor_manager(simulator, baudrate, args.cycles)
+                results.append(dict(case='sensor_manager_cycle', baudrate=baudrate, **result))
+                print_result(results[-1])
+
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'iterations': args.iterations,
+        'cycles': args.cycles,
+        'response_delay': args.response_delay,
+        'results': results,
+    }
+
+def print_header():
+    print(f"\n{'Transaktion':<22} {'Baud':>6} | {'tx/s':>7} | {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} | "
+          f"{'CPU µs/tx':>9} | {'Alloc B':>7} | {'Bus':>5} | {'Fehler':>6}")
+    print("-" * 108)
+
+def print_result(result):
+    latency = result['latency_ms']
+    print(f"{result['case']:<22} {result['baudrate']:>6} | {result['tx_per_s']:7.1f} | "
+          f"{latency['p50']:7.2f} {latency['p95']:7.2f} {latency['p99']:7.2f} | "
+          f"{result['cpu_us_per_tx']:9.0f} | {result.get('alloc_peak_bytes', 0):7d} | "
+          f"{result['bus_utilisation']:5.0%} | {result['errors']:>6}")
+
+def compare(report, baseline_path):
+    """Vergleicht p50-Latenz, Durchsatz und Allokationsspitze mit einem früheren Lauf"""
+    with open(baseline_path, 'r') as f:
+        baseline = {(r['case'], r['baudrate']): r for r in json.load(f)['results']}
+
+    print(f"\nVergleich mit {baseline_path}")
+    print(f"{'Transaktion':<22} {'Baud':>6} | {'p50 vorher':>10} {'p50 jetzt':>10} {'Δ':>7} | {'tx/s Δ':>7} | "
+          f"{'Alloc B vorher':>14} {'jetzt':>6}")
+    print("-" * 97)
+    for result in report['results']:
+        before = baseline.get((result['case'], result['baudrate']))
+        if before is None:
+            continue
+        p50_before, p50_now = before['latency_ms']['p50'], result['latency_ms']['p50']
+        print(f"{result['case']:<22} {result['baudrate']:>6} | {p50_before:10.2f} {p50_now:10.2f} "
+              f"{(p50_now / p50_before - 1):+7.1%} | {(result['tx_per_s'] / before['tx_per_s'] - 1):+7.1%} | "
+              f"{before.get('alloc_peak_bytes', '-'):>14} {result.get('alloc_peak_bytes', '-'):>6}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark des Modbus-Hot-Paths gegen den RTU-Slave-Simulator')
+    parser.add_argument('--iterations', type=int, default=200, help='Transaktionen pro Messung')
+    parser.add_argument('--cycles', type=int, default=20,
+                        help='SensorManager-Abfragezyklen pro Baudrate (0 = überspringen)')
+    parser.add_argument('--baudrates', type=int, nargs='+', default=list(BAUDRATES))
+    parser.add_argument('--response-delay', type=float, default=0.005,
+                        help='Simulierte Verarbeitungszeit des Slaves in Sekunden')
+    parser.add_argument('--output', default=None,
+                        help='JSON-Ergebnisdatei (Standard: benchmarks/results/transactions-<Zeit>.json)')
+    parser.add_argument('--compare', default=None, metavar='BASELINE',
+                        help='Früheres JSON-Ergebnis zum Vergleich')
+    args = parser.parse_args()
+
+    # Vor SensorManager konfigurieren, dessen basicConfig(INFO) greift dann nicht
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - [%(name)s] - %(message)s')
+
+    print(f"Antwortverzögerung {args.response_delay * 1000:.1f} ms, {args.iterations} Transaktionen, "
+          f"{args.cycles} SensorManager-Zyklen")
+    print_header()
+    report = run(args)
+
+    output = args.output or os.path.join('benchmarks', 'results',
+                                         f"transactions-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nErgebnisse gespeichert: {output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+    sys.exit(1 if any(r['errors'] for r in report['results']) else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# -----------------------------------------------------------------------------
+# Company: KARIM Technologies
+# Author: Sayed Amir Karim
+# Copyright: 2024 KARIM Technologies
+#
+# License: All Rights Reserved
+#
+# Module: Bus Config
+# Description: RS485-Busse und ihre Sensoren aus config/sensors.json
+# -----------------------------------------------------------------------------
+
+DEFAULT_PORT = '/dev/ttyS0'
+
+def bus_configs(config):
+    """Liste der Busse als Dicts mit name, rs485_settings und sensors.
+
+    Jeder Eintrag unter ``buses`` hat eigene ``rs485_settings``, die die
+    globalen ``rs485_settings`` ergänzen bzw. überschreiben::
+
+        "rs485_settings": {"baudrate": 9600, "timeout": 1},
+        "buses": [
+            {"name": "ttyS0", "rs485_settings": {"port": "/dev/ttyS0"}, "sensors": [...]},
+            {"name": "usb0", "rs485_settings": {"port": "/dev/ttyUSB0", "baudrate": 19200}, "sensors": [...]}
+        ]
+
+    Ältere Konfigurationen ohne ``buses`` (nur ``rs485_settings`` und
+    ``sensors``) ergeben einen einzelnen Bus.
+    """
+    defaults = config.get('rs485_settings', {})
+    buses = config.get('buses')
+    if buses is None:
+        buses = [{'sensors': config.get('sensors', [])}]
+
+    result = []
+    for bus in buses:
+        settings = dict(defaults)
+        settings.update(bus.get('rs485_settings', {}))
+        settings.setdefault('port', DEFAULT_PORT)
+        result.append({
+            'name': bus.get('name', settings['port']),
+            'rs485_settings': settings,
+            'sensors': bus.get('sensors', [])
+        })
+    return result
+
+def sensor_configs(config):
+    """Alle Sensoren über alle Busse"""
+    return [sensor for bus in bus_configs(config) for sensor in bus['sensors']]
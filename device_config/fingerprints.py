@@ -0,0 +1,289 @@
+# -----------------------------------------------------------------------------
+# Company: KARIM Technologies
+# Author: Sayed Amir Karim
+# Copyright: 2024 KARIM Technologies
+#
+# License: All Rights Reserved
+#
+# Module: Device Fingerprints
+# Description: Gerätetyp-Erkennung über Registersignaturen aus
+#              config/fingerprints.json, mit Cache bekannter Geräte
+# -----------------------------------------------------------------------------
+
+import os
+import json
+import logging
+from datetime import datetime
+from modbus_manager import DATA_TYPES, register_codec
+
+DEFAULT_DATABASE = 'config/fingerprints.json'
+DEFAULT_CACHE = 'data/fingerprint_cache.json'
+
+# Ausgang einer Probe-Anfrage: Tupel der dekodierten Werte oder EXCEPTION
+EXCEPTION = 'exception'
+
+class Probe:
+    """Eine Leseanfrage (FC03) der Datenbank, dekodiert als Folge gleichartiger Werte"""
+
+    def __init__(self, name, register, count, data_type='uint16', byte_order='ABCD'):
+        self.name = name
+        self.register = register
+        self.count = count
+        size = DATA_TYPES[data_type][1]
+        self.codec = register_codec(tuple((offset, data_type, byte_order) for offset in range(0, count, size)))
+
+    def outcome(self, data):
+        return self.codec.decode(data)
+
+class Expectation:
+    """Erwarteter Ausgang einer Probe für einen Gerätetyp.
+
+    ``{"equals": "address"}`` (Wert = Slave-Adresse), ``{"equals": n}``,
+    ``{"range": [min, max]}`` (alle Werte), ``{"ranges": [[min, max], ...]}``
+    (pro Wert), ``{"exception": true}`` oder ``{"any": true}``.
+    """
+
+    def __init__(self, spec):
+        self.any = spec.get('any', False)
+        self.exception = spec.get('exception', False)
+        self.equals = spec.get('equals')
+        if 'range' in spec:
+            self.ranges = [tuple(spec['range'])]
+        else:
+            self.ranges = [tuple(r) for r in spec['ranges']] if 'ranges' in spec else None
+
+    def accepts(self, outcome, address):
+        if self.any:
+            return True
+        if self.exception or outcome == EXCEPTION:
+            return self.exception and outcome == EXCEPTION
+        if self.equals is not None:
+            expected = address if self.equals == 'address' else self.equals
+            return outcome[0] == expected
+        if self.ranges is not None:
+            ranges = self.ranges if len(self.ranges) > 1 else self.ranges * len(outcome)
+            return all(low <= value <= high for value, (low, high) in zip(outcome, ranges))
+        return True
+
+    def compatible(self, truth):
+        """Kann ein Gerät mit Erwartung ``truth`` einen Ausgang liefern, den diese Erwartung akzeptiert?
+
+        Optimistisch für die Probe-Auswahl: ein Gerät ohne konkrete Erwartung
+        (``any``) liefert vermutlich etwas, das konkrete Erwartungen verfehlt.
+        """
+        if self.any:
+            return True
+        if truth.any:
+            return False
+        if self.exception or truth.exception:
+            return self.exception and truth.exception
+        if self.ranges is not None and truth.ranges is not None:
+            return all(low <= other_high and other_low <= high
+                       for (low, high), (other_low, other_high) in zip(self.ranges, truth.ranges))
+        return True
+
+    def key(self):
+        return (self.any, self.exception, self.equals, tuple(self.ranges or ()))
+
+EXPECT_EXCEPTION = Expectation({'exception': True})
+EXPECT_ANY = Expectation({'any': True})
+
+class TypeMatch:
+    """Ergebnis einer Typerkennung.
+
+    Eine Plausibilitätsprüfung, keine Identifikation: die Register bestätigen
+    nur, dass die Antworten zur Signatur des Typs passen. ``resolved_by`` sagt,
+    woher der Typ stammt (``signature``, ``config``, ``default_address``,
+    ``cache``); bei ``config`` und ``default_address`` war er über Register
+    nicht unterscheidbar.
+    """
+
+    def __init__(self, device_type, name, candidates, requests, resolved_by, address_outcome=None):
+        self.device_type = device_type
+        self.name = name
+        self.candidates = candidates
+        self.requests = requests
+        self.resolved_by = resolved_by
+        self.address_outcome = address_outcome
+
+class FingerprintDatabase:
+    """Registersignaturen der Gerätetypen.
+
+    Die Erkennung wählt als nächste Anfrage immer die Probe, die die
+    verbleibenden Kandidaten voraussichtlich am stärksten aufteilt, und hört
+    auf, sobald nur noch ein Typ passt. Register ohne Eintrag in ``expect``
+    beantwortet ein Gerät zunächst mit einer Exception (strikt); passt danach
+    kein Typ mehr, zählen nur noch die ausdrücklich eingetragenen Erwartungen.
+    Bleiben mehrere Typen (z.B. pH und Trübung mit Messwert unter 14), entscheidet
+    der in der Konfiguration für die Adresse eingetragene Typ, dann die
+    Standardadresse des Typs.
+    """
+
+    def __init__(self, probes, devices):
+        self.probes = probes
+        self.devices = devices
+
+    @classmethod
+    def load(cls, path=DEFAULT_DATABASE):
+        with open(path, 'r') as f:
+            database = json.load(f)
+        probes = {
+            name: Probe(name, int(spec['register'], 0), spec['count'], spec.get('type', 'uint16'),
+                        spec.get('byte_order', 'ABCD'))
+            for name, spec in database['probes'].items()
+        }
+        devices = {}
+        for device_type, spec in database['devices'].items():
+            devices[device_type] = {
+                'name': spec['name'],
+                'default_address': spec.get('default_address'),
+                'address_probe': spec.get('address_probe'),
+                'expect': {probe: Expectation(expectation) for probe, expectation in spec['expect'].items()}
+            }
+        return cls(probes, devices)
+
+    def find_probe(self, register, count):
+        for probe in self.probes.values():
+            if probe.register == register and probe.count == count:
+                return probe
+        return None
+
+    def expectation(self, device_type, probe_name, strict=True):
+        expectation = self.devices[device_type]['expect'].get(probe_name)
+        if expectation is None:
+            return EXPECT_EXCEPTION if strict else EXPECT_ANY
+        return expectation
+
+    def candidates(self, observations, address, strict=True):
+        return [
+            device_type for device_type in self.devices
+            if all(self.expectation(device_type, probe, strict).accepts(outcome, address)
+                   for probe, outcome in observations.items())
+        ]
+
+    def best_probe(self, candidates, observations, strict=True):
+        """Probe mit der kleinsten erwarteten Anzahl verbleibender Kandidaten"""
+        best, best_score = None, None
+        for name in self.probes:
+            if name in observations:
+                continue
+            expectations = {device_type: self.expectation(device_type, name, strict) for device_type in candidates}
+            if len({expectation.key() for expectation in expectations.values()}) < 2:
+                continue  # Alle Kandidaten erwarten dasselbe
+            score = sum(
+                sum(1 for expectation in expectations.values() if expectation.compatible(truth))
+                for truth in expectations.values()
+            ) / len(candidates)
+            if best_score is None or score < best_score:
+                best, best_score = self.probes[name], score
+        return best
+
+    def classify(self, read, address, observations=None, hint=None):
+        """Erkennt den Typ des Geräts unter ``address``.
+
+        ``read(probe)`` führt eine Probe-Anfrage aus und gibt den Ausgang
+        zurück (None ohne verwertbare Antwort). ``observations`` enthält bereits
+        bekannte Ausgänge (z.B. der Anwesenheitsprüfung), ``hint`` den laut
+        Konfiguration erwarteten Typ.
+        """
+        observations = dict(observations or {})
+        unanswered = set()
+        requests = 0
+        strict = True
+        while True:
+            candidates = self.candidates(observations, address, strict)
+            if not candidates and strict:
+                strict = False
+                continue
+            if len(candidates) == 1:
+                # Adressregister des Typs gegenlesen (Wert = Slave-Adresse, Vergleichswert für den Cache)
+                address_probe = self.devices[candidates[0]]['address_probe']
+                if not address_probe or address_probe in observations or address_probe in unanswered:
+                    break
+                probe = self.probes[address_probe]
+            elif not candidates:
+                break
+            else:
+                probe = self.best_probe(candidates, {**observations, **dict.fromkeys(unanswered)}, strict)
+                if probe is None:
+                    break
+            outcome = read(probe)
+            requests += 1
+            if outcome is None:
+                unanswered.add(probe.name)
+            else:
+                observations[probe.name] = outcome
+
+        resolved_by = 'signature'
+        if len(candidates) > 1:
+            candidates, resolved_by = self._resolve(candidates, address, hint)
+        if len(candidates) != 1:
+            return TypeMatch(None, None, candidates, requests, None)
+
+        device_type = candidates[0]
+        address_probe = self.devices[device_type]['address_probe']
+        return TypeMatch(device_type, self.devices[device_type]['name'], candidates, requests, resolved_by,
+                         observations.get(address_probe))
+
+    def _resolve(self, candidates, address, hint):
+        if hint in candidates:
+            return [hint], 'config'
+        by_address = [device_type for device_type in candidates
+                      if self.devices[device_type]['default_address'] == address]
+        if len(by_address) == 1:
+            return by_address, 'default_address'
+        return candidates, None
+
+class FingerprintCache:
+    """Erkannte Typen pro (Port, Adresse) mit dem Wert ihres Adressregisters.
+
+    Bei einem erneuten Scan genügt eine Anfrage an das Adressregister: stimmt
+    der Wert, gilt der gespeicherte Typ, sonst wird neu erkannt. Das Register
+    enthält nur die Slave-Adresse - ein getauschtes Gerät, das dasselbe
+    Register unter derselben Adresse beantwortet (z.B. pH statt Trübung),
+    fällt nicht auf. Nach einem Gerätetausch mit ``--no-cache`` scannen.
+    Der Scanner speichert nur Typen, die die Signatur allein entschieden hat.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE):
+        self.path = path
+        self.logger = logging.getLogger('FingerprintCache')
+        self.entries = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    self.entries = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                self.logger.warning(f"Fingerprint-Cache nicht lesbar, beginne neu: {e}")
+
+    @staticmethod
+    def _key(port, address):
+        return f"{port}:{address}"
+
+    def get(self, port, address):
+        return self.entries.get(self._key(port, address))
+
+    def put(self, port, address, match, address_probe):
+        self.entries[self._key(port, address)] = {
+            'type': match.device_type,
+            'address_probe': address_probe,
+            'address_value': list(match.address_outcome),
+            'timestamp': datetime.now().isoformat(timespec='seconds')
+        }
+
+    def remove(self, port, address):
+        self.entries.pop(self._key(port, address), None)
+
+    def save(self):
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_file = f"{self.path}.tmp"
+            with open(temp_file, 'w') as f:
+                json.dump(self.entries, f, indent=2)
+            os.replace(temp_file, self.path)
+        except OSError as e:
+            self.logger.error(f"Fehler beim Speichern des Fingerprint-Caches: {e}")
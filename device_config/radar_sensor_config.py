@@ -7,6 +7,9 @@
 #
 # Module: Radar Sensor ID Configuration V0.2
 # Description: Interactive script to set the Radar Sensor device ID
+#
+# Aufruf aus dem Projektverzeichnis:
+#   python -m device_config.radar_sensor_config
 # -----------------------------------------------------------------------------
 
 import serial
@@ -15,6 +18,7 @@ import crcmod.predefined
 import logging
 import time
 import json
+from bus_config import sensor_configs
 
 # Default Konstanten für Radar-Sensor Konfiguration (als Fallback)
 DEFAULT_CONFIG = {
@@ -40,8 +44,8 @@ class RadarSensorConfig:
             with open('config/sensors.json', 'r') as f:
                 config = json.load(f)
                 
-            # Suche nach dem Sensor mit der entsprechenden ID
-            for sensor in config['sensors']:
+            # Suche nach dem Sensor mit der entsprechenden ID (über alle Busse)
+            for sensor in sensor_configs(config):
                 if sensor['id'] == f"radar_{self.sensor_id}" and sensor['type'] == 'radar':
                     return sensor['container_config']
                     
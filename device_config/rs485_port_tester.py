@@ -11,11 +11,12 @@
 
 import serial
 import struct
-import crcmod.predefined
 import logging
 import time
 import sys
 from typing import Optional, Dict, Any
+from modbus_manager import decode_value
+from modbus_crc import crc16
 
 def setup_logging():
     logging.basicConfig(
@@ -36,7 +37,7 @@ class RS485PortTester:
                 bytesize=8,
                 timeout=1
             )
-            self.crc16 = crcmod.predefined.mkPredefinedCrcFun('modbus')
+            self.crc16 = crc16
             print(f"Port {port} erfolgreich geöffnet")
         except Exception as e:
             print(f"Fehler beim Öffnen des Ports {port}: {e}")
@@ -56,7 +57,7 @@ class RS485PortTester:
             print(f"Empfangene Antwort: {response.hex() if response else 'Keine Antwort'}")
             
             if len(response) == 7:
-                value = struct.unpack('>H', response[3:5])[0]
+                value = decode_value(response[3:5], 'uint16')
                 return {"air_height": value}
             return None
         except Exception as e:
@@ -90,10 +91,9 @@ class RS485PortTester:
                 print(f"Empfangene Temperatur-Antwort: {temp_response.hex() if temp_response else 'Keine Antwort'}")
                 
                 if len(temp_response) == 9:
-                    ph_bytes = response[3:7]
-                    temp_bytes = temp_response[3:7]
-                    ph_value = struct.unpack('>f', ph_bytes)[0]
-                    temp_value = struct.unpack('>f', temp_bytes)[0]
+                    # Wort-Tausch (CDAB) wie in config/profiles/ph.json
+                    ph_value = decode_value(response[3:7], 'float32', 'CDAB')
+                    temp_value = decode_value(temp_response[3:7], 'float32', 'CDAB')
                     return {
                         "ph": ph_value,
                         "temperature": temp_value
@@ -130,10 +130,9 @@ class RS485PortTester:
                 print(f"Empfangene Temperatur-Antwort: {temp_response.hex() if temp_response else 'Keine Antwort'}")
                 
                 if len(temp_response) == 9:
-                    turb_bytes = response[3:7]
-                    temp_bytes = temp_response[3:7]
-                    turbidity = struct.unpack('>f', turb_bytes)[0]
-                    temp_value = struct.unpack('>f', temp_bytes)[0]
+                    # Wort-Tausch (CDAB) wie in config/profiles/turbidity.json
+                    turbidity = decode_value(response[3:7], 'float32', 'CDAB')
+                    temp_value = decode_value(temp_response[3:7], 'float32', 'CDAB')
                     return {
                         "turbidity": turbidity,
                         "temperature": temp_value
@@ -159,8 +158,7 @@ class RS485PortTester:
             print(f"Empfangene Durchfluss-Antwort: {response.hex() if response else 'Keine Antwort'}")
             
             if len(response) == 9:
-                flow_bytes = response[3:7]
-                flow_rate = struct.unpack('>f', flow_bytes)[0]
+                flow_rate = decode_value(response[3:7], 'float32', 'ABCD')
                 return {
                     "flow_rate": flow_rate
                 }
@@ -5,16 +5,60 @@
 #
 # License: All Rights Reserved
 #
-# Module: RS485 Scanner V0.1
+# Module: RS485 Scanner V0.2
 # Description: Tool to scan for RS485 devices and identify their type
+#
+# Zweiphasiger Scan: zuerst eine Anwesenheitsprüfung aller Adressen mit einer
+# minimalen Anfrage und einem an die Baudrate angepassten Timeout, danach die
+# Typerkennung nur für Adressen, die geantwortet haben.
+#
+# Mit --discover werden zusätzlich Baudraten und Parität/Stoppbits durchprobiert,
+# die wahrscheinlichsten Einstellungen zuerst.
+#
+# Aufruf aus dem Projektverzeichnis:
+#   python -m device_config.rs485_scanner --port /dev/ttyS0 [--output scan.json]
+#   python -m device_config.rs485_scanner --port /dev/ttyS0 --discover
 # -----------------------------------------------------------------------------
 
-import serial
-import struct
-import crcmod.predefined
-import logging
+import sys
+import json
 import time
+import logging
+import argparse
+from datetime import datetime
 from typing import Dict, Optional
+from modbus_manager import (DeviceManager, ModbusError, ModbusExceptionResponse, ModbusCRCError)
+from bus_config import sensor_configs
+from device_config.fingerprints import (FingerprintDatabase, FingerprintCache, TypeMatch, EXCEPTION,
+                                        DEFAULT_DATABASE, DEFAULT_CACHE)
+
+# Register für die Anwesenheitsprüfung; eine Exception-Antwort zählt ebenfalls
+PRESENCE_REGISTER = 0x0000
+# Zeit, die ein Slave nach dem Ende der Anfrage bis zur Antwort brauchen darf
+DEFAULT_TURNAROUND = 0.04
+
+# Discovery-Matrix, jeweils nach Wahrscheinlichkeit sortiert: Werkseinstellung
+# unserer Sensoren ist 9600 8N1, die Modbus-Spezifikation empfiehlt 8E1
+BAUDRATES = (9600, 19200, 4800, 38400, 115200, 2400, 57600)
+LINE_FORMATS = (('N', 1), ('E', 1), ('O', 1), ('N', 2))
+# Werksadresse der Sensoren, wird bei der Discovery zuerst geprüft
+FACTORY_ADDRESS = 1
+
+# Ergebnis der Anwesenheitsprüfung
+PRESENT = 'response'
+PRESENT_EXCEPTION = 'exception'
+PRESENT_CRC_ERROR = 'crc_error'
+# Gültige Antworten - die Schnittstellenparameter stimmen. Ein CRC-Fehler kann
+# auch von falscher Parität oder falschen Stoppbits kommen.
+CONFIDENT = (PRESENT, PRESENT_EXCEPTION)
+
+# Herkunft des erkannten Typs (TypeMatch.resolved_by) für die Ausgabe
+RESOLUTION_LABELS = {
+    'signature': 'Signatur',
+    'cache': 'Cache, Adressregister bestätigt',
+    'config': 'per Register nicht unterscheidbar, Typ laut Konfiguration',
+    'default_address': 'per Register nicht unterscheidbar, Typ laut Standardadresse'
+}
 
 def setup_logging():
     logging.basicConfig(
@@ -22,133 +66,376 @@ def setup_logging():
         format='%(asctime)s - %(levelname)s - %(message)s'
     )
 
+def presence_timeout(baudrate, parity='N', stopbits=1, bytesize=8, turnaround=DEFAULT_TURNAROUND):
+    """Timeout bis zum Antwort-Header: Antwortzeit des Slaves plus drei Zeichenzeiten"""
+    bits_per_char = 1 + bytesize + (0 if parity == 'N' else 1) + stopbits
+    return turnaround + 3 * bits_per_char / baudrate
+
 class RS485Scanner:
-    def __init__(self, port='/dev/ttyS0'):
+    def __init__(self, port='/dev/ttyS0', baudrate=9600, parity='N', stopbits=1, bytesize=8,
+                 turnaround=DEFAULT_TURNAROUND, timeout=0.3, database=None, cache=None, hints=None):
         self.port = port
-        self.ser = serial.Serial(
-            port=port,
-            baudrate=9600,
-            parity=serial.PARITY_NONE,
-            stopbits=1,
-            bytesize=8,
-            timeout=0.3  # Kurzes Timeout für schnelleres Scannen
-        )
-        self.crc16 = crcmod.predefined.mkPredefinedCrcFun('modbus')
-
-    def test_radar_sensor(self, address: int) -> bool:
-        """Test ob ein Radar-Sensor unter dieser Adresse antwortet"""
-        message = struct.pack('>BBHH', address, 0x03, 0x0000, 0x0001)
-        message += struct.pack('<H', self.crc16(message))
-        
-        self.ser.write(message)
-        response = self.ser.read(7)
-        
-        if len(response) == 7:
-            value = struct.unpack('>H', response[3:5])[0]
-            return True
-        return False
-
-    def test_ph_sensor(self, address: int) -> bool:
-        """Test ob ein PH-Sensor unter dieser Adresse antwortet"""
-        message = struct.pack('>BBHH', address, 0x03, 0x0001, 0x0002)
-        message += struct.pack('<H', self.crc16(message))
-        
-        self.ser.write(message)
-        response = self.ser.read(9)
-        
-        return len(response) == 9
-
-    def test_turbidity_sensor(self, address: int) -> bool:
-        """Test ob ein Trübungssensor unter dieser Adresse antwortet"""
-        message = struct.pack('>BBHH', address, 0x03, 0x0001, 0x0002)
-        message += struct.pack('<H', self.crc16(message))
-        
-        self.ser.write(message)
-        response = self.ser.read(9)
-        
-        return len(response) == 9
-
-    def test_flow_sensor(self, address: int) -> bool:
-        """Test ob ein Durchflusssensor unter dieser Adresse antwortet"""
-        message = struct.pack('>BBHH', address, 0x03, 0x0009, 0x0002)
-        message += struct.pack('<H', self.crc16(message))
-        
-        self.ser.write(message)
-        response = self.ser.read(9)
-        
-        return len(response) == 9
+        self.settings = {'baudrate': baudrate, 'parity': parity, 'stopbits': stopbits, 'bytesize': bytesize}
+        # Framing, t3.5-Pausen und Antwortprüfung übernimmt der DeviceManager
+        self.dev_manager = DeviceManager(port=port, timeout=timeout, **self.settings)
+        self.presence_timeout = presence_timeout(baudrate, parity, stopbits, bytesize, turnaround)
+
+        # Typerkennung: Signaturdatenbank, Cache bekannter Geräte, konfigurierte Typen pro Adresse
+        self.database = database or FingerprintDatabase.load()
+        self.cache = cache
+        self.hints = hints or {}
+        # Ausgang der Anwesenheitsprüfung pro Adresse, zählt bei der Typerkennung mit
+        self.presence_outcomes = {}
+
+    def check_presence(self, address: int) -> Optional[str]:
+        """Eine minimale Anfrage (1 Register); None, wenn das Gerät nicht antwortet"""
+        probe = self.database.find_probe(PRESENCE_REGISTER, 1)
+        try:
+            data = self.dev_manager._read_holding_registers(address, PRESENCE_REGISTER, 1, self.presence_timeout)
+            if probe:
+                self.presence_outcomes[address] = {probe.name: probe.outcome(data)}
+            return PRESENT
+        except ModbusExceptionResponse:
+            # Das Gerät kennt das Register nicht, ist aber vorhanden
+            if probe:
+                self.presence_outcomes[address] = {probe.name: EXCEPTION}
+            return PRESENT_EXCEPTION
+        except ModbusCRCError:
+            # Gestörte Antwort - unter der Adresse sendet trotzdem ein Gerät
+            return PRESENT_CRC_ERROR
+        except ModbusError:
+            # Timeout oder Antwort eines anderen Slaves
+            return None
+
+    def read_probe(self, address: int, probe):
+        """Führt eine Probe-Anfrage aus: dekodierte Werte, EXCEPTION oder None ohne verwertbare Antwort"""
+        try:
+            return probe.outcome(self.dev_manager._read_holding_registers(address, probe.register, probe.count))
+        except ModbusExceptionResponse:
+            return EXCEPTION
+        except ModbusError:
+            return None
+
+    def classify(self, address: int):
+        """Erkennt den Gerätetyp über die Signaturdatenbank, bekannte Geräte aus dem Cache"""
+        cached = self._classify_cached(address)
+        if cached:
+            return cached
+
+        match = self.database.classify(lambda probe: self.read_probe(address, probe), address,
+                                       self.presence_outcomes.get(address), self.hints.get(address))
+        if self.cache is not None:
+            # Nur per Signatur eindeutige Typen cachen; config/default_address wird jedes Mal neu entschieden
+            if match.resolved_by == 'signature' and match.address_outcome not in (None, EXCEPTION):
+                address_probe = self.database.devices[match.device_type]['address_probe']
+                self.cache.put(self.port, address, match, address_probe)
+            else:
+                self.cache.remove(self.port, address)
+        return match
+
+    def _classify_cached(self, address: int):
+        """Eine Anfrage an das Adressregister; stimmt der Wert mit dem Cache überein, gilt der gespeicherte Typ"""
+        entry = self.cache.get(self.port, address) if self.cache is not None else None
+        if (not entry or entry['type'] not in self.database.devices
+                or entry.get('address_probe') not in self.database.probes):
+            return None
+        outcome = self.read_probe(address, self.database.probes[entry['address_probe']])
+        if outcome in (None, EXCEPTION) or list(outcome) != entry['address_value']:
+            return None
+        device_type = entry['type']
+        return TypeMatch(device_type, self.database.devices[device_type]['name'], [device_type], 1,
+                         'cache', outcome)
 
     def identify_device(self, address: int) -> Optional[str]:
-        """Identifiziert den Gerätetyp unter der gegebenen Adresse"""
-        if self.test_radar_sensor(address):
-            return "Radar-Sensor"
-        elif self.test_ph_sensor(address):
-            return "PH-Sensor"
-        elif self.test_turbidity_sensor(address):
-            return "Trübungssensor"
-        elif self.test_flow_sensor(address):
-            return "Durchflusssensor"
-        return None
-
-    def scan_range(self, start_addr: int = 1, end_addr: int = 247) -> Dict[int, str]:
-        """Scannt einen Adressbereich nach Geräten"""
+        """Name des erkannten Gerätetyps unter der gegebenen Adresse"""
+        return self.classify(address).name
+
+    def sweep(self, start_addr: int = 1, end_addr: int = 247, progress: bool = True) -> Dict[int, str]:
+        """Phase 1: Anwesenheitsprüfung aller Adressen, gibt {Adresse: Antwortart} zurück"""
+        return self.sweep_addresses(range(start_addr, end_addr + 1), progress=progress)
+
+    def sweep_addresses(self, addresses, stop_at_first: bool = False, progress: bool = True,
+                        label: str = 'Anwesenheit') -> Dict[int, str]:
+        """Anwesenheitsprüfung in der gegebenen Reihenfolge, optional Abbruch bei der ersten gültigen Antwort"""
+        addresses = list(addresses)
+        present = {}
+        for index, addr in enumerate(addresses, 1):
+            result = self.check_presence(addr)
+            if result:
+                present[addr] = result
+            if progress:
+                print(f"\r{label}: Adresse {addr:3} ({index}/{len(addresses)}), gefunden: {len(present)}",
+                      end='', file=sys.stderr, flush=True)
+            if result in CONFIDENT and stop_at_first:
+                break
+        if progress:
+            print(file=sys.stderr)
+        return present
+
+    def scan_range(self, start_addr: int = 1, end_addr: int = 247, progress: bool = True) -> Dict[int, dict]:
+        """Scannt einen Adressbereich: Anwesenheit, dann Typerkennung der gefundenen Geräte"""
+        present = self.sweep(start_addr, end_addr, progress)
+        return self.classify_devices(present, progress)
+
+    def classify_devices(self, present: Dict[int, str], progress: bool = True) -> Dict[int, dict]:
+        """Phase 2: Typerkennung der Adressen, die bei der Anwesenheitsprüfung geantwortet haben"""
         found_devices = {}
-        
-        print("\nScanne RS485-Bus nach Geräten...\n")
-        print("Adresse | Gerätetyp")
-        print("-" * 30)
-        
-        for addr in range(start_addr, end_addr + 1):
-            device_type = self.identify_device(addr)
-            if device_type:
-                found_devices[addr] = device_type
-                print(f"{addr:7} | {device_type}")
-                
+        if progress:
+            print("\nAdresse | Antwort   | Gerätetyp")
+            print("-" * 40)
+        for addr, presence in present.items():
+            match = self.classify(addr)
+            found_devices[addr] = {
+                'presence': presence,
+                'type': match.name or self._unknown(match),
+                'device_type': match.device_type,
+                'candidates': match.candidates,
+                'requests': match.requests,
+                'resolved_by': match.resolved_by
+            }
+            if progress:
+                print(f"{addr:7} | {presence:9} | {found_devices[addr]['type']}"
+                      f" (Anfragen: {match.requests}, {RESOLUTION_LABELS.get(match.resolved_by, 'nicht eindeutig')})")
+
         return found_devices
 
+    def _unknown(self, match):
+        if len(match.candidates) > 1:
+            return ' oder '.join(self.database.devices[device_type]['name'] for device_type in match.candidates)
+        return "Unbekannt"
+
+    def save_results(self, path, found_devices, start_addr, end_addr, duration):
+        """Speichert ein Scan-Ergebnis als JSON"""
+        results = {
+            'port': self.port,
+            'settings': self.settings,
+            'address_range': [start_addr, end_addr],
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'duration_s': round(duration, 2),
+            'devices': [{'address': addr, **info} for addr, info in sorted(found_devices.items())]
+        }
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
     def close(self):
         """Schließt die serielle Verbindung"""
-        self.ser.close()
+        self.dev_manager.ser.close()
+
+def settings_matrix(baudrates=BAUDRATES, line_formats=LINE_FORMATS):
+    """Alle Kombinationen (Baudrate, Parität, Stoppbits), wahrscheinlichste zuerst.
+
+    Sortiert nach der Summe der Ränge in ``baudrates`` und ``line_formats``, bei
+    Gleichstand entscheidet die Baudrate: 9600 8N1, 9600 8E1, 19200 8N1, ...
+    """
+    ranked = [((baud_rank + format_rank, baud_rank), (baudrate, parity, stopbits))
+              for baud_rank, baudrate in enumerate(baudrates)
+              for format_rank, (parity, stopbits) in enumerate(line_formats)]
+    return [combination for _, combination in sorted(ranked)]
+
+def configured_types(config_path='config/sensors.json'):
+    """{Geräteadresse: Sensortyp} aus der Konfiguration (leer, wenn sie fehlt)"""
+    try:
+        with open(config_path, 'r') as f:
+            config = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return {int(sensor['device_id']): sensor['type'] for sensor in sensor_configs(config)}
+
+def likely_addresses(config_path='config/sensors.json'):
+    """Werksadresse und die in der Konfiguration eingetragenen Geräteadressen"""
+    addresses = [FACTORY_ADDRESS]
+    for device_id in configured_types(config_path):
+        if device_id not in addresses:
+            addresses.append(device_id)
+    return addresses
+
+def discover(port, start_addr=1, end_addr=247, combinations=None, preferred=(FACTORY_ADDRESS,),
+             first_only=False, turnaround=DEFAULT_TURNAROUND, progress=True, **scanner_options):
+    """Sucht Geräte mit unbekannten Schnittstellenparametern.
+
+    Runde 1 prüft für jede Kombination nur die ``preferred``-Adressen und bricht
+    bei der ersten gültigen Antwort oder ohne Antwort ab. Runde 2 durchsucht für
+    die bis dahin stillen Kombinationen den restlichen Adressbereich, ebenfalls
+    mit Abbruch bei der ersten gültigen Antwort. Für jede Kombination mit
+    gültiger Antwort werden danach alle Geräte mit diesen Einstellungen gesucht
+    und ihr Typ erkannt (außer bei ``first_only``). Kombinationen, unter denen
+    nur Antworten mit CRC-Fehler kamen, gelten nicht als Treffer - so antwortet
+    ein Gerät auch bei falscher Parität oder falschen Stoppbits. Sie werden mit
+    ``confidence`` ``low`` am Ende angehängt, die Suche läuft weiter.
+    ``scanner_options`` (database, cache, hints) gehen an jeden RS485Scanner.
+
+    Gibt eine Liste von {'settings': {...}, 'confidence': 'high'|'low',
+    'devices': {Adresse: {...}}} zurück.
+    """
+    combinations = settings_matrix() if combinations is None else combinations
+    addresses = list(range(start_addr, end_addr + 1))
+    preferred = [addr for addr in preferred if start_addr <= addr <= end_addr]
+    remaining = [addr for addr in addresses if addr not in preferred]
+
+    results = []
+    low_confidence = []
+    quiet = list(combinations)
+    for round_addresses in (preferred, remaining):
+        round_combinations, quiet = quiet, []
+        for baudrate, parity, stopbits in round_combinations:
+            label = f"{baudrate} 8{parity}{stopbits}"
+            scanner = None
+            try:
+                scanner = RS485Scanner(port, baudrate, parity, stopbits, turnaround=turnaround, **scanner_options)
+                responder = scanner.sweep_addresses(round_addresses, stop_at_first=True,
+                                                    progress=progress, label=label)
+                if not responder:
+                    quiet.append((baudrate, parity, stopbits))
+                    continue
+                if not any(presence in CONFIDENT for presence in responder.values()):
+                    # Nur gestörte Antworten: vermutlich falsche Parität/Stoppbits, weitersuchen
+                    low_confidence.append({'settings': scanner.settings, 'confidence': 'low',
+                                           'devices': {addr: unconfirmed_device(presence)
+                                                       for addr, presence in responder.items()}})
+                    continue
+                if first_only:
+                    present = responder
+                else:
+                    present = scanner.sweep_addresses(addresses, progress=progress, label=label)
+                results.append({'settings': scanner.settings, 'confidence': 'high',
+                                'devices': scanner.classify_devices(present, progress=False)})
+            except Exception as e:
+                # Nicht jeder Adapter unterstützt jede Kombination
+                logging.warning(f"{label} lässt sich auf {port} nicht verwenden: {e}")
+                continue
+            finally:
+                if scanner:
+                    scanner.close()
+            if first_only:
+                return results
+    return results + low_confidence
+
+def unconfirmed_device(presence):
+    """Ergebnis-Eintrag für eine Adresse ohne gültige Antwort (keine Typerkennung)"""
+    return {'presence': presence, 'type': 'Unbekannt', 'device_type': None, 'candidates': [],
+            'requests': 0, 'resolved_by': None}
+
+def save_discovery_results(path, port, results, start_addr, end_addr, duration):
+    """Speichert ein Discovery-Ergebnis als JSON, jedes Gerät mit seinen Schnittstellenparametern"""
+    devices = [{'address': addr, **info, 'settings': result['settings'], 'confidence': result['confidence']}
+               for result in results for addr, info in sorted(result['devices'].items())]
+    with open(path, 'w') as f:
+        json.dump({
+            'port': port,
+            'address_range': [start_addr, end_addr],
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'duration_s': round(duration, 2),
+            'devices': devices
+        }, f, indent=2, ensure_ascii=False)
+
+def address(value):
+    addr = int(value)
+    if not 1 <= addr <= 247:
+        raise argparse.ArgumentTypeError("Adresse muss zwischen 1 und 247 liegen")
+    return addr
 
 def main():
+    parser = argparse.ArgumentParser(description='RS485 Geräte-Scanner')
+    parser.add_argument('--port', default='/dev/ttyS0')
+    parser.add_argument('--start', type=address, default=1, help='Startadresse für Scan')
+    parser.add_argument('--end', type=address, default=247, help='Endadresse für Scan')
+    parser.add_argument('--baudrate', type=int, default=9600)
+    parser.add_argument('--parity', choices=('N', 'E', 'O'), default='N')
+    parser.add_argument('--stopbits', type=int, choices=(1, 2), default=1)
+    parser.add_argument('--turnaround', type=float, default=DEFAULT_TURNAROUND,
+                        help='Maximale Antwortzeit der Slaves in Sekunden (Anwesenheitsprüfung)')
+    parser.add_argument('--output', help='Ergebnis als JSON speichern')
+    parser.add_argument('--discover', action='store_true',
+                        help='Baudraten und Parität/Stoppbits durchprobieren (unbekannte Einstellungen)')
+    parser.add_argument('--baudrates', type=int, nargs='+', default=list(BAUDRATES),
+                        help='Baudraten für --discover, wahrscheinlichste zuerst')
+    parser.add_argument('--first', action='store_true',
+                        help='--discover nach dem ersten gefundenen Gerät beenden')
+    parser.add_argument('--config', default='config/sensors.json',
+                        help='Konfiguration: Adressen für --discover zuerst prüfen, Typen bei mehrdeutiger Erkennung')
+    parser.add_argument('--fingerprints', default=DEFAULT_DATABASE, help='Signaturdatenbank der Gerätetypen')
+    parser.add_argument('--cache', default=DEFAULT_CACHE, help='Cache erkannter Geräte')
+    parser.add_argument('--no-cache', action='store_true', help='Alle Geräte neu erkennen')
+    args = parser.parse_args()
+
     setup_logging()
-    
-    print("\n=== RS485 Geräte-Scanner ===\n")
-    
-    # Get port (optional)
-    port = input("Bitte geben Sie den seriellen Port ein (Enter für /dev/ttyS0): ").strip()
-    if not port:
-        port = '/dev/ttyS0'
+    if args.start > args.end:
+        logging.error("Fehler bei der Adresseingabe: Ungültiger Adressbereich")
+        return
 
-    # Get address range (optional)
-    try:
-        start_addr = input("Startadresse für Scan (Enter für 1): ").strip()
-        start_addr = int(start_addr) if start_addr else 1
+    print("\n=== RS485 Geräte-Scanner ===\n")
 
-        end_addr = input("Endadresse für Scan (Enter für 247): ").strip()
-        end_addr = int(end_addr) if end_addr else 247
+    scanner_options = {
+        'database': FingerprintDatabase.load(args.fingerprints),
+        'cache': None if args.no_cache else FingerprintCache(args.cache),
+        'hints': configured_types(args.config)
+    }
 
-        if not (1 <= start_addr <= 247 and 1 <= end_addr <= 247 and start_addr <= end_addr):
-            raise ValueError("Ungültiger Adressbereich")
-    except ValueError as e:
-        logging.error(f"Fehler bei der Adresseingabe: {e}")
+    if args.discover:
+        run_discovery(args, scanner_options)
         return
 
     scanner = None
     try:
-        scanner = RS485Scanner(port)
-        found_devices = scanner.scan_range(start_addr, end_addr)
-        
+        scanner = RS485Scanner(args.port, args.baudrate, args.parity, args.stopbits, turnaround=args.turnaround,
+                               **scanner_options)
+        print(f"Scanne {args.port} ({args.baudrate} Baud, {args.parity}, {args.stopbits} Stoppbit(s)), "
+              f"Adressen {args.start}-{args.end}, Timeout {scanner.presence_timeout * 1000:.0f} ms\n")
+        start_time = time.monotonic()
+        found_devices = scanner.scan_range(args.start, args.end)
+        duration = time.monotonic() - start_time
+
         if not found_devices:
             print("\nKeine Geräte gefunden!")
         else:
             print(f"\nGefundene Geräte: {len(found_devices)}")
-            
+        print(f"Scandauer: {duration:.1f} s")
+
+        if args.output:
+            scanner.save_results(args.output, found_devices, args.start, args.end, duration)
+            print(f"Ergebnis gespeichert: {args.output}")
+
     except Exception as e:
         logging.error(f"Fehler beim Scannen: {e}")
     finally:
         if scanner:
             scanner.close()
+        if scanner_options['cache'] is not None:
+            scanner_options['cache'].save()
+
+def run_discovery(args, scanner_options):
+    combinations = settings_matrix(args.baudrates)
+    print(f"Discovery auf {args.port}: {len(combinations)} Kombinationen, Adressen {args.start}-{args.end}\n")
+    start_time = time.monotonic()
+    try:
+        results = discover(args.port, args.start, args.end, combinations, likely_addresses(args.config),
+                           first_only=args.first, turnaround=args.turnaround, **scanner_options)
+    except Exception as e:
+        logging.error(f"Fehler bei der Discovery: {e}")
+        return
+    finally:
+        if scanner_options['cache'] is not None:
+            scanner_options['cache'].save()
+    duration = time.monotonic() - start_time
+
+    if not results:
+        print("\nKeine Geräte gefunden!")
+    else:
+        print("\nAdresse | Baudrate | Format | Antwort   | Gerätetyp")
+        print("-" * 56)
+        for result in results:
+            settings = result['settings']
+            line_format = f"8{settings['parity']}{settings['stopbits']}"
+            note = ' (unsicher: nur CRC-Fehler)' if result['confidence'] == 'low' else ''
+            for addr, info in sorted(result['devices'].items()):
+                print(f"{addr:7} | {settings['baudrate']:8} | {line_format:6} | {info['presence']:9} | "
+                      f"{info['type']}{note}")
+        print(f"\nGefundene Geräte: {sum(len(result['devices']) for result in results)}")
+    print(f"Scandauer: {duration:.1f} s")
+
+    if args.output:
+        save_discovery_results(args.output, args.port, results, args.start, args.end, duration)
+        print(f"Ergebnis gespeichert: {args.output}")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
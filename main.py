@@ -1,8 +1,18 @@
+import os
 import logging
+from dotenv import load_dotenv
 from sensors.sensor_manager import SensorManager
 
+def create_sensor_manager():
+    """RS485_RUNTIME=asyncio wählt den AsyncSensorManager (ein Event-Loop für alle Busse)"""
+    load_dotenv(dotenv_path='/etc/owipex/.envRS485')
+    if os.environ.get('RS485_RUNTIME', 'threads') == 'asyncio':
+        from sensors.async_sensor_manager import AsyncSensorManager
+        return AsyncSensorManager()
+    return SensorManager()
+
 def main():
-    sensor_manager = SensorManager()
+    sensor_manager = create_sensor_manager()
     
     try:
         sensor_manager.connect_to_server()
@@ -15,4 +25,4 @@ def main():
         sensor_manager.stop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
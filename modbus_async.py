@@ -0,0 +1,237 @@
+# -----------------------------------------------------------------------------
+# Company: KARIM Technologies
+# Author: Sayed Amir Karim
+# Copyright: 2024 KARIM Technologies
+#
+# License: All Rights Reserved
+#
+# Module: Async Modbus Manager
+# Description: asyncio-Transport für Modbus RTU auf nicht-blockierenden
+#              seriellen File-Deskriptoren (loop.add_reader)
+# -----------------------------------------------------------------------------
+
+import os
+import time
+import asyncio
+import serial
+from collections import deque
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from modbus_manager import (DeviceManager, ModbusExceptionResponse, expected_frame_length, MAX_FRAME_LENGTH,
+                            OWNER_WAIT_TIMEOUT)
+from register_cache import GOOD
+
+class AsyncDeviceManager(DeviceManager):
+    """DeviceManager, dessen Buszugriffe Coroutinen sind.
+
+    Gleiche Methoden und Rückgabewerte wie DeviceManager, aber ``read_*``,
+    ``probe`` und ``write_registers`` müssen mit ``await`` aufgerufen werden.
+    Empfangene Bytes liest ein Reader-Callback des Event-Loops direkt in den
+    Empfangspuffer des DeviceManagers (os.readv); gewartet wird
+    mit Futures statt mit blockierenden Lesezugriffen, so dass mehrere Busse,
+    MQTT-Housekeeping und eine lokale API in einem Thread laufen können.
+
+    Aus anderen Threads können synchrone Aufrufer (z.B. ModbusClient) über
+    ``run_sync`` auf dem Event-Loop des Busses arbeiten.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Nicht blockierend: gelesen wird nur, wenn der Loop Daten meldet
+        self.ser.timeout = 0
+        self._received = 0  # Bytes im Empfangspuffer seit der letzten Anfrage
+        self._waiter = None  # (benötigte Bytes, Future)
+        self._read_error = None  # Port liefert keine Daten mehr (EOF), gilt für alle weiteren Anfragen
+        self._loop = None
+        self._async_lock = None
+
+    def _attach(self):
+        """Registriert den Reader beim laufenden Event-Loop (einmal pro Loop)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.remove_reader(self._fd)
+        loop.add_reader(self._fd, self._on_readable)
+        self._loop = loop
+        self._async_lock = asyncio.Lock()
+
+    def _on_readable(self):
+        try:
+            if self._received < MAX_FRAME_LENGTH:
+                count = os.readv(self._fd, self._rx_slice(self._received, MAX_FRAME_LENGTH))
+                eof = not count
+            else:
+                # Puffer voll (Störung auf dem Bus) - überzählige Bytes verwerfen
+                eof = not os.read(self._fd, MAX_FRAME_LENGTH)
+                count = 0
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            # z.B. EIO, wenn die Gegenseite eines pty geschlossen wurde
+            self._on_eof(serial.SerialException(f"Lesefehler am Port: {e}"))
+            return
+        if eof:
+            self._on_eof(serial.SerialException("Port meldet Daten, liefert aber keine (Gerät getrennt?)"))
+            return
+        self._received += count
+        if self._waiter is not None:
+            needed, future = self._waiter
+            if self._received >= needed and not future.done():
+                future.set_result(None)
+
+    def _on_eof(self, error):
+        """Port lesbar, aber ohne Daten oder mit Lesefehler (Adapter abgezogen, pty geschlossen).
+
+        Der Reader wird entfernt, sonst ruft der Loop ihn ununterbrochen auf;
+        die wartende und alle weiteren Anfragen scheitern mit ``error``.
+        """
+        self._loop.remove_reader(self._fd)
+        self._read_error = error
+        if self._waiter is not None and not self._waiter[1].done():
+            self._waiter[1].set_exception(self._read_error)
+
+    async def _read_until(self, count, timeout):
+        """Wartet auf ``count`` Bytes im Empfangspuffer, höchstens ``timeout``; gibt die verfügbaren zurück"""
+        if self._read_error is not None:
+            raise self._read_error
+        if self._received < count:
+            future = self._loop.create_future()
+            self._waiter = (count, future)
+            try:
+                await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self._waiter = None
+        return min(self._received, count)
+
+    async def _drain_until_silence(self):
+        """Verwirft Bytes bis der Bus für t3.5 still ist (Resynchronisation)"""
+        quiet_time = max(self.inter_frame_delay, self.frame_slack)
+        while True:
+            received = self._received
+            await asyncio.sleep(quiet_time)
+            if self._received == received:
+                break
+
+    async def _read_frame(self, function_code, timeout=None):
+        """Wie DeviceManager._read_frame, wartet aber ohne den Thread zu blockieren"""
+        received = await self._read_until(3, self.timeout if timeout is None else timeout)
+        if received < 3:
+            return self._rx_slice(0, received)[0]
+
+        expected_length = expected_frame_length(self._rx_buffer, function_code)
+        if expected_length is None:
+            await self._drain_until_silence()
+            return self._rx_slice(0, 3)[0]
+
+        remaining = expected_length - 3
+        received = await self._read_until(expected_length, remaining * self.char_time + self.frame_slack)
+        return self._rx_slice(0, received)[0]
+
+    async def _send_and_receive(self, message, timeout=None):
+        self._attach()
+        async with self._async_lock:
+            remaining = self._last_frame_time + self.inter_frame_delay - time.monotonic()
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+            self.ser.reset_input_buffer()
+            self._received = 0
+            self.ser.write(message)
+            # Kein flush() (tcdrain würde den Loop blockieren) - stattdessen die
+            # Sendedauer der Anfrage auf das Antwort-Timeout aufschlagen
+            send_time = len(message) * self.char_time
+            sent_time = time.monotonic() + send_time
+            response = b''
+            try:
+                response = await self._read_frame(message[1], self._response_timeout(message[0], timeout) + send_time)
+                return response
+            finally:
+                self._last_frame_time = time.monotonic()
+                self._record_latency(message[0], response, self._last_frame_time - sent_time, timeout)
+
+    async def read_holding_registers(self, device_id, start_address, register_count, timeout=None):
+        try:
+            return bytes(await self._read_holding_registers(device_id, start_address, register_count, timeout))
+        except Exception as e:
+            self._record_error(device_id, e, f"Register {hex(start_address)}")
+            return None
+
+    async def _read_holding_registers(self, device_id, start_address, register_count, timeout=None):
+        message = self._build_read_request(device_id, start_address, register_count)
+        response = await self._send_and_receive(message, timeout)
+        return self._check_read_response(response, device_id, start_address, register_count)
+
+    async def _read_value(self, device_id, register_address, register_count, decode):
+        try:
+            data, quality = await self._read_holding_registers(device_id, register_address, register_count), GOOD
+        except Exception as e:
+            data, quality = None, self._record_error(device_id, e, f"Register {hex(register_address)}")
+        return self._store_value(device_id, register_address, data, quality, decode)
+
+    async def probe(self, device_id, register_address, timeout=None):
+        try:
+            await self._read_holding_registers(device_id, register_address, 1, timeout)
+            return True
+        except ModbusExceptionResponse as e:
+            # Das Gerät antwortet - nur das Probe-Register kennt es nicht
+            self._record_error(device_id, e, "Probe-Anfrage")
+            return True
+        except Exception as e:
+            self._record_error(device_id, e, "Probe-Anfrage")
+            return False
+
+    async def read_plan(self, device_id, blocks):
+        values = {}
+        pending = deque(self._planned_blocks(device_id, blocks))
+        while pending:
+            block = pending.popleft()
+            try:
+                data, quality = await self._read_holding_registers(device_id, block.start, block.count), GOOD
+            except Exception as e:
+                quality = self._record_error(device_id, e, f"Block {block}")
+                split = self._split_block(device_id, block, e)
+                if split:
+                    pending.extendleft(reversed(split))
+                    continue
+                data = None
+            self._store_block(device_id, block, data, quality, values)
+        return values
+
+    async def write_registers(self, device_id, start_address, values):
+        message = self._build_write_request(device_id, start_address, values)
+        try:
+            return self._check_write_response(await self._send_and_receive(message), device_id)
+        except Exception as e:
+            self._record_error(device_id, e, f"Schreiben ab Register {hex(start_address)}")
+            raise
+
+    def run_sync(self, coroutine):
+        """Führt eine Coroutine dieses Managers aus einem anderen Thread aus.
+
+        Läuft der Event-Loop des Busses, wird die Coroutine dort eingeplant und
+        auf das Ergebnis gewartet; sonst läuft sie in einem eigenen Loop.
+        """
+        loop = self._loop
+        if loop is not None and loop.is_running():
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is loop:
+                coroutine.close()
+                raise RuntimeError("Synchroner Aufruf im Event-Loop - *_async-Methoden mit await verwenden")
+            future = asyncio.run_coroutine_threadsafe(coroutine, loop)
+            try:
+                return future.result(OWNER_WAIT_TIMEOUT)
+            except FutureTimeoutError:
+                # Loop beendet oder blockiert - nicht unbegrenzt warten
+                future.cancel()
+                raise TimeoutError(f"Event-Loop des Busses hat den Aufruf nicht innerhalb von "
+                                   f"{OWNER_WAIT_TIMEOUT} s ausgeführt") from None
+        return asyncio.run(coroutine)
+
+    def close(self):
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.remove_reader(self._fd)
+        self.ser.close()
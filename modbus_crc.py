@@ -0,0 +1,59 @@
+# -----------------------------------------------------------------------------
+# Company: KARIM Technologies
+# Author: Sayed Amir Karim
+# Copyright: 2024 KARIM Technologies
+#
+# License: All Rights Reserved
+#
+# Module: Modbus CRC
+# Description: CRC-16/Modbus mit vorberechneter Tabelle, beschleunigt über die
+#              C-Erweiterung von crcmod, wenn sie installiert ist
+# -----------------------------------------------------------------------------
+
+import struct
+
+_CRC = struct.Struct('<H')
+
+def _make_table():
+    """Tabelle für das reflektierte Polynom 0xA001, ein Eintrag pro Byte"""
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+        table.append(crc)
+    return tuple(table)
+
+CRC_TABLE = _make_table()
+
+def crc16_table(data, crc=0xFFFF):
+    """CRC-16/Modbus in reinem Python (ein Tabellenzugriff pro Byte)"""
+    table = CRC_TABLE
+    for byte in data:
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+    return crc
+
+def _accelerated():
+    """CRC-Funktion aus der C-Erweiterung von crcmod, None ohne crcmod oder ohne Erweiterung"""
+    try:
+        import crcmod.predefined
+        from crcmod.crcmod import _usingExtension
+    except ImportError:
+        return None
+    return crcmod.predefined.mkPredefinedCrcFun('modbus') if _usingExtension else None
+
+# Einmal beim Import gewählt - vorher wurde die CRC-Funktion bei jeder Anfrage neu erzeugt
+crc16 = _accelerated() or crc16_table
+CRC_BACKEND = 'table' if crc16 is crc16_table else 'crcmod'
+
+def append_crc(frame):
+    """Rahmen mit angehängter CRC (Low-Byte zuerst)"""
+    return frame + _CRC.pack(crc16(frame))
+
+def crc_ok(frame):
+    """Prüft einen vollständigen Rahmen samt CRC.
+
+    Die CRC über Nutzdaten und angehängte CRC ergibt bei CRC-16/Modbus 0,
+    der Rahmen muss dafür nicht zerschnitten werden.
+    """
+    return crc16(frame) == 0
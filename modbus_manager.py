@@ -1,32 +1,267 @@
+import os
 import struct
+import select
 import serial
-import crcmod.predefined
+import inspect
 from threading import Thread, Lock
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from collections import Counter, deque
+from functools import lru_cache
+from operator import itemgetter
 import time
 import logging
+from read_planner import ReadPlanner
+from modbus_crc import append_crc, crc_ok
+from register_cache import RegisterCache, GOOD, CRC_ERROR, TIMEOUT, EXCEPTION
 
 # Logger für ModbusManager
 logger = logging.getLogger('ModbusManager')
 
+# Registerdatentypen: struct-Code und Anzahl 16-Bit-Register
+DATA_TYPES = {
+    'uint16': ('H', 1),
+    'int16': ('h', 1),
+    'uint32': ('I', 2),
+    'int32': ('i', 2),
+    'float32': ('f', 2),
+}
+
+# Byte-Reihenfolge eines Werts im Telegramm, A ist das höchstwertige Byte.
+# 16-Bit-Werte kennen nur AB (bei ABCD und CDAB) und BA (bei BADC und DCBA).
+BYTE_ORDERS = ('ABCD', 'CDAB', 'BADC', 'DCBA')
+
+class RegisterCodec:
+    """Dekodiert einen Registerblock mit festem Layout in einem Durchgang zu einem Tupel.
+
+    ``layout`` enthält pro Wert (Registeroffset im Block, Datentyp, Byte-Reihenfolge).
+    Lassen sich alle Werte mit derselben struct-Bytefolge lesen (ABCD/AB als
+    '>', DCBA/BA als '<') und überlappen sie nicht, dekodiert ein struct.Struct
+    mit Füllbytes für ungenutzte Register die Antwortdaten direkt per
+    unpack_from. Sonst (CDAB, BADC, gemischte Reihenfolgen) sammelt ein
+    vorberechneter itemgetter die Bytes aller Werte in ABCD-Folge für ein
+    einziges unpack ein. Instanzen kommen aus ``register_codec`` und werden pro
+    Layout wiederverwendet.
+    """
+
+    def __init__(self, layout):
+        for _, data_type, byte_order in layout:
+            if data_type not in DATA_TYPES:
+                raise ValueError(f"Unbekannter Datentyp: {data_type}")
+            if byte_order not in BYTE_ORDERS:
+                raise ValueError(f"Unbekannte Byte-Reihenfolge: {byte_order}")
+        self.layout = layout
+        self.permute = None
+        endian = self._common_endian(layout)
+        if endian is not None:
+            codes, position = [endian], 0
+            for offset, data_type, _ in layout:
+                code, count = DATA_TYPES[data_type]
+                if offset * 2 > position:
+                    codes.append(f'{offset * 2 - position}x')
+                codes.append(code)
+                position = (offset + count) * 2
+        else:
+            codes, permutation = ['>'], []
+            for offset, data_type, byte_order in layout:
+                code, count = DATA_TYPES[data_type]
+                codes.append(code)
+                permutation.extend(offset * 2 + index for index in self._source_bytes(count, byte_order))
+            self.permute = itemgetter(*permutation)
+        self.struct = struct.Struct(''.join(codes))
+
+    @staticmethod
+    def _source_bytes(count, byte_order):
+        """Positionen der Bytes A, B (, C, D) eines Werts im Telegramm"""
+        if count == 1:
+            return (0, 1) if byte_order in ('ABCD', 'CDAB') else (1, 0)
+        return tuple(byte_order.index(byte) for byte in 'ABCD')
+
+    @classmethod
+    def _common_endian(cls, layout):
+        """'>' oder '<', wenn ein Struct den Block ohne Umsortieren lesen kann, sonst None"""
+        endians, position = set(), 0
+        for offset, data_type, byte_order in layout:
+            count = DATA_TYPES[data_type][1]
+            if offset * 2 < position:
+                return None
+            source = cls._source_bytes(count, byte_order)
+            if source == tuple(range(count * 2)):
+                endians.add('>')
+            elif source == tuple(reversed(range(count * 2))):
+                endians.add('<')
+            else:
+                return None
+            position = (offset + count) * 2
+        return endians.pop() if len(endians) == 1 else None
+
+    def decode(self, data):
+        """Werte aus ``data`` (bytes, bytearray oder memoryview auf den Empfangspuffer)"""
+        if self.permute is None:
+            return self.struct.unpack_from(data)
+        return self.struct.unpack(bytes(self.permute(data)))
+
+@lru_cache(maxsize=None)
+def register_codec(layout):
+    """RegisterCodec für ein Layout (Tupel aus (Offset, Datentyp, Byte-Reihenfolge)), gecacht"""
+    return RegisterCodec(layout)
+
+_REQUEST = struct.Struct('>BBHH')
+
+@lru_cache(maxsize=4096)
+def request_frame(device_id, function_code, start_address, register_count):
+    """Fertiger Anfragerahmen samt CRC für (Slave, Funktion, Adresse, Anzahl), gecacht.
+
+    Die Abfrageschleife fragt immer dieselben Blöcke an, CRC und Packen
+    fallen so nur beim ersten Mal an.
+    """
+    return append_crc(_REQUEST.pack(device_id, function_code, start_address, register_count))
+
+def decode_value(data, data_type='uint16', byte_order='ABCD'):
+    """Dekodiert einen einzelnen Wert am Anfang der Antwortdaten"""
+    return register_codec(((0, data_type, byte_order),)).decode(data)[0]
+
 class ModbusClient:
+    """Zugriff auf ein Gerät über seinen DeviceManager.
+
+    Die synchronen Methoden funktionieren mit DeviceManager und
+    AsyncDeviceManager (modbus_async): liefert der Manager eine Coroutine,
+    wird sie auf dessen Event-Loop ausgeführt. Die ``*_async``-Varianten sind
+    Coroutinen für Aufrufer im Event-Loop (AsyncSensorManager).
+    """
+
     def __init__(self, device_manager, device_id):
         self.device_manager = device_manager
         self.device_id = device_id
 
-    def read_register(self, start_address, register_count=1, data_format='>H'):
-        return self.device_manager.read_register(self.device_id, start_address, register_count, data_format)
+    def _call(self, result):
+        if inspect.isawaitable(result):
+            return self.device_manager.run_sync(result)
+        return result
+
+    async def _await(self, result):
+        if inspect.isawaitable(result):
+            return await result
+        return result
+
+    def read_register(self, start_address, register_count=1, data_type=None, byte_order='CDAB'):
+        return self._call(self.device_manager.read_register(self.device_id, start_address, register_count,
+                                                            data_type, byte_order))
 
     def read_radar_sensor(self, register_address):
-        return self.device_manager.read_radar_sensor(self.device_id, register_address)
+        return self._call(self.device_manager.read_radar_sensor(self.device_id, register_address))
         
     def read_flow_sensor(self, register_address):
-        return self.device_manager.read_flow_sensor(self.device_id, register_address)
+        return self._call(self.device_manager.read_flow_sensor(self.device_id, register_address))
+
+    def read_plan(self, blocks):
+        return self._call(self.device_manager.read_plan(self.device_id, blocks))
+
+    def probe(self, register_address, timeout=None):
+        return self._call(self.device_manager.probe(self.device_id, register_address, timeout))
 
     def write_registers(self, start_address, values):
-        return self.device_manager.write_registers(self.device_id, start_address, values)
+        return self._call(self.device_manager.write_registers(self.device_id, start_address, values))
+
+    async def read_register_async(self, start_address, register_count=1, data_type=None, byte_order='CDAB'):
+        return await self._await(self.device_manager.read_register(self.device_id, start_address, register_count,
+                                                                   data_type, byte_order))
+
+    async def read_radar_sensor_async(self, register_address):
+        return await self._await(self.device_manager.read_radar_sensor(self.device_id, register_address))
+
+    async def read_flow_sensor_async(self, register_address):
+        return await self._await(self.device_manager.read_flow_sensor(self.device_id, register_address))
+
+    async def read_plan_async(self, blocks):
+        return await self._await(self.device_manager.read_plan(self.device_id, blocks))
+
+    async def probe_async(self, register_address, timeout=None):
+        return await self._await(self.device_manager.probe(self.device_id, register_address, timeout))
+
+    async def write_registers_async(self, start_address, values):
+        return await self._await(self.device_manager.write_registers(self.device_id, start_address, values))
+
+# Modbus-Exception-Codes (Antwort mit Funktionscode | 0x80)
+EXCEPTION_CODES = {
+    0x01: 'illegal_function',
+    0x02: 'illegal_data_address',
+    0x03: 'illegal_data_value',
+    0x04: 'slave_device_failure',
+    0x05: 'acknowledge',
+    0x06: 'slave_device_busy',
+    0x08: 'memory_parity_error',
+    0x0A: 'gateway_path_unavailable',
+    0x0B: 'gateway_target_failed',
+}
+
+class ModbusError(Exception):
+    """Fehlgeschlagene Modbus-Transaktion; ``quality`` ist der Eintrag für den register_cache"""
+
+    kind = 'error'
+    quality = EXCEPTION
+
+    def __init__(self, device_id, message):
+        super().__init__(message)
+        self.device_id = device_id
+
+class ModbusTimeoutError(ModbusError):
+    """Keine oder unvollständige Antwort innerhalb des Timeouts"""
+    kind = 'timeout'
+    quality = TIMEOUT
+
+class ModbusCRCError(ModbusError):
+    """Antwort mit falscher CRC"""
+    kind = 'crc_error'
+    quality = CRC_ERROR
+
+class ModbusFrameError(ModbusError):
+    """Antwort von fremder Slave-ID, mit falschem Funktionscode oder falscher Länge"""
+    kind = 'frame_error'
+    quality = CRC_ERROR
+
+class ModbusExceptionResponse(ModbusError):
+    """Das Gerät hat mit einer Modbus-Exception geantwortet"""
+    kind = 'exception'
+    quality = EXCEPTION
+
+    def __init__(self, device_id, function_code, exception_code):
+        self.function_code = function_code
+        self.exception_code = exception_code
+        self.name = EXCEPTION_CODES.get(exception_code, 'unknown')
+        super().__init__(device_id, f"Modbus-Exception {exception_code:#04x} ({self.name}) von Gerät {device_id}, "
+                                    f"Funktion {function_code:#04x}")
+
+# Erwartete Antwortlängen nach Funktionscode
+READ_FUNCTION_CODES = (0x01, 0x02, 0x03, 0x04)
+WRITE_FUNCTION_CODES = (0x05, 0x06, 0x0F, 0x10)
+EXCEPTION_FRAME_LENGTH = 5
+WRITE_RESPONSE_LENGTH = 8
+# Größter RTU-Rahmen laut Spezifikation, zugleich Größe des Empfangspuffers
+MAX_FRAME_LENGTH = 256
+# Höchstens so lange (s) wartet ein fremder Thread auf seine Transaktion im Bus-Owner
+# (Warteschlange plus laufende Sensorabfrage)
+OWNER_WAIT_TIMEOUT = 30.0
+
+def expected_frame_length(header, function_code):
+    """Gesamtlänge eines RTU-Antwortrahmens aus den ersten 3 Bytes bestimmen.
+
+    Gibt None zurück, wenn der Header zu keiner gültigen Antwort auf
+    ``function_code`` passt. Exception-Antworten sind immer 5 Bytes lang - das
+    dritte Byte ist der Exception-Code, kein Byte-Count.
+    """
+    if header[1] == (function_code | 0x80):
+        return EXCEPTION_FRAME_LENGTH
+    if header[1] != function_code:
+        return None
+    if function_code in READ_FUNCTION_CODES:
+        return 5 + header[2] if 5 + header[2] <= MAX_FRAME_LENGTH else None
+    if function_code in WRITE_FUNCTION_CODES:
+        return WRITE_RESPONSE_LENGTH
+    return None
 
 class DeviceManager:
-    def __init__(self, port, baudrate, parity, stopbits, bytesize, timeout):
+    def __init__(self, port, baudrate, parity, stopbits, bytesize, timeout, frame_slack=0.05,
+                 max_register_gap=0, cache_max_age=None, adaptive_timeouts=None):
         self.ser = serial.Serial(
             port=port,
             baudrate=baudrate,
@@ -35,9 +270,47 @@ class DeviceManager:
             bytesize=serial.EIGHTBITS if bytesize == 8 else serial.SEVENBITS,
             timeout=timeout
         )
+        self._fd = self.ser.fileno()
         self.devices = {}
-        self.last_read_values = {}
         self._lock = Lock()
+        # Bus-Owner (BusWorker), der als einziger Thread den Port bedient.
+        # Aufrufe aus anderen Threads werden als Transaktion an ihn übergeben.
+        self.owner = None
+
+        # Zuletzt gelesene Werte mit Zeitstempel und Qualität (ersetzt last_read_values)
+        self.register_cache = RegisterCache(max_age=cache_max_age)
+
+        # RTU-Timing: Zeichenzeit (Start + Daten + Parität + Stop) und t3.5 Ruhezeit.
+        # Ab 19200 Baud schreibt die Modbus-Spezifikation feste 1,75 ms vor.
+        self.timeout = timeout
+        bits_per_char = 1 + bytesize + (0 if parity == 'N' else 1) + stopbits
+        self.char_time = bits_per_char / baudrate
+        self.inter_frame_delay = 3.5 * self.char_time if baudrate <= 19200 else 0.00175
+        # Zuschlag für USB-Adapter- und Scheduler-Latenz beim Lesen des Rahmenrests
+        self.frame_slack = frame_slack
+        self._last_frame_time = 0.0
+
+        # Empfangspuffer des Ports: Antworten werden ohne Zwischenkopie hineingelesen
+        # und als memoryview ausgewertet. Eine Antwort gilt nur bis zur nächsten
+        # Transaktion - wer sie aufheben will, kopiert sie (read_holding_registers).
+        # Ohne Bus-Owner darf deshalb nur ein Thread den Port benutzen.
+        self._rx_buffer = bytearray(MAX_FRAME_LENGTH)
+        self._rx_view = memoryview(self._rx_buffer)
+        self._rx_slices = {}
+        self._poller = select.poll()
+        self._poller.register(self._fd, select.POLLIN)
+
+        # Gelernte Antwort-Timeouts pro Gerät (AdaptiveTimeouts), sonst gilt ``timeout``
+        self.adaptive_timeouts = adaptive_timeouts
+
+        # Fasst Registerzugriffe der Sensoren zu wenigen FC03-Anfragen zusammen
+        self.read_planner = ReadPlanner(register_codec, max_gap=max_register_gap)
+        # Blöcke, die ein Gerät als Ganzes abgelehnt hat: (device_id, Block) -> Einzelblöcke
+        self._split_blocks = {}
+
+        # Diagnose: Fehler pro Gerät und Art, Modbus-Exceptions pro Gerät und Code
+        self.error_counts = {}
+        self.exception_counts = {}
 
     def add_device(self, device_id):
         self.devices[device_id] = ModbusClient(self, device_id)
@@ -48,185 +321,388 @@ class DeviceManager:
         if device_id in self.devices:
             del self.devices[device_id]
             # Entferne auch alle gespeicherten Werte für dieses Gerät
-            self.last_read_values = {k: v for k, v in self.last_read_values.items() if k[0] != device_id}
+            self.register_cache.remove_device(device_id)
             return True
         return False
 
     def get_device(self, device_id):
         return self.devices.get(device_id)
 
-    def _send_and_receive(self, message, expected_length):
+    def _wait_inter_frame(self):
+        """Wartet die t3.5 Ruhezeit seit dem letzten Rahmen ab"""
+        remaining = self._last_frame_time + self.inter_frame_delay - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def _drain_until_silence(self):
+        """Verwirft Bytes bis der Bus für t3.5 still ist (Resynchronisation)"""
+        # Hinter den Header lesen, der bleibt für den Aufrufer im Puffer stehen
+        quiet_time = max(self.inter_frame_delay, self.frame_slack)
+        while self._read_into(3, MAX_FRAME_LENGTH, quiet_time):
+            pass
+
+    def _rx_slice(self, start, end):
+        """``[memoryview]`` auf Empfangspuffer[start:end], pro Bereich nur einmal angelegt.
+
+        Eine memoryview kostet mehr Speicher als ein kurzer Byte-String - die
+        wenigen Bereiche, die im Betrieb vorkommen, werden deshalb wiederverwendet.
+        Die Liste ist direkt das Argument für os.readv.
+        """
+        slices = self._rx_slices.get(start)
+        if slices is None:
+            slices = self._rx_slices[start] = {}
+        buffers = slices.get(end)
+        if buffers is None:
+            buffers = slices[end] = [self._rx_view[start:end]]
+        return buffers
+
+    def _read_into(self, start, end, timeout):
+        """Liest in Empfangspuffer[start:end], bis er gefüllt ist oder ``timeout`` abläuft.
+
+        Gibt die Anzahl gelesener Bytes zurück. Die Bytes gehen mit os.readv
+        direkt vom File-Deskriptor in den Puffer - Serial.read würde pro Aufruf
+        neue Byte-Strings anlegen.
+        """
+        position = start
+        deadline = time.monotonic() + timeout
+        while position < end:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self._poller.poll(remaining * 1000):
+                break
+            try:
+                count = os.readv(self._fd, self._rx_slice(position, end))
+            except (BlockingIOError, InterruptedError):
+                continue
+            if not count:
+                raise serial.SerialException("Port meldet Daten, liefert aber keine (Gerät getrennt?)")
+            position += count
+        return position - start
+
+    def _read_frame(self, function_code, timeout=None):
+        """Liest einen RTU-Antwortrahmen und kehrt zurück, sobald er vollständig ist.
+
+        Die Rahmenlänge wird aus Funktionscode und Byte-Count bestimmt. Nur auf
+        das erste Antwortbyte wird bis zum konfigurierten Timeout gewartet; der
+        Rest muss innerhalb seiner Übertragungszeit plus ``frame_slack`` folgen.
+        Unvollständige Rahmen werden so wie empfangen zurückgegeben.
+        Exception-Antworten sind nach 5 Bytes vollständig; bei falschem
+        Funktionscode wird nur bis zur Busruhe gewartet und der Header
+        zurückgegeben. Slave-ID und Funktionscode prüft
+        ``_check_response_header``.
+
+        Der Rahmen ist eine memoryview auf den Empfangspuffer.
+        """
+        received = self._read_into(0, 3, self.timeout if timeout is None else timeout)
+        if received < 3:
+            return self._rx_slice(0, received)[0]
+
+        expected_length = expected_frame_length(self._rx_buffer, function_code)
+        if expected_length is None:
+            # Unerwarteter Header - Rest des Rahmens verwerfen
+            self._drain_until_silence()
+            return self._rx_slice(0, 3)[0]
+
+        remaining = expected_length - 3
+        received += self._read_into(3, expected_length, remaining * self.char_time + self.frame_slack)
+        return self._rx_slice(0, received)[0]
+
+    def _send_and_receive(self, message, timeout=None):
+        """Sendet eine Anfrage und liest den zugehörigen Antwortrahmen (memoryview, siehe _read_frame)"""
+        owner = self.owner
+        if owner is not None and owner.running and not owner.is_owner_thread():
+            # Der Empfangspuffer gehört dem Bus-Thread - Antwort dort kopieren
+            future = owner.submit(self._send_and_receive_copy, message, timeout)
+            try:
+                return future.result(OWNER_WAIT_TIMEOUT)
+            except FutureTimeoutError:
+                future.cancel()
+                raise ModbusTimeoutError(message[0], f"Bus-Owner hat die Anfrage an Gerät {message[0]} nicht "
+                                                     f"innerhalb von {OWNER_WAIT_TIMEOUT} s ausgeführt")
         with self._lock:
+            self._wait_inter_frame()
             self.ser.reset_input_buffer()
             self.ser.write(message)
-            time.sleep(0.1)  # Give device time to respond
-            response = self.ser.read(expected_length)
-            return response
+            self.ser.flush()
+            sent_time = time.monotonic()
+            response = b''
+            try:
+                response = self._read_frame(message[1], self._response_timeout(message[0], timeout))
+                return response
+            finally:
+                self._last_frame_time = time.monotonic()
+                self._record_latency(message[0], response, self._last_frame_time - sent_time, timeout)
 
-    def read_register(self, device_id, start_address, register_count=1, data_format='>H'):
-        logger = logging.getLogger('ModbusManager')
+    def _send_and_receive_copy(self, message, timeout=None):
+        return bytes(self._send_and_receive(message, timeout))
+
+    def _response_timeout(self, device_id, timeout):
+        """Explizites Timeout, sonst das gelernte Timeout des Geräts"""
+        if timeout is not None:
+            return timeout
+        if self.adaptive_timeouts is not None:
+            return self.adaptive_timeouts.timeout_for(device_id)
+        return self.timeout
+
+    def _record_latency(self, device_id, response, latency, timeout):
+        """Antwortzeit für das gelernte Timeout erfassen (nur Antworten des angefragten Geräts)"""
+        if self.adaptive_timeouts is None:
+            return
+        if len(response) >= 3:
+            if response[0] == device_id:
+                self.adaptive_timeouts.record(device_id, latency)
+        elif timeout is None:
+            # Nur Timeouts mit dem gelernten Wert zählen, nicht die von Probe-Anfragen
+            self.adaptive_timeouts.record_timeout(device_id)
+
+    def read_holding_registers(self, device_id, start_address, register_count, timeout=None):
+        """Liest einen Registerbereich (FC03) und gibt die geprüften Datenbytes zurück (None bei Fehlern)"""
         try:
-            function_code = 0x03
-            message = struct.pack('>B B H H', device_id, function_code, start_address, register_count)
-            crc16 = crcmod.predefined.mkPredefinedCrcFun('modbus')(message)
-            message += struct.pack('<H', crc16)
+            return bytes(self._read_holding_registers(device_id, start_address, register_count, timeout))
+        except Exception as e:
+            self._record_error(device_id, e, f"Register {hex(start_address)}")
+            return None
 
-            # Gib der Antwort mehr Zeit
-            self.ser.reset_input_buffer()
-            self.ser.write(message)
-            time.sleep(0.2)  # Erhöhe die Wartezeit auf 200ms
+    def _read_holding_registers(self, device_id, start_address, register_count, timeout=None):
+        """Wie read_holding_registers, wirft aber bei Fehlern eine ModbusError-Unterklasse.
 
-            # Lese zuerst den Header (3 Bytes)
-            header = self.ser.read(3)
-            if len(header) != 3:
-                logger.error(f"Keine oder unvollständige Header-Antwort von Gerät {device_id}")
-                return None
+        Die Datenbytes sind eine memoryview auf den Empfangspuffer und müssen vor
+        der nächsten Transaktion dekodiert sein.
+        """
+        message = self._build_read_request(device_id, start_address, register_count)
+        response = self._send_and_receive(message, timeout)
+        return self._check_read_response(response, device_id, start_address, register_count)
 
-            # Extrahiere die Datenlänge aus dem Header
-            byte_count = header[2]
-            
-            # Lese den Rest der Nachricht (Daten + 2 Bytes CRC)
-            remaining = self.ser.read(byte_count + 2)
-            if len(remaining) != (byte_count + 2):
-                logger.error(f"Unvollständige Daten von Gerät {device_id}")
-                return None
+    def _build_read_request(self, device_id, start_address, register_count):
+        return request_frame(device_id, 0x03, start_address, register_count)
 
-            response = header + remaining
-            
-            # CRC Prüfung
-            received_crc = struct.unpack('<H', response[-2:])[0]
-            calculated_crc = crcmod.predefined.mkPredefinedCrcFun('modbus')(response[:-2])
-            
-            if received_crc != calculated_crc:
-                logger.error(f"CRC-Fehler bei Gerät {device_id}, Register {hex(start_address)}")
-                return None
+    def _check_response_header(self, response, device_id, function_code):
+        """Prüft Slave-ID, Funktionscode und Exception-Antworten einer Antwort"""
+        if len(response) < 3:
+            raise ModbusTimeoutError(device_id, f"Keine oder unvollständige Header-Antwort von Gerät {device_id}")
 
-            data = response[3:-2]
-            try:
-                if register_count == 2:
-                    # Für 32-bit Float-Werte
-                    if len(data) != 4:
-                        logger.error(f"Falsche Datenlänge für Float-Wert: {len(data)} Bytes")
-                        return None
-                    swapped_data = data[2:4] + data[0:2]
-                    value = struct.unpack('>f', swapped_data)[0]
-                else:
-                    # Für 16-bit Werte
-                    if len(data) != 2:
-                        logger.error(f"Falsche Datenlänge für Integer-Wert: {len(data)} Bytes")
-                        return None
-                    value = struct.unpack('>H', data)[0]
-
-                self.last_read_values[(device_id, start_address)] = value
-                logger.debug(f"Erfolgreich gelesen von Gerät {device_id}, Register {hex(start_address)}: {value}")
-                return value
-            except struct.error as e:
-                logger.error(f"Fehler beim Entpacken der Daten von Gerät {device_id}, Register {hex(start_address)}: {e}")
-                return None
+        if response[0] != device_id:
+            raise ModbusFrameError(device_id, f"Antwort von Slave {response[0]} statt Gerät {device_id}")
+
+        if response[1] == function_code | 0x80:
+            if len(response) != EXCEPTION_FRAME_LENGTH:
+                raise ModbusTimeoutError(device_id, f"Unvollständige Exception-Antwort von Gerät {device_id}")
+            self._check_crc(response, device_id)
+            raise ModbusExceptionResponse(device_id, function_code, response[2])
+
+        if response[1] != function_code:
+            raise ModbusFrameError(device_id, f"Unerwarteter Funktionscode {response[1]:#04x} von Gerät {device_id}")
+
+    def _check_crc(self, response, device_id):
+        if not crc_ok(response):
+            raise ModbusCRCError(device_id, f"CRC-Fehler bei Gerät {device_id}")
+
+    def _check_read_response(self, response, device_id, start_address, register_count):
+        """Prüft eine FC03-Antwort und gibt die Datenbytes zurück (memoryview ohne Kopie)"""
+        self._check_response_header(response, device_id, 0x03)
+
+        # Datenlänge aus dem Header (Daten + 2 Bytes CRC)
+        length = len(response)
+        if length != response[2] + 5:
+            raise ModbusTimeoutError(device_id, f"Unvollständige Daten von Gerät {device_id}")
+
+        self._check_crc(response, device_id)
+
+        if response[2] != register_count * 2:
+            raise ModbusFrameError(device_id, f"Falsche Datenlänge von Gerät {device_id}: {response[2]} Bytes")
+        if isinstance(response, memoryview) and response.obj is self._rx_buffer:
+            return self._rx_slice(3, length - 2)[0]
+        return memoryview(response)[3:length - 2]
+
+    def _record_error(self, device_id, error, context=''):
+        """Zählt und protokolliert einen Fehler, gibt die Qualität für den register_cache zurück"""
+        if isinstance(error, ModbusError):
+            kind, quality = error.kind, error.quality
+            if isinstance(error, ModbusExceptionResponse):
+                self.exception_counts.setdefault(device_id, Counter())[error.exception_code] += 1
+        else:
+            kind, quality = 'error', EXCEPTION
+        self.error_counts.setdefault(device_id, Counter())[kind] += 1
+        logger.error(f"Fehler bei Gerät {device_id}{', ' + context if context else ''}: {error}")
+        return quality
+
+    def diagnostics(self):
+        """Fehlerzähler pro Gerät und Art, Modbus-Exceptions pro Gerät und Code sowie gelernte Timeouts"""
+        diagnostics = {
+            'errors': {str(device_id): dict(counts) for device_id, counts in list(self.error_counts.items())},
+            'exceptions': {
+                str(device_id): {f"{code:#04x}_{EXCEPTION_CODES.get(code, 'unknown')}": count
+                                 for code, count in counts.items()}
+                for device_id, counts in list(self.exception_counts.items())
+            }
+        }
+        if self.adaptive_timeouts is not None:
+            diagnostics['timeouts'] = self.adaptive_timeouts.diagnostics()
+        register_quality = self.register_quality()
+        if register_quality:
+            diagnostics['register_quality'] = register_quality
+        return diagnostics
+
+    def register_quality(self, max_age=None):
+        """Register mit nicht gutem Wert pro Gerät und Qualität (aus dem register_cache).
+
+        Gute Werte älter als ``max_age`` (Standard: cache_max_age) zählen als
+        ``stale`` - so fallen Geräte auf, die nicht mehr abgefragt werden.
+        Geräte, deren Register alle gut sind, fehlen.
+        """
+        result = {}
+        for (device_id, _), entry in self.register_cache.snapshot(max_age).items():
+            if entry['quality'] != GOOD:
+                counts = result.setdefault(str(device_id), {})
+                counts[entry['quality']] = counts.get(entry['quality'], 0) + 1
+        return result
+
+    def _read_value(self, device_id, register_address, register_count, decode):
+        """Liest einen Wert, dekodiert ihn mit ``decode`` und pflegt den register_cache.
+
+        Bei Fehlern wird None zurückgegeben und die Fehlerursache im Cache
+        vermerkt - der letzte gute Wert wird nicht als frisch ausgegeben.
+        """
+        try:
+            data, quality = self._read_holding_registers(device_id, register_address, register_count), GOOD
+        except Exception as e:
+            data, quality = None, self._record_error(device_id, e, f"Register {hex(register_address)}")
+        return self._store_value(device_id, register_address, data, quality, decode)
+
+    def _store_value(self, device_id, register_address, data, quality, decode):
+        if data is None:
+            self.register_cache.mark(device_id, register_address, quality)
+            return None
+        try:
+            value = decode(data)
         except Exception as e:
-            logger.error(f"Allgemeiner Fehler beim Lesen von Gerät {device_id}, Register {hex(start_address)}: {e}")
+            logger.error(f"Fehler beim Dekodieren von Gerät {device_id}, Register {hex(register_address)}: {e}")
+            self.register_cache.mark(device_id, register_address, EXCEPTION)
             return None
 
-    def read_radar_sensor(self, device_id, register_address):
-        """Special method for reading radar sensor data with unsigned short format"""
-        function_code = 0x03
-        message = struct.pack('>B B H H', device_id, function_code, register_address, 1)
-        crc16 = crcmod.predefined.mkPredefinedCrcFun('modbus')(message)
-        message += struct.pack('<H', crc16)
+        self.register_cache.update(device_id, register_address, value)
+        logger.debug(f"Erfolgreich gelesen von Gerät {device_id}, Register {hex(register_address)}: {value}")
+        return value
 
-        expected_length = 7
-        response = self._send_and_receive(message, expected_length)
+    def read_register(self, device_id, start_address, register_count=1, data_type=None, byte_order='CDAB'):
+        """Liest einen Wert; ohne ``data_type`` float32 bei zwei Registern, uint16 bei einem.
 
-        if len(response) < expected_length:
-            return self.last_read_values.get((device_id, register_address), None)
+        Andere Registeranzahlen werden mit ValueError abgelehnt.
 
-        received_crc = struct.unpack('<H', response[-2:])[0]
-        calculated_crc = crcmod.predefined.mkPredefinedCrcFun('modbus')(response[:-2])
-        
-        if received_crc != calculated_crc:
-            return self.last_read_values.get((device_id, register_address), None)
+        Standard ist CDAB (Wort-Tausch), wie es die PH- und Trübungssensoren liefern.
+        """
+        if data_type is None:
+            if register_count not in (1, 2):
+                raise ValueError(f"Ohne data_type werden 1 (uint16) oder 2 Register (float32) gelesen, "
+                                 f"nicht {register_count}")
+            data_type = 'float32' if register_count == 2 else 'uint16'
+        elif register_count not in (1, DATA_TYPES[data_type][1]):
+            raise ValueError(f"{data_type} belegt {DATA_TYPES[data_type][1]} Register, nicht {register_count}")
+        register_count = DATA_TYPES[data_type][1]
+        return self._read_value(device_id, start_address, register_count,
+                                lambda data: decode_value(data, data_type, byte_order))
 
-        data = response[3:-2]
+    def probe(self, device_id, register_address, timeout=None):
+        """Prüft mit einer Ein-Register-Anfrage, ob ein Gerät antwortet"""
         try:
-            value = struct.unpack('>H', data)[0]
-            self.last_read_values[(device_id, register_address)] = value
-            return value
-        except struct.error:
-            return self.last_read_values.get((device_id, register_address), None)
+            self._read_holding_registers(device_id, register_address, 1, timeout)
+            return True
+        except ModbusExceptionResponse as e:
+            # Das Gerät antwortet - nur das Probe-Register kennt es nicht
+            self._record_error(device_id, e, "Probe-Anfrage")
+            return True
+        except Exception as e:
+            self._record_error(device_id, e, "Probe-Anfrage")
+            return False
 
-    def read_flow_sensor(self, device_id, register_address):
-        """Special method for reading flow sensor data with 32-bit float format"""
-        with self._lock:
+    def read_plan(self, device_id, blocks):
+        """Liest geplante Registerblöcke (siehe ReadPlanner) mit einer Anfrage pro Block.
+
+        Gibt ein Dict Name -> Wert zurück; Werte aus fehlgeschlagenen Blöcken sind None.
+        """
+        values = {}
+        pending = deque(self._planned_blocks(device_id, blocks))
+        while pending:
+            block = pending.popleft()
             try:
-                # Einfache Version wie im Port-Tester
-                function_code = 0x03
-                message = struct.pack('>BBHH', device_id, function_code, register_address, 2)
-                message += struct.pack('<H', crcmod.predefined.mkPredefinedCrcFun('modbus')(message))
-
-                # Clear buffers
-                self.ser.reset_input_buffer()
-                self.ser.reset_output_buffer()
-                
-                # Send request
-                self.ser.write(message)
-                self.ser.flush()
-                
-                # Fixed wait time
-                time.sleep(0.1)
-                
-                # Read response
-                response = self.ser.read(9)  # Erwarte genau 9 Bytes
-                
-                if len(response) == 9:
-                    # CRC check
-                    received_crc = struct.unpack('<H', response[-2:])[0]
-                    calculated_crc = crcmod.predefined.mkPredefinedCrcFun('modbus')(response[:-2])
-                    
-                    if received_crc == calculated_crc:
-                        data = response[3:-2]
-                        value = struct.unpack('>f', data)[0]
-                        self.last_read_values[(device_id, register_address)] = value
-                        return value
-                
-                return self.last_read_values.get((device_id, register_address), None)
-                    
+                data, quality = self._read_holding_registers(device_id, block.start, block.count), GOOD
             except Exception as e:
-                logger.error(f"Fehler beim Lesen von Flow Sensor {device_id}: {e}")
-                return self.last_read_values.get((device_id, register_address), None)
+                quality = self._record_error(device_id, e, f"Block {block}")
+                split = self._split_block(device_id, block, e)
+                if split:
+                    pending.extendleft(reversed(split))
+                    continue
+                data = None
+            self._store_block(device_id, block, data, quality, values)
+        return values
+
+    def _planned_blocks(self, device_id, blocks):
+        """Geplante Blöcke, abgelehnte Blöcke durch ihre Einzelblöcke ersetzt"""
+        for block in blocks:
+            yield from self._split_blocks.get((device_id, block), (block,))
+
+    def _split_block(self, device_id, block, error):
+        """Zerlegt einen Block, dessen Bereich das Gerät nicht lesen lässt (Exception 0x02).
+
+        Ein Block mit Lücke liest Register mit, die das Gerät eventuell nicht
+        kennt. Die Zerlegung gilt für alle weiteren Abfragen; gibt die
+        Einzelblöcke zurück oder None, wenn der Fehler nicht daran liegt.
+        """
+        if (not isinstance(error, ModbusExceptionResponse) or error.exception_code != 0x02
+                or len(block.reads) < 2):
+            return None
+        split = self._split_blocks[(device_id, block)] = self.read_planner.split(block)
+        logger.warning(f"Gerät {device_id} lehnt {block} ab ({error.name}) - lese die Werte ab jetzt einzeln")
+        return split
+
+    def _store_block(self, device_id, block, data, quality, values):
+        """Dekodiert einen Block in ``values`` und pflegt den register_cache"""
+        try:
+            block_values = block.decode(data) if data is not None else {}
+        except Exception as e:
+            logger.error(f"Fehler beim Dekodieren von Gerät {device_id}, Block {block}: {e}")
+            block_values, quality = {}, EXCEPTION
+
+        for read in block.reads:
+            value = block_values.get(read.name)
+            if value is None:
+                self.register_cache.mark(device_id, read.address, quality)
+            else:
+                self.register_cache.update(device_id, read.address, value)
+            values[read.name] = value
+
+    def read_radar_sensor(self, device_id, register_address):
+        """Special method for reading radar sensor data with unsigned short format"""
+        return self._read_value(device_id, register_address, 1, lambda data: decode_value(data, 'uint16'))
+
+    def read_flow_sensor(self, device_id, register_address):
+        """Special method for reading flow sensor data with 32-bit float format (ABCD, ohne Wort-Tausch)"""
+        return self._read_value(device_id, register_address, 2, lambda data: decode_value(data, 'float32', 'ABCD'))
 
     def write_registers(self, device_id, start_address, values):
         """Write multiple registers using Modbus function code 0x10"""
+        message = self._build_write_request(device_id, start_address, values)
+        try:
+            return self._check_write_response(self._send_and_receive(message), device_id)
+        except Exception as e:
+            self._record_error(device_id, e, f"Schreiben ab Register {hex(start_address)}")
+            raise
+
+    def _build_write_request(self, device_id, start_address, values):
         function_code = 0x10
         register_count = len(values)
         byte_count = register_count * 2
         
         # Erstelle die Nachricht: device_id + function_code + start_address + register_count + byte_count + values
-        message = struct.pack('>B B H H B', device_id, function_code, start_address, register_count, byte_count)
-        
-        # Füge die Werte hinzu
-        for value in values:
-            message += struct.pack('>H', value)
-            
-        # Berechne und füge CRC hinzu
-        crc16 = crcmod.predefined.mkPredefinedCrcFun('modbus')(message)
-        message += struct.pack('<H', crc16)
-
-        # Erwartete Antwortlänge für Funktion 0x10 ist 8 Bytes
-        expected_length = 8
-        response = self._send_and_receive(message, expected_length)
-
-        if len(response) < expected_length:
-            raise Exception("Keine oder unvollständige Antwort vom Gerät")
-
-        # Überprüfe die Antwort
-        received_crc = struct.unpack('<H', response[-2:])[0]
-        calculated_crc = crcmod.predefined.mkPredefinedCrcFun('modbus')(response[:-2])
-        
-        if received_crc != calculated_crc:
-            raise Exception("CRC-Prüfung fehlgeschlagen")
+        message = struct.pack(f'>B B H H B {register_count}H', device_id, function_code, start_address,
+                              register_count, byte_count, *values)
+        return append_crc(message)
 
-        # Überprüfe die Antwort auf Fehler
-        if response[1] != function_code:
-            raise Exception(f"Unerwarteter Funktionscode in der Antwort: {response[1]}")
+    def _check_write_response(self, response, device_id):
+        """Prüft die Antwort auf FC16 (8 Bytes), wirft bei Fehlern eine ModbusError-Unterklasse"""
+        self._check_response_header(response, device_id, 0x10)
+
+        if len(response) < WRITE_RESPONSE_LENGTH:
+            raise ModbusTimeoutError(device_id, "Keine oder unvollständige Antwort vom Gerät")
 
-        return True
\ No newline at end of file
+        self._check_crc(response, device_id)
+        return True
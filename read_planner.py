@@ -0,0 +1,95 @@
+# -----------------------------------------------------------------------------
+# Company: KARIM Technologies
+# Author: Sayed Amir Karim
+# Copyright: 2024 KARIM Technologies
+#
+# License: All Rights Reserved
+#
+# Module: Read Planner
+# Description: Fasst Registerzugriffe eines Sensors zu möglichst wenigen
+#              FC03-Anfragen zusammen und dekodiert die Antworten blockweise
+# -----------------------------------------------------------------------------
+
+from collections import namedtuple
+
+# Maximale Registeranzahl einer FC03-Anfrage laut Modbus-Spezifikation
+MAX_REGISTERS_PER_READ = 125
+
+RegisterRead = namedtuple('RegisterRead', ['name', 'address', 'count', 'data_type', 'byte_order'])
+RegisterRead.__new__.__defaults__ = (2, 'float32', 'ABCD')
+RegisterRead.__doc__ = """Ein benannter Wert im Registerbereich eines Geräts.
+
+name       -- Schlüssel im Ergebnis-Dict
+address    -- Startregister
+count      -- Anzahl 16-Bit-Register
+data_type  -- Datentyp (modbus_manager.DATA_TYPES, z.B. 'float32')
+byte_order -- Byte-Reihenfolge im Telegramm (ABCD, CDAB, BADC, DCBA)
+"""
+
+class ReadBlock:
+    """Zusammenhängender Registerbereich, der mit einer Anfrage gelesen wird"""
+
+    def __init__(self, start, count, reads):
+        self.start = start
+        self.count = count
+        self.reads = reads
+        self._codec = None
+        self._names = ()
+
+    def compile(self, codec):
+        """Holt den Decoder für den fertig geplanten Block.
+
+        ``codec(layout)`` liefert einen RegisterCodec (modbus_manager.register_codec),
+        der die ganze Antwort mit einem vorkompilierten struct.Struct dekodiert.
+        """
+        self._codec = codec(tuple((read.address - self.start, read.data_type, read.byte_order)
+                                  for read in self.reads))
+        self._names = tuple(read.name for read in self.reads)
+
+    def decode(self, data):
+        """Dekodiert die Datenbytes des Blocks in ein Dict Name -> Wert"""
+        return dict(zip(self._names, self._codec.decode(data)))
+
+    def __repr__(self):
+        return f"ReadBlock(start={hex(self.start)}, count={self.count}, reads={[r.name for r in self.reads]})"
+
+class ReadPlanner:
+    """Plant Registerzugriffe als möglichst wenige zusammenhängende Blöcke.
+
+    Bereiche, zwischen denen höchstens ``max_gap`` ungenutzte Register liegen,
+    werden zu einer Anfrage zusammengefasst, solange der Block nicht mehr als
+    ``max_registers`` Register umfasst. Ein Gap > 0 liest Register mit, die der
+    Sensor nicht braucht - das Gerät muss diese Adressen aber beantworten.
+    Lehnt es den Block mit Exception 0x02 ab, zerlegt der DeviceManager ihn
+    mit ``split`` und liest die Werte ab dann einzeln.
+    ``codec`` baut den Decoder pro Block (modbus_manager.register_codec).
+    """
+
+    def __init__(self, codec, max_gap=0, max_registers=MAX_REGISTERS_PER_READ):
+        self.codec = codec
+        self.max_gap = max_gap
+        self.max_registers = max_registers
+
+    def plan(self, reads):
+        blocks = []
+        for read in sorted(reads, key=lambda r: r.address):
+            if blocks:
+                block = blocks[-1]
+                block_end = block.start + block.count
+                new_end = max(block_end, read.address + read.count)
+                if (read.address - block_end <= self.max_gap
+                        and new_end - block.start <= self.max_registers):
+                    block.count = new_end - block.start
+                    block.reads.append(read)
+                    continue
+            blocks.append(ReadBlock(read.address, read.count, [read]))
+        for block in blocks:
+            block.compile(self.codec)
+        return blocks
+
+    def split(self, block):
+        """Zerlegt einen Block wieder in eine Anfrage pro Wert (ohne mitgelesene Lücken)"""
+        blocks = [ReadBlock(read.address, read.count, [read]) for read in block.reads]
+        for single in blocks:
+            single.compile(self.codec)
+        return blocks
@@ -0,0 +1,110 @@
+# -----------------------------------------------------------------------------
+# Company: KARIM Technologies
+# Author: Sayed Amir Karim
+# Copyright: 2024 KARIM Technologies
+#
+# License: All Rights Reserved
+#
+# Module: Register Cache
+# Description: Zuletzt gelesene Registerwerte mit Zeitstempel und Qualität
+# -----------------------------------------------------------------------------
+
+import time
+
+# Qualität eines Registerwerts
+GOOD = 'good'              # letzte Abfrage erfolgreich
+STALE = 'stale'            # Wert älter als das erlaubte Höchstalter
+CRC_ERROR = 'crc_error'    # letzte Abfrage: CRC-Fehler oder fehlerhafter Rahmen
+TIMEOUT = 'timeout'        # letzte Abfrage: keine oder unvollständige Antwort
+EXCEPTION = 'exception'    # letzte Abfrage: Modbus-Exception oder interner Fehler
+
+class RegisterValue:
+    """Ein Cache-Eintrag. Einträge werden nie verändert, sondern ersetzt."""
+
+    __slots__ = ('value', 'timestamp', 'quality')
+
+    def __init__(self, value, timestamp, quality):
+        self.value = value
+        self.timestamp = timestamp  # time.monotonic() der letzten erfolgreichen Abfrage, None ohne
+        self.quality = quality
+
+    def age(self, now=None):
+        """Sekunden seit der letzten erfolgreichen Abfrage, None wenn es noch keine gab"""
+        if self.timestamp is None:
+            return None
+        return (time.monotonic() if now is None else now) - self.timestamp
+
+    def __repr__(self):
+        age = self.age()
+        age = 'never' if age is None else f"{age:.1f}s"
+        return f"RegisterValue({self.value!r}, age={age}, quality={self.quality})"
+
+class RegisterCache:
+    """Zuletzt gelesene Werte pro (Geräte-ID, Registeradresse).
+
+    Erfolgreiche Abfragen speichern den Wert mit Qualität ``good``.
+    Fehlgeschlagene Abfragen behalten den letzten Wert und dessen Zeitstempel,
+    setzen aber die Qualität auf die Fehlerursache - ein alter Wert wird so nie
+    als frisch ausgegeben. Register ohne erfolgreiche Abfrage haben weder Wert
+    noch Zeitstempel. ``value`` liefert nur gute Werte, die höchstens
+    ``max_age`` Sekunden alt sind, und erspart damit eine Busabfrage.
+    """
+
+    def __init__(self, max_age=None, clock=time.monotonic):
+        self.max_age = max_age
+        self.clock = clock
+        self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def update(self, device_id, address, value):
+        self._entries[(device_id, address)] = RegisterValue(value, self.clock(), GOOD)
+
+    def mark(self, device_id, address, quality):
+        """Vermerkt eine fehlgeschlagene Abfrage, der letzte Wert bleibt erhalten"""
+        entry = self._entries.get((device_id, address))
+        if entry is None:
+            self._entries[(device_id, address)] = RegisterValue(None, None, quality)
+        else:
+            self._entries[(device_id, address)] = RegisterValue(entry.value, entry.timestamp, quality)
+
+    def get(self, device_id, address):
+        """Roher Eintrag (RegisterValue) oder None"""
+        return self._entries.get((device_id, address))
+
+    def quality(self, device_id, address, max_age=None):
+        """Qualität eines Eintrags; gute Werte über ``max_age`` gelten als ``stale``"""
+        entry = self._entries.get((device_id, address))
+        if entry is None:
+            return None
+        max_age = self.max_age if max_age is None else max_age
+        if (entry.quality == GOOD and max_age is not None and entry.timestamp is not None
+                and entry.age(self.clock()) > max_age):
+            return STALE
+        return entry.quality
+
+    def value(self, device_id, address, max_age=None):
+        """Wert, wenn er gut und nicht älter als ``max_age`` ist, sonst None"""
+        if self.quality(device_id, address, max_age) != GOOD:
+            return None
+        return self._entries[(device_id, address)].value
+
+    def remove_device(self, device_id):
+        for key in [key for key in self._entries if key[0] == device_id]:
+            del self._entries[key]
+
+    def snapshot(self, max_age=None):
+        """Alle Einträge als Dict (device_id, address) -> {value, age, quality}, z.B. für eine lokale API.
+
+        ``age`` ist None für Register, die noch nie erfolgreich gelesen wurden.
+        """
+        now = self.clock()
+        return {
+            key: {
+                'value': entry.value,
+                'age': round(entry.age(now), 3) if entry.timestamp is not None else None,
+                'quality': self.quality(key[0], key[1], max_age)
+            }
+            for key, entry in list(self._entries.items())
+        }
@@ -0,0 +1,86 @@
+import time
+import asyncio
+from modbus_async import AsyncDeviceManager
+from .sensor_manager import SensorManager
+from .bus_worker import AsyncBusWorker
+from .circuit_breaker import HALF_OPEN
+
+class AsyncSensorManager(SensorManager):
+    """SensorManager auf einem asyncio-Event-Loop.
+
+    Jeder Bus wird als Task abgefragt (AsyncDeviceManager, AsyncBusWorker),
+    das Housekeeping (Publisher-Metriken) läuft als weiterer Task. Konfiguration,
+    Circuit Breaker, Deadband und Telemetrie-Pipeline sind dieselben wie beim
+    SensorManager. Der TelemetryPublisher behält seinen Sende-Thread, weil der
+    ThingsBoard-Client (paho) seinen Netzwerk-Loop selbst in einem Thread
+    betreibt und die Versandbestätigung blockierend abgefragt wird.
+
+    ``poll_sensor`` und ``read_sensor_data`` sind hier Coroutinen.
+    """
+
+    DEVICE_MANAGER_CLASS = AsyncDeviceManager
+    BUS_WORKER_CLASS = AsyncBusWorker
+
+    def run(self):
+        """Main run loop"""
+        asyncio.run(self.run_async())
+
+    async def run_async(self):
+        self.logger.info("Starte AsyncSensorManager...")
+        self.running = True
+        self.publisher.start()
+        tasks = [bus.start() for bus in self.buses]
+        tasks.append(asyncio.get_running_loop().create_task(self.housekeeping(), name='housekeeping'))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            self.running = False
+            for bus in self.buses:
+                bus.running = False
+
+    async def housekeeping(self):
+        while self.running:
+            if time.monotonic() - self.last_metrics_time >= self.METRICS_INTERVAL:
+                self.send_publisher_metrics()
+            await asyncio.sleep(1.0)
+
+    async def read_sensor_data(self, sensor_id, sensor_info):
+        """Liest Daten von einem Sensor mit Bus-Management"""
+        try:
+            # Warte auf die gerätespezifische Ruhezeit
+            await sensor_info['bus'].wait_for_bus(sensor_info['config'].get('quiet_time', 0.0))
+
+            sensor = sensor_info['sensor']
+            return self.check_sensor_data(sensor_id, await sensor.read_data_async())
+
+        except Exception as e:
+            self.logger.error(f"Fehler beim Lesen von Sensor {sensor_id}: {e}")
+            return None
+
+    async def poll_sensor(self, sensor_id, sensor_info, scheduled_time):
+        """Liest einen fälligen Sensor und sendet die Telemetrie"""
+        breaker = sensor_info['breaker']
+        previous_state = (breaker.state, breaker.open_count)
+
+        # Abgelaufenes Oversampling-Intervall abschließen, auch wenn der Sensor übersprungen wird
+        self.publish_window(sensor_id, sensor_info, scheduled_time)
+
+        state = breaker.before_call()
+        if state is None:
+            return
+
+        try:
+            if state == HALF_OPEN:
+                self.logger.info(f"Sensor {sensor_id}: Probe-Anfrage nach Backoff")
+                if not await sensor_info['sensor'].probe_async():
+                    breaker.record_failure()
+                    return
+
+            self.logger.debug(f"Lese Sensor {sensor_id}...")
+            sensor_data = await self.read_sensor_data(sensor_id, sensor_info)
+            self.handle_sensor_data(sensor_id, sensor_info, sensor_data, scheduled_time)
+        except Exception as e:
+            self.handle_sensor_error(sensor_id, breaker, e)
+        finally:
+            if (breaker.state, breaker.open_count) != previous_state:
+                self.report_breaker_state(sensor_id, breaker)
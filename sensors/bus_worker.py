@@ -0,0 +1,266 @@
+import asyncio
+import inspect
+import itertools
+import time
+import logging
+from concurrent.futures import Future
+from queue import PriorityQueue, Empty
+from threading import Thread, Lock, get_ident
+from .scheduler import SensorScheduler
+
+# Priorität von Transaktionen (kleiner = früher). Geplante Sensorabfragen
+# laufen als ROUTINE, übergebene Transaktionen werden vor ihnen ausgeführt.
+URGENT = 0
+NORMAL = 1
+ROUTINE = 2
+
+class BusWorker:
+    """Bus-Owner für einen RS485-Bus.
+
+    Nur der Thread des BusWorkers greift auf den seriellen Port zu. Er führt
+    fällige Sensorabfragen aus seinem Scheduler aus und dazwischen Transaktionen,
+    die andere Threads (Schreibwerkzeuge, Diagnose, RPC-Handler) mit ``submit``
+    übergeben; sie warten auf das zurückgegebene Future. ``URGENT``-Transaktionen
+    (z.B. Radar-Abfragen bei Alarm) überholen alle anderen.
+
+    Busse werden parallel abgefragt, die Zykluszeit der Anlage bestimmt der
+    langsamste Bus. ``poll`` (SensorManager.poll_sensor) liest einen fälligen
+    Sensor und stellt die Telemetrie in die gemeinsame Sende-Queue ein.
+    """
+
+    def __init__(self, name, dev_manager, poll):
+        self.name = name
+        self.dev_manager = dev_manager
+        self.poll = poll
+        self.sensors = {}
+        self.scheduler = SensorScheduler()
+        self.logger = logging.getLogger(f'BusWorker_{name}')
+
+        # Übergebene Transaktionen: (Priorität, Reihenfolge, Funktion, args, kwargs, Future)
+        self.requests = PriorityQueue()
+        self._sequence = itertools.count()
+
+        # Ruhezeit pro Gerät (sensor.quiet_time), die t3.5-Pause zwischen
+        # Rahmen hält der DeviceManager selbst ein
+        self.last_communication_time = 0
+
+        self.running = False
+        # Nach stop() werden keine Transaktionen mehr angenommen; die Sperre
+        # verhindert, dass eine noch nach _cancel_requests in der Queue landet
+        self._stopped = False
+        self._submit_lock = Lock()
+        self._thread = None
+        self._thread_id = None
+        dev_manager.owner = self
+
+    def add_sensor(self, sensor_id, sensor_info):
+        sensor_info['bus'] = self
+        self.sensors[sensor_id] = sensor_info
+
+    def schedule(self):
+        """Plant alle Sensoren ein, Sensoren mit gleichem Intervall werden versetzt"""
+        self.scheduler.add_spread({
+            sensor_id: self.poll_interval(sensor_info)
+            for sensor_id, sensor_info in self.sensors.items()
+        })
+
+    @staticmethod
+    def poll_interval(sensor_info):
+        """Abfrageintervall: ``sample_interval`` bei Oversampling, sonst das Sendeintervall"""
+        aggregator = sensor_info.get('aggregator')
+        if aggregator is not None:
+            return aggregator.sample_interval
+        return sensor_info['config']['transmission']['interval']
+
+    def submit(self, function, *args, priority=NORMAL, **kwargs):
+        """Führt ``function(*args, **kwargs)`` im Bus-Thread aus und gibt ein Future zurück.
+
+        Nach ``stop`` ist das Future bereits abgebrochen.
+        """
+        future = Future()
+        with self._submit_lock:
+            if self._stopped:
+                future.cancel()
+                return future
+            self.requests.put((priority, next(self._sequence), function, args, kwargs, future))
+        return future
+
+    def submit_poll(self, sensor_id, priority=URGENT):
+        """Außerplanmäßige Abfrage eines Sensors (Future mit None, Telemetrie wie bei geplanten Abfragen)"""
+        return self.submit(self.poll, sensor_id, self.sensors[sensor_id], time.monotonic(), priority=priority)
+
+    def is_owner_thread(self):
+        return self._thread_id == get_ident()
+
+    def wait_for_bus(self, quiet_time=0.0):
+        """Wartet bis der Bus mindestens quiet_time Sekunden ruhig war (nur im Bus-Thread)"""
+        time_since_last = time.monotonic() - self.last_communication_time
+        if time_since_last < quiet_time:
+            time.sleep(quiet_time - time_since_last)
+        self.last_communication_time = time.monotonic()
+
+    def start(self):
+        self.running = True
+        self._stopped = False
+        self._thread = Thread(target=self._run, name=f'BusWorker_{self.name}', daemon=True)
+        self._thread.start()
+        self.logger.info(f"Bus {self.name} gestartet ({len(self.sensors)} Sensoren)")
+
+    def stop(self, timeout=5.0):
+        """Beendet den Bus-Thread; der Port wird geschlossen, sobald er keine Transaktion mehr ausführt"""
+        self._reject_requests()
+        if self._thread is None:
+            self._cancel_requests()
+            self.dev_manager.ser.close()
+            return
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            self.logger.warning(f"Bus {self.name}: Transaktion läuft nach {timeout} s noch - "
+                                f"Port wird am Ende des Threads geschlossen")
+
+    def _reject_requests(self):
+        with self._submit_lock:
+            self.running = False
+            self._stopped = True
+
+    def _run(self):
+        self._thread_id = get_ident()
+        try:
+            self._poll_loop()
+        finally:
+            # Erst hier schließen: der Thread ist die einzige Stelle, die den Port benutzt
+            self._cancel_requests()
+            self.dev_manager.ser.close()
+
+    def _poll_loop(self):
+        while self.running:
+            # Übergebene Transaktionen haben Vorrang vor geplanten Abfragen
+            try:
+                self._execute(self.requests.get_nowait())
+                continue
+            except Empty:
+                pass
+
+            due = self.scheduler.pop_due()
+            if due is None:
+                # Bis zum nächsten Termin auf Transaktionen warten (max. 1 s, damit stop() greift)
+                wait_time = self.scheduler.time_until_next()
+                try:
+                    self._execute(self.requests.get(timeout=1.0 if wait_time is None else min(wait_time, 1.0)))
+                except Empty:
+                    pass
+                continue
+
+            sensor_id, scheduled_time = due
+            try:
+                self.poll(sensor_id, self.sensors[sensor_id], scheduled_time)
+            except Exception as e:
+                self.logger.error(f"Unerwarteter Fehler bei Sensor {sensor_id}: {e}")
+            finally:
+                self.scheduler.reschedule(sensor_id, scheduled_time)
+
+    def _execute(self, request):
+        _, _, function, args, kwargs, future = request
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(function(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+
+    def _cancel_requests(self):
+        """Bricht nach dem Stopp nicht mehr ausgeführte Transaktionen ab"""
+        while True:
+            try:
+                request = self.requests.get_nowait()
+            except Empty:
+                return
+            request[-1].cancel()
+
+class AsyncBusWorker(BusWorker):
+    """BusWorker als asyncio-Task auf dem Event-Loop des AsyncSensorManager.
+
+    ``poll`` ist hier eine Coroutine (AsyncSensorManager.poll_sensor).
+    ``submit`` darf aus beliebigen Threads aufgerufen werden; Funktionen, die
+    eine Coroutine liefern, werden im Task erwartet. Im Event-Loop selbst wird
+    das Future mit ``await asyncio.wrap_future(future)`` erwartet.
+    """
+
+    def __init__(self, name, dev_manager, poll):
+        super().__init__(name, dev_manager, poll)
+        # Der Event-Loop serialisiert die Buszugriffe selbst (AsyncDeviceManager)
+        dev_manager.owner = None
+        self._task = None
+        self._loop = None
+        self._wakeup = None
+
+    def submit(self, function, *args, priority=NORMAL, **kwargs):
+        future = super().submit(function, *args, priority=priority, **kwargs)
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return future
+
+    async def wait_for_bus(self, quiet_time=0.0):
+        """Wartet bis der Bus mindestens quiet_time Sekunden ruhig war"""
+        time_since_last = time.monotonic() - self.last_communication_time
+        if time_since_last < quiet_time:
+            await asyncio.sleep(quiet_time - time_since_last)
+        self.last_communication_time = time.monotonic()
+
+    def start(self):
+        self.running = True
+        self._stopped = False
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = self._loop.create_task(self._run(), name=f'BusWorker_{self.name}')
+        self.logger.info(f"Bus {self.name} gestartet ({len(self.sensors)} Sensoren)")
+        return self._task
+
+    def stop(self, timeout=5.0):
+        # Der Task beendet sich nach spätestens einer Sekunde selbst und schließt den Port
+        self._reject_requests()
+        if self._task is None:
+            self.dev_manager.close()
+
+    async def _run(self):
+        try:
+            while self.running:
+                # Vor der Prüfung der Queue zurücksetzen, sonst geht ein Wecksignal verloren
+                self._wakeup.clear()
+                try:
+                    await self._execute(self.requests.get_nowait())
+                    continue
+                except Empty:
+                    pass
+
+                due = self.scheduler.pop_due()
+                if due is None:
+                    wait_time = self.scheduler.time_until_next()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), 1.0 if wait_time is None else min(wait_time, 1.0))
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                sensor_id, scheduled_time = due
+                try:
+                    await self.poll(sensor_id, self.sensors[sensor_id], scheduled_time)
+                except Exception as e:
+                    self.logger.error(f"Unerwarteter Fehler bei Sensor {sensor_id}: {e}")
+                finally:
+                    self.scheduler.reschedule(sensor_id, scheduled_time)
+        finally:
+            self._cancel_requests()
+            self.dev_manager.close()
+
+    async def _execute(self, request):
+        _, _, function, args, kwargs, future = request
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = function(*args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            future.set_result(result)
+        except Exception as e:
+            future.set_exception(e)
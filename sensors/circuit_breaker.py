@@ -0,0 +1,141 @@
+import json
+import os
+import random
+import time
+import logging
+from threading import Lock
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitBreaker:
+    """Circuit Breaker pro Gerät mit exponentiellem Backoff und Jitter.
+
+    closed    -- normale Abfrage, Fehler werden gezählt
+    open      -- nach ``failure_threshold`` Fehlern in Folge wird das Gerät bis
+                 zum Ablauf des Backoffs nicht abgefragt
+    half_open -- nach dem Backoff entscheidet eine günstige Probe-Anfrage, ob
+                 das Gerät wieder normal abgefragt wird; schlägt sie fehl,
+                 verdoppelt sich der Backoff (bis ``max_delay``)
+    """
+
+    def __init__(self, failure_threshold=5, base_delay=30.0, max_delay=3600.0, jitter=0.2,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.clock = clock
+
+        self.state = CLOSED
+        self.failures = 0
+        self.open_count = 0
+        self.retry_at = 0.0
+
+    def before_call(self):
+        """Gibt den Zustand für diese Abfrage zurück oder None, wenn sie übersprungen wird"""
+        if self.state == OPEN:
+            if self.clock() < self.retry_at:
+                return None
+            self.state = HALF_OPEN
+        return self.state
+
+    def record_success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.open_count = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self._open()
+
+    def retry_in(self):
+        """Sekunden bis zur nächsten Probe (0 wenn nicht offen)"""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.retry_at - self.clock())
+
+    def _open(self):
+        self.state = OPEN
+        self.open_count += 1
+        delay = min(self.max_delay, self.base_delay * 2 ** (self.open_count - 1))
+        delay *= 1 + self.jitter * random.uniform(-1, 1)
+        self.retry_at = self.clock() + delay
+
+    def to_dict(self):
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'open_count': self.open_count,
+            'retry_in': self.retry_in()
+        }
+
+    def restore(self, saved, elapsed=0.0):
+        """Stellt einen mit ``to_dict`` gespeicherten Zustand wieder her.
+
+        ``elapsed`` ist die seit dem Speichern vergangene Zeit in Sekunden.
+        """
+        self.state = saved.get('state', CLOSED)
+        if self.state == HALF_OPEN:
+            # Probe wurde nicht abgeschlossen - beim nächsten Aufruf wiederholen
+            self.state = OPEN
+        self.failures = saved.get('failures', 0)
+        self.open_count = saved.get('open_count', 0)
+        self.retry_at = self.clock() + max(0.0, saved.get('retry_in', 0.0) - elapsed)
+
+class CircuitBreakerRegistry:
+    """Circuit Breaker aller Sensoren mit Persistenz in einer JSON-Datei"""
+
+    def __init__(self, state_file=None, **breaker_settings):
+        self.state_file = state_file
+        self.breaker_settings = breaker_settings
+        self.breakers = {}
+        # Busse laufen in eigenen Threads und speichern unabhängig voneinander
+        self._save_lock = Lock()
+        self.logger = logging.getLogger('CircuitBreaker')
+        self._saved = self._load()
+
+    def get(self, sensor_id):
+        breaker = self.breakers.get(sensor_id)
+        if breaker is None:
+            breaker = self.breakers[sensor_id] = CircuitBreaker(**self.breaker_settings)
+            saved = self._saved.get('breakers', {}).get(sensor_id)
+            if saved:
+                breaker.restore(saved, max(0.0, time.time() - self._saved.get('saved_at', time.time())))
+                if breaker.state != CLOSED:
+                    self.logger.info(f"Sensor {sensor_id}: Circuit Breaker {breaker.state} aus vorherigem Lauf "
+                                     f"(nächste Probe in {breaker.retry_in():.0f} s)")
+        return breaker
+
+    def save(self):
+        if not self.state_file:
+            return
+        with self._save_lock:
+            state = {
+                'saved_at': time.time(),
+                'breakers': {sensor_id: breaker.to_dict() for sensor_id, breaker in list(self.breakers.items())}
+            }
+            try:
+                directory = os.path.dirname(self.state_file)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                temp_file = f"{self.state_file}.tmp"
+                with open(temp_file, 'w') as f:
+                    json.dump(state, f)
+                os.replace(temp_file, self.state_file)
+            except OSError as e:
+                self.logger.error(f"Fehler beim Speichern des Circuit-Breaker-Zustands: {e}")
+
+    def _load(self):
+        if not self.state_file:
+            return {}
+        try:
+            with open(self.state_file, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, json.JSONDecodeError) as e:
+            self.logger.warning(f"Circuit-Breaker-Zustand nicht lesbar, starte neu: {e}")
+            return {}
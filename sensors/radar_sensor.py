@@ -1,24 +1,26 @@
-from .sensor_base import SensorBase
+from .sensor_profile import ProfileSensor
 from device_config.radar_sensor_config import RadarSensorConfig
 from calculations.radar_calculations import RadarCalculations
 
-class RadarSensor(SensorBase):
-    def __init__(self, device_id, device_manager):
-        super().__init__(device_id, device_manager)
+class RadarSensor(ProfileSensor):
+    """Radar-Füllstandssensor: Register aus config/profiles/radar.json,
+    dazu die abgeleiteten Werte aus RadarCalculations"""
+
+    def __init__(self, device_id, device_manager, profile):
+        super().__init__(device_id, device_manager, profile)
         # Lade Konfiguration
         sensor_number = int(str(device_id))
         config = RadarSensorConfig(sensor_number)
         # Initialisiere Berechnungsmodul
         self.calculations = RadarCalculations(config.config)
-        
-    def read_data(self):
-        """Read radar sensor data and calculate derived values"""
+
+    def process(self, values):
+        """Calculate derived values from the radar sensor reading"""
+        values = super().process(values)
+        if values is None:
+            return None
         try:
-            measured_air_distance = self.device.read_radar_sensor(register_address=0x0001)
-            
-            if measured_air_distance is None:
-                self.logger.error(f"Fehler beim Lesen des Füllstands von Gerät {self.device_id}")
-                return None
+            measured_air_distance = values['measured_air_distance']
                 
             # Berechne alle abgeleiteten Werte mit dem Berechnungsmodul
             actual_water_level = self.calculations.calculate_water_level(measured_air_distance)
@@ -47,4 +49,4 @@ class RadarSensor(SensorBase):
             }
         except Exception as e:
             self.logger.error(f"Fehler beim Lesen des Radarsensors (ID: {self.device_id}): {str(e)}")
-            return None
\ No newline at end of file
+            return None
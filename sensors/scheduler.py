@@ -0,0 +1,82 @@
+import heapq
+import math
+import time
+from collections import defaultdict
+
+class SensorScheduler:
+    """Deadline-Scheduler für die Sensorabfrage auf Basis eines Heaps.
+
+    Jeder Sensor steht mit seinem nächsten Fälligkeitszeitpunkt im Heap. Der
+    nächste Termin wird aus dem geplanten (nicht dem tatsächlichen) Zeitpunkt
+    berechnet, damit sich Verzögerungen nicht über die Zyklen aufsummieren.
+    Verpasste Termine werden übersprungen statt nachgeholt.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._heap = []
+        self._intervals = {}
+        self._counter = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def add(self, sensor_id, interval, due=None):
+        """Plant einen Sensor ein (Standard: sofort fällig)"""
+        self._intervals[sensor_id] = interval
+        self._push(self.clock() if due is None else due, sensor_id)
+
+    def add_spread(self, intervals, start=None):
+        """Plant mehrere Sensoren ein und verteilt gleiche Intervalle über die Periode.
+
+        ``intervals`` bildet Sensor-ID auf Intervall in Sekunden ab. Sensoren mit
+        gleichem Intervall bekommen gleichmäßig versetzte Startzeitpunkte, damit
+        sie nicht alle im selben Moment um den Bus konkurrieren.
+        """
+        start = self.clock() if start is None else start
+        groups = defaultdict(list)
+        for sensor_id, interval in intervals.items():
+            groups[interval].append(sensor_id)
+
+        for interval, sensor_ids in groups.items():
+            step = interval / len(sensor_ids)
+            for index, sensor_id in enumerate(sensor_ids):
+                self.add(sensor_id, interval, start + index * step)
+
+    def next_due(self):
+        """Fälligkeitszeitpunkt des nächsten Sensors oder None"""
+        return self._heap[0][0] if self._heap else None
+
+    def time_until_next(self):
+        """Sekunden bis zum nächsten Termin (0 wenn bereits fällig, None wenn leer)"""
+        due = self.next_due()
+        if due is None:
+            return None
+        return max(0.0, due - self.clock())
+
+    def pop_due(self):
+        """Entnimmt den nächsten fälligen Sensor als (sensor_id, geplanter Zeitpunkt).
+
+        Gibt None zurück, wenn noch kein Sensor fällig ist. Der Sensor muss nach
+        der Abfrage mit ``reschedule`` wieder eingeplant werden.
+        """
+        if not self._heap or self._heap[0][0] > self.clock():
+            return None
+        due, _, sensor_id = heapq.heappop(self._heap)
+        return sensor_id, due
+
+    def reschedule(self, sensor_id, scheduled_time):
+        """Plant den nächsten Termin relativ zum geplanten Zeitpunkt ein"""
+        interval = self._intervals[sensor_id]
+        next_due = scheduled_time + interval
+        now = self.clock()
+        if now - next_due >= interval:
+            # Mehr als eine Periode im Rückstand: verpasste Termine im Raster überspringen
+            next_due += math.floor((now - next_due) / interval) * interval
+        self._push(next_due, sensor_id)
+        return next_due
+
+    def _push(self, due, sensor_id):
+        # Zähler als Tie-Breaker, damit Sensor-IDs nie verglichen werden müssen
+        self._counter += 1
+        heapq.heappush(self._heap, (due, self._counter, sensor_id))
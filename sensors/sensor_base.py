@@ -3,13 +3,43 @@ import logging
 
 class SensorBase(ABC):
     """Base class for all RS485 sensors"""
+
+    # Register, die der Sensor pro Messung braucht (RegisterRead-Einträge).
+    # Werden beim Start zu möglichst wenigen FC03-Anfragen zusammengefasst.
+    REGISTERS = ()
+
+    # Register für die Probe-Anfrage des Circuit Breakers (ein Register)
+    PROBE_REGISTER = 0x0001
     
     def __init__(self, device_id, device_manager):
         self.device_id = device_id
         self.device = device_manager.add_device(device_id)
         self.logger = logging.getLogger(f'Sensor_{self.__class__.__name__}_{device_id}')
+        self.read_plan = device_manager.read_planner.plan(self.REGISTERS)
+
+    def read_data(self):
+        """Liest den Sensor und gibt die aufbereiteten Messwerte zurück (None bei Fehlern)"""
+        return self.process(self.read_registers())
+
+    async def read_data_async(self):
+        """Wie read_data, für den AsyncSensorManager"""
+        return self.process(await self.read_registers_async())
+
+    def read_registers(self):
+        """Liest alle REGISTERS des Sensors und gibt ein Dict Name -> Wert zurück"""
+        return self.device.read_plan(self.read_plan)
+
+    async def read_registers_async(self):
+        return await self.device.read_plan_async(self.read_plan)
+
+    def probe(self, timeout=None):
+        """Günstige Erreichbarkeitsprüfung mit einer Ein-Register-Anfrage"""
+        return self.device.probe(self.PROBE_REGISTER, timeout)
+
+    async def probe_async(self, timeout=None):
+        return await self.device.probe_async(self.PROBE_REGISTER, timeout)
         
     @abstractmethod
-    def read_data(self):
-        """Read sensor data - must be implemented by each sensor"""
-        pass
\ No newline at end of file
+    def process(self, values):
+        """Process the register values from read_registers - must be implemented by each sensor"""
+        pass
@@ -5,14 +5,29 @@ import logging
 from dotenv import load_dotenv
 from tb_gateway_mqtt import TBDeviceMqttClient
 from modbus_manager import DeviceManager
-from .ph_sensor import PHSensor
-from .turbidity_sensor import TurbiditySensor
-from .flow_sensor import FlowSensor
+from bus_config import bus_configs
+from adaptive_timeout import AdaptiveTimeouts
+from .sensor_profile import SensorProfile, ProfileSensor, DEFAULT_PROFILE_DIR
 from .radar_sensor import RadarSensor
-from queue import Queue
-from threading import Lock
+from .bus_worker import BusWorker, URGENT
+from .circuit_breaker import CircuitBreakerRegistry, OPEN, HALF_OPEN
+from telemetry.publisher import TelemetryPublisher
+from telemetry.store import TelemetryStore
+from telemetry.payload import SensorPayload
+from telemetry.deadband import DeadbandFilter
+from telemetry.aggregation import SampleAggregator
 
 class SensorManager:
+    # Transport und Abfrage-Worker pro Bus (AsyncSensorManager tauscht beide aus)
+    DEVICE_MANAGER_CLASS = DeviceManager
+    BUS_WORKER_CLASS = BusWorker
+
+    # Sensortypen, die über die Register ihres Profils hinaus Werte berechnen;
+    # alle anderen Typen kommen ohne Code allein aus config/profiles aus
+    SENSOR_EXTENSIONS = {
+        'radar': RadarSensor
+    }
+
     def __init__(self, config_path='config/sensors.json'):
         # Load environment variables
         load_dotenv(dotenv_path='/etc/owipex/.envRS485')
@@ -29,46 +44,85 @@ class SensorManager:
         # Load configuration
         with open(config_path, 'r') as f:
             self.config = json.load(f)
+
+        # Sensortypen aus den Registerprofilen (ein JSON pro Typ)
+        self.profiles = SensorProfile.load_all(self.config.get('profiles_dir', DEFAULT_PROFILE_DIR))
+        self.logger.info(f"Sensorprofile geladen: {', '.join(self.profiles) or 'keine'}")
         
-        # Initialize Modbus connection with settings from config
-        rs485_settings = self.config.get('rs485_settings', {})
-        self.logger.info("Stelle Modbus-Verbindung her...")
-        self.dev_manager = DeviceManager(
-            port=rs485_settings.get('port', '/dev/ttyS0'),
-            baudrate=rs485_settings.get('baudrate', 9600),
-            parity=rs485_settings.get('parity', 'N'),
-            stopbits=rs485_settings.get('stopbits', 1),
-            bytesize=rs485_settings.get('bytesize', 8),
-            timeout=rs485_settings.get('timeout', 1)
+        # Circuit Breaker pro Sensor, Zustand übersteht Neustarts
+        breaker_settings = dict(self.config.get('circuit_breaker', {}))
+        self.breakers = CircuitBreakerRegistry(
+            state_file=breaker_settings.pop('state_file', None),
+            **breaker_settings
         )
-        
-        # RS485 Bus Management
-        self.bus_lock = Lock()
-        self.last_communication_time = 0
-        self.DEBOUNCE_TIME = 0.5  # 500ms Mindestabstand zwischen Kommunikationen
-        
-        # Sensor Reading Queue
-        self.read_queue = Queue()
-        
-        # Load sensor configuration
-        self.sensors = self.load_sensors(self.config.get('sensors', []))
+
+        # Ein Abfrage-Thread pro RS485-Bus, alle Busse teilen die Telemetrie-Pipeline
+        self.buses = []
+        self.sensors = {}
+        for bus_config in bus_configs(self.config):
+            bus = self.create_bus(bus_config)
+            self.buses.append(bus)
+            self.sensors.update(bus.sensors)
+        self.logger.info(f"Insgesamt {len(self.sensors)} Sensoren auf {len(self.buses)} Bus(sen) geladen")
         
         # Initialize ThingsBoard connection
         self.client = None
         self.running = False
-        self.last_read_times = {}
-        self.READ_INTERVAL = int(os.environ.get('RS485_READ_INTERVAL', 15))
-        self.logger.info(f"Read Interval: {self.READ_INTERVAL} Sekunden")
 
-    def load_sensors(self, sensor_configs):
+        # Telemetrie-Versand im Hintergrund, damit MQTT die Bus-Abfrage nie blockiert
+        telemetry_settings = self.config.get('telemetry', {})
+        store_settings = telemetry_settings.get('store')
+        self.telemetry_store = None
+        if store_settings:
+            # Store-and-Forward: Telemetrie übersteht Verbindungsausfälle und Neustarts
+            self.telemetry_store = TelemetryStore(
+                store_settings.get('path', 'data/telemetry_queue.db'),
+                max_entries=store_settings.get('max_entries', 100000),
+                max_bytes=store_settings.get('max_bytes', 50 * 1024 * 1024),
+                synchronous=store_settings.get('synchronous', 'NORMAL')
+            )
+        self.publisher = TelemetryPublisher(
+            max_queue_size=telemetry_settings.get('queue_size', 1000),
+            overflow_policy=telemetry_settings.get('overflow_policy', 'drop_oldest'),
+            max_retries=telemetry_settings.get('max_retries', 3),
+            retry_delay=telemetry_settings.get('retry_delay', 1.0),
+            batch_size=telemetry_settings.get('batch_size', 1),
+            batch_interval=telemetry_settings.get('batch_interval', 0.0),
+            store=self.telemetry_store,
+            drain_rate=telemetry_settings.get('drain_rate', 0.0),
+            ack_timeout=telemetry_settings.get('ack_timeout', 10.0)
+        )
+        self.METRICS_INTERVAL = telemetry_settings.get('metrics_interval', 60)
+        self.last_metrics_time = time.monotonic()
+
+    def create_bus(self, bus_config):
+        """Öffnet einen RS485-Bus und lädt seine Sensoren"""
+        rs485_settings = bus_config['rs485_settings']
+        self.logger.info(f"Stelle Modbus-Verbindung her: Bus {bus_config['name']} ({rs485_settings['port']})")
+        dev_manager = self.DEVICE_MANAGER_CLASS(
+            port=rs485_settings['port'],
+            baudrate=rs485_settings.get('baudrate', 9600),
+            parity=rs485_settings.get('parity', 'N'),
+            stopbits=rs485_settings.get('stopbits', 1),
+            bytesize=rs485_settings.get('bytesize', 8),
+            timeout=rs485_settings.get('timeout', 1),
+            max_register_gap=rs485_settings.get('max_register_gap', 2),
+            cache_max_age=rs485_settings.get('cache_max_age'),
+            adaptive_timeouts=AdaptiveTimeouts.from_config(
+                rs485_settings.get('adaptive_timeout'), rs485_settings.get('timeout', 1), bus_config['name'])
+        )
+        bus = self.BUS_WORKER_CLASS(bus_config['name'], dev_manager, self.poll_sensor)
+        for sensor_id, sensor_info in self.load_sensors(bus_config['sensors'], dev_manager).items():
+            if sensor_id in self.sensors:
+                self.logger.warning(f"Sensor-ID {sensor_id} ist mehrfach konfiguriert - ignoriere Bus {bus.name}")
+                continue
+            bus.add_sensor(sensor_id, sensor_info)
+        bus.schedule()
+        return bus
+
+    def load_sensors(self, sensor_configs, dev_manager):
         """Load sensor configuration from config"""
         sensors = {}
-        sensor_classes = {
-            'ph': PHSensor,
-            'turbidity': TurbiditySensor,
-            'flow': FlowSensor,
-            'radar': RadarSensor
-        }
         
         for sensor_config in sensor_configs:
             sensor_type = sensor_config['type']
@@ -77,22 +131,29 @@ class SensorManager:
             
             self.logger.info(f"Konfiguriere Sensor: {sensor_id} (Typ: {sensor_type}, Device ID: {device_id})")
             
-            if sensor_type in sensor_classes:
-                sensor_class = sensor_classes[sensor_type]
+            if sensor_type in self.profiles:
+                sensor_class = self.SENSOR_EXTENSIONS.get(sensor_type, ProfileSensor)
                 sensor = sensor_class(
                     device_id=device_id,
-                    device_manager=self.dev_manager
+                    device_manager=dev_manager,
+                    profile=self.profiles[sensor_type]
                 )
+                transmission = sensor_config['transmission']
+                aggregator = SampleAggregator.from_config(transmission)
                 sensors[sensor_id] = {
                     'sensor': sensor,
                     'config': sensor_config,
-                    'last_read': 0
+                    'payload': SensorPayload(sensor_id, sensor_config),
+                    # Kennzahlen des Oversamplings nutzen das Band ihres Messwerts
+                    'deadband': DeadbandFilter.from_config(
+                        transmission, aggregator.band_key if aggregator is not None else None),
+                    'aggregator': aggregator,
+                    'breaker': self.breakers.get(sensor_id)
                 }
                 self.logger.info(f"Sensor {sensor_id} erfolgreich initialisiert")
             else:
-                self.logger.warning(f"Unbekannter Sensor-Typ: {sensor_type}")
+                self.logger.warning(f"Unbekannter Sensor-Typ (kein Profil): {sensor_type}")
         
-        self.logger.info(f"Insgesamt {len(sensors)} Sensoren geladen")
         return sensors
 
     def connect_to_server(self):
@@ -108,197 +169,217 @@ class SensorManager:
         self.logger.info(f"Verbinde mit ThingsBoard Server: {server}:{port}")
         self.client = TBDeviceMqttClient(server, port, access_token)
         self.client.connect()
+        self.publisher.client = self.client
         self.logger.info("Erfolgreich mit ThingsBoard verbunden")
+        self.send_static_attributes()
 
-    def format_sensor_data(self, sensor_id, sensor_info, sensor_data):
-        """Format sensor data according to configuration"""
-        config = sensor_info['config']
-        formats = config['transmission']['formats']
-        formatted_data = {}
-
-        if 'simple' in formats:
-            # Einfaches Format (key-value Paare)
-            formatted_data['simple'] = {
-                f"{sensor_id}_{k}": v for k, v in sensor_data.items()
-            }
-
-        if 'json' in formats:
-            # JSON Format mit Metadaten
-            formatted_data['json'] = {
-                f"{sensor_id}_data": {
-                    "info": {
-                        "name": config['name'],
-                        "location": config['location'],
-                        "type": config['type'],
-                        "device_id": config['device_id']
-                    },
-                    "metadata": config['metadata'],
-                    "measurements": sensor_data,
-                    "timestamp": int(time.time() * 1000),
-                    "status": "active"
-                }
-            }
-
-        return formatted_data
-
-    def should_read_sensor(self, sensor_info):
-        """Check if sensor should be read based on its interval"""
-        current_time = time.time()
-        interval = sensor_info['config']['transmission']['interval']
-        last_read = sensor_info['last_read']
-        
-        return (current_time - last_read) >= interval
+    def send_static_attributes(self):
+        """Sendet statische Sensor-Metadaten einmalig als ThingsBoard-Attribute"""
+        attributes = {}
+        for sensor_info in self.sensors.values():
+            payload = sensor_info['payload']
+            if payload.metadata_as_attributes:
+                attributes.update(payload.attributes)
+        if attributes:
+            try:
+                self.client.send_attributes(attributes)
+                self.logger.info(f"Statische Metadaten für {len(attributes)} Sensoren als Attribute gesendet")
+            except Exception as e:
+                self.logger.error(f"Fehler beim Senden der Sensor-Attribute: {e}")
 
-    def wait_for_bus(self):
-        """Wartet bis der RS485-Bus verfügbar ist"""
-        with self.bus_lock:
-            current_time = time.time()
-            time_since_last = current_time - self.last_communication_time
-            
-            if time_since_last < self.DEBOUNCE_TIME:
-                wait_time = self.DEBOUNCE_TIME - time_since_last
-                time.sleep(wait_time)
-            
-            self.last_communication_time = time.time()
+    def format_sensor_data(self, sensor_id, sensor_info, sensor_data, timestamp=None):
+        """Format sensor data according to configuration"""
+        if timestamp is None:
+            timestamp = int(time.time() * 1000)
+        # Schlüssel und statische Felder sind beim Laden vorkompiliert (SensorPayload)
+        return sensor_info['payload'].format(sensor_data, timestamp)
 
     def read_sensor_data(self, sensor_id, sensor_info):
         """Liest Daten von einem Sensor mit Bus-Management"""
         try:
-            self.wait_for_bus()  # Warte auf Bus-Verfügbarkeit
+            # Warte auf die gerätespezifische Ruhezeit
+            sensor_info['bus'].wait_for_bus(sensor_info['config'].get('quiet_time', 0.0))
             
             sensor = sensor_info['sensor']
-            sensor_data = sensor.read_data()
-            
-            if sensor_data:
-                self.logger.debug(f"Sensor {sensor_id} erfolgreich gelesen: {sensor_data}")
-                return sensor_data
-            else:
-                self.logger.error(f"Keine Daten von Sensor {sensor_id} erhalten")
-                return None
+            return self.check_sensor_data(sensor_id, sensor.read_data())
                 
         except Exception as e:
             self.logger.error(f"Fehler beim Lesen von Sensor {sensor_id}: {e}")
             return None
 
+    def request_read(self, sensor_id, priority=URGENT):
+        """Außerplanmäßige Abfrage eines Sensors über seinen Bus-Owner (z.B. aus RPC-Handlern).
+
+        Gibt ein concurrent.futures.Future zurück; die Abfrage überholt die
+        geplanten Abfragen des Busses, die Telemetrie läuft wie gewohnt.
+        """
+        sensor_info = self.sensors[sensor_id]
+        return sensor_info['bus'].submit_poll(sensor_id, priority=priority)
+
+    def check_sensor_data(self, sensor_id, sensor_data):
+        if sensor_data:
+            self.logger.debug(f"Sensor {sensor_id} erfolgreich gelesen: {sensor_data}")
+            return sensor_data
+        self.logger.error(f"Keine Daten von Sensor {sensor_id} erhalten")
+        return None
+
     def run(self):
         """Main run loop"""
         self.logger.info("Starte SensorManager...")
         self.running = True
-        error_counts = {}  # Zähler für Fehler pro Sensor
+        self.publisher.start()
+        for bus in self.buses:
+            bus.start()
         
+        # Die Busse werden in eigenen Threads abgefragt, hier nur Housekeeping
         while self.running:
-            current_time = time.time()
-            
-            # Sammle alle Sensoren die gelesen werden müssen
-            sensors_to_read = [
-                (sensor_id, sensor_info)
-                for sensor_id, sensor_info in self.sensors.items()
-                if self.should_read_sensor(sensor_info)
-            ]
-            
-            # Verarbeite jeden Sensor mit Fehlerbehandlung
-            for sensor_id, sensor_info in sensors_to_read:
-                try:
-                    # Prüfe ob Sensor zu oft fehlgeschlagen ist
-                    if error_counts.get(sensor_id, 0) >= 5:
-                        if current_time - sensor_info.get('last_error_log', 0) > 300:  # Alle 5 Minuten loggen
-                            self.logger.warning(f"Sensor {sensor_id} temporär deaktiviert wegen zu vieler Fehler")
-                            sensor_info['last_error_log'] = current_time
-                        continue
-                    
-                    # Warte zwischen den Sensor-Abfragen
-                    time.sleep(0.5)
-                    
-                    self.logger.debug(f"Lese Sensor {sensor_id}...")
-                    sensor_data = self.read_sensor_data(sensor_id, sensor_info)
-                    
-                    if sensor_data:
-                        # Erfolgreicher Read - Reset Error Counter
-                        error_counts[sensor_id] = 0
-                        
-                        # Format and send data
-                        formatted_data = self.format_sensor_data(sensor_id, sensor_info, sensor_data)
-                        self.send_telemetry(formatted_data)
-                        sensor_info['last_read'] = current_time
-                        
-                        # Warte nach erfolgreicher Übertragung
-                        time.sleep(0.2)
-                    else:
-                        # Erhöhe Fehlerzähler bei None-Rückgabe
-                        error_counts[sensor_id] = error_counts.get(sensor_id, 0) + 1
-                        self.logger.warning(f"Keine Daten von Sensor {sensor_id} erhalten (Fehler: {error_counts[sensor_id]})")
-                    
-                except Exception as e:
-                    # Fehlerbehandlung für einzelne Sensoren
-                    error_counts[sensor_id] = error_counts.get(sensor_id, 0) + 1
-                    self.logger.error(f"Fehler beim Lesen von Sensor {sensor_id} (Fehler: {error_counts[sensor_id]}): {e}")
-                    
-                    # Sende Fehlerstatus an ThingsBoard wenn möglich
-                    try:
-                        error_telemetry = {
-                            "simple": {
-                                f"{sensor_id}_error": str(e),
-                                f"{sensor_id}_error_count": error_counts[sensor_id]
-                            }
-                        }
-                        self.send_telemetry(error_telemetry)
-                    except:
-                        pass  # Ignoriere Fehler beim Senden des Fehlerstatus
-                    
-                    continue
-                
-                # Prüfe ob Sensor sich erholt hat
-                if error_counts.get(sensor_id, 0) > 0 and sensor_data:
-                    self.logger.info(f"Sensor {sensor_id} hat sich erholt nach {error_counts[sensor_id]} Fehlern")
-                    error_counts[sensor_id] = 0
-            
-            # Automatische Reaktivierung von Sensoren nach einer Stunde
-            for sensor_id in list(error_counts.keys()):
-                if error_counts[sensor_id] >= 5:
-                    sensor_info = self.sensors.get(sensor_id)
-                    if sensor_info and (current_time - sensor_info.get('last_read', 0)) > 3600:
-                        self.logger.info(f"Versuche Sensor {sensor_id} nach einer Stunde zu reaktivieren")
-                        error_counts[sensor_id] = 0
-            
-            # Längere Pause am Ende eines Durchlaufs
+            if time.monotonic() - self.last_metrics_time >= self.METRICS_INTERVAL:
+                self.send_publisher_metrics()
             time.sleep(1.0)
 
-    def send_telemetry(self, data):
-        """Send telemetry data to ThingsBoard with retry"""
-        if not self.client or not data:
+    def poll_sensor(self, sensor_id, sensor_info, scheduled_time):
+        """Liest einen fälligen Sensor und sendet die Telemetrie"""
+        breaker = sensor_info['breaker']
+        previous_state = (breaker.state, breaker.open_count)
+
+        # Abgelaufenes Oversampling-Intervall abschließen, auch wenn der Sensor übersprungen wird
+        self.publish_window(sensor_id, sensor_info, scheduled_time)
+
+        # Offener Circuit Breaker: Sensor überspringen, die Buszeit bleibt für gesunde Sensoren
+        state = breaker.before_call()
+        if state is None:
+            return
+
+        try:
+            if state == HALF_OPEN:
+                self.logger.info(f"Sensor {sensor_id}: Probe-Anfrage nach Backoff")
+                if not sensor_info['sensor'].probe():
+                    breaker.record_failure()
+                    return
+            
+            self.logger.debug(f"Lese Sensor {sensor_id}...")
+            sensor_data = self.read_sensor_data(sensor_id, sensor_info)
+            self.handle_sensor_data(sensor_id, sensor_info, sensor_data, scheduled_time)
+        except Exception as e:
+            self.handle_sensor_error(sensor_id, breaker, e)
+        finally:
+            if (breaker.state, breaker.open_count) != previous_state:
+                self.report_breaker_state(sensor_id, breaker)
+
+    def handle_sensor_data(self, sensor_id, sensor_info, sensor_data, scheduled_time):
+        """Wertet das Ergebnis einer Sensorabfrage aus (Circuit Breaker, Oversampling, Deadband, Versand)"""
+        breaker = sensor_info['breaker']
+        acquired_at = int(time.time() * 1000)
+
+        # Oversampling: einzelne Abfragen werden gesammelt, gesendet wird die Statistik pro Intervall
+        aggregator = sensor_info['aggregator']
+
+        if sensor_data:
+            # Prüfe ob Sensor sich erholt hat
+            if breaker.failures > 0:
+                self.logger.info(f"Sensor {sensor_id} hat sich erholt nach {breaker.failures} Fehlern")
+            breaker.record_success()
+
+            if aggregator is not None:
+                aggregator.add(sensor_data, acquired_at)
+            else:
+                self.publish_sensor_data(sensor_id, sensor_info, sensor_data, acquired_at)
+        else:
+            if aggregator is not None:
+                aggregator.add_failure()
+            breaker.record_failure()
+            self.logger.warning(f"Keine Daten von Sensor {sensor_id} erhalten (Fehler: {breaker.failures})")
+
+    def publish_window(self, sensor_id, sensor_info, scheduled_time):
+        """Sendet die Statistik eines abgelaufenen Oversampling-Intervalls mit dem Zeitstempel seiner letzten Abfrage"""
+        aggregator = sensor_info['aggregator']
+        if aggregator is None:
             return
+        window = aggregator.collect(scheduled_time)
+        if window is not None:
+            summary, acquired_at = window
+            self.publish_sensor_data(sensor_id, sensor_info, summary, acquired_at)
+
+    def publish_sensor_data(self, sensor_id, sensor_info, sensor_data, acquired_at):
+        """Deadband anwenden, formatieren und in die Sende-Queue einstellen"""
+        # Report-by-Exception: nur geänderte Werte oder abgelaufene Heartbeats senden
+        deadband = sensor_info['deadband']
+        if deadband is not None:
+            sensor_data = deadband.filter(sensor_data)
 
-        max_retries = 3
-        retry_delay = 1.0  # Sekunden
+        if sensor_data:
+            formatted_data = self.format_sensor_data(sensor_id, sensor_info, sensor_data, acquired_at)
+            self.send_telemetry(formatted_data, key=sensor_id, ts=acquired_at)
+        else:
+            self.logger.debug(f"Sensor {sensor_id}: keine Änderung außerhalb der Deadband")
+
+    def handle_sensor_error(self, sensor_id, breaker, error):
+        """Fehlerbehandlung für einzelne Sensoren"""
+        breaker.record_failure()
+        self.logger.error(f"Fehler beim Lesen von Sensor {sensor_id} (Fehler: {breaker.failures}): {error}")
         
-        for attempt in range(max_retries):
-            try:
-                # Sende Simple-Format Daten
-                if data.get("simple"):
-                    self.client.send_telemetry(data["simple"])
-                    self.logger.debug("Simple format Telemetrie erfolgreich gesendet")
-                    
-                # Sende JSON-Format Daten - jetzt einzeln pro Sensor
-                if data.get("json"):
-                    for sensor_data_key, sensor_data in data["json"].items():
-                        self.client.send_telemetry({
-                            sensor_data_key: sensor_data
-                        })
-                        self.logger.debug(f"JSON format Telemetrie für {sensor_data_key} erfolgreich gesendet")
-                
-                return  # Erfolgreich gesendet, verlasse die Funktion
-                
-            except Exception as e:
-                if attempt < max_retries - 1:
-                    self.logger.warning(f"Fehler beim Senden der Telemetrie (Versuch {attempt + 1}): {e}")
-                    time.sleep(retry_delay)
-                else:
-                    self.logger.error(f"Fehler beim Senden der Telemetrie nach {max_retries} Versuchen: {e}")
+        # Sende Fehlerstatus an ThingsBoard wenn möglich
+        try:
+            error_telemetry = {
+                "simple": {
+                    f"{sensor_id}_error": str(error),
+                    f"{sensor_id}_error_count": breaker.failures
+                }
+            }
+            self.send_telemetry(error_telemetry, key=f"{sensor_id}_error")
+        except:
+            pass  # Ignoriere Fehler beim Senden des Fehlerstatus
+
+    def report_breaker_state(self, sensor_id, breaker):
+        """Speichert den Circuit-Breaker-Zustand und sendet ihn als Telemetrie"""
+        if breaker.state == OPEN:
+            self.logger.warning(f"Sensor {sensor_id}: Circuit Breaker offen nach {breaker.failures} Fehlern, "
+                                f"nächste Probe in {breaker.retry_in():.0f} s")
+        else:
+            self.logger.info(f"Sensor {sensor_id}: Circuit Breaker {breaker.state}")
+        self.breakers.save()
+        self.send_telemetry({
+            "simple": {
+                f"{sensor_id}_breaker_state": breaker.state,
+                f"{sensor_id}_breaker_retry_in": round(breaker.retry_in())
+            }
+        }, key=f"{sensor_id}_breaker")
+
+    def send_telemetry(self, data, key=None, ts=None):
+        """Stellt Telemetrie in die Sende-Queue ein (blockiert nicht)"""
+        if not self.client or not data:
+            return
+        self.publisher.publish(data, key=key, ts=ts)
+
+    def send_publisher_metrics(self):
+        """Sendet Queue-Tiefe und Versandlatenz des Publishers als Telemetrie"""
+        self.last_metrics_time = time.monotonic()
+        metrics = self.publisher.metrics()
+        self.logger.debug(f"Publisher-Metriken: {metrics}")
+        self.send_telemetry({"simple": metrics}, key='publisher_metrics')
+        self.send_bus_diagnostics()
+
+    def send_bus_diagnostics(self):
+        """Sendet Modbus-Fehlerzähler, gelernte Timeouts und Registerqualität pro Bus als Telemetrie"""
+        for bus in self.buses:
+            diagnostics = bus.dev_manager.diagnostics()
+            if bus.dev_manager.adaptive_timeouts is not None:
+                bus.dev_manager.adaptive_timeouts.save()
+            if diagnostics['errors'] or diagnostics.get('timeouts') or diagnostics.get('register_quality'):
+                self.send_telemetry({"simple": {f"modbus_{bus.name}_diagnostics": diagnostics}},
+                                    key=f"modbus_{bus.name}_diagnostics")
                 
     def stop(self):
         """Stop the sensor manager"""
         self.logger.info("Stoppe SensorManager...")
         self.running = False
+        for bus in self.buses:
+            bus.stop()
+            if bus.dev_manager.adaptive_timeouts is not None:
+                bus.dev_manager.adaptive_timeouts.save()
+        self.publisher.stop()
+        if self.telemetry_store:
+            self.telemetry_store.close()
         if self.client:
             self.client.disconnect()
         self.logger.info("SensorManager gestoppt")
\ No newline at end of file
@@ -0,0 +1,121 @@
+import os
+import json
+import logging
+from read_planner import RegisterRead
+from modbus_manager import DATA_TYPES, BYTE_ORDERS
+from .sensor_base import SensorBase
+
+DEFAULT_PROFILE_DIR = 'config/profiles'
+
+class ProfileField:
+    """Ein Messwert des Profils mit Skalierung"""
+
+    def __init__(self, spec):
+        self.name = spec['name']
+        self.scale = spec.get('scale', 1)
+        self.offset = spec.get('offset', 0)
+        self.decimals = spec.get('decimals')
+        # Felder mit "default" sind optional, alle anderen Pflicht
+        self.required = 'default' not in spec
+        self.default = spec.get('default')
+
+    def convert(self, raw):
+        value = raw * self.scale + self.offset if (self.scale != 1 or self.offset) else raw
+        return round(value, self.decimals) if self.decimals is not None else value
+
+class SensorProfile:
+    """Deklarative Registerbeschreibung eines Sensortyps (config/profiles/<typ>.json)::
+
+        {
+          "name": "PH-Sensor",
+          "probe_register": "0x0001",
+          "registers": [
+            {"name": "ph_value", "address": "0x0001", "type": "float32", "byte_order": "CDAB"},
+            {"name": "temperature", "address": "0x0003", "type": "float32", "byte_order": "CDAB",
+             "scale": 1, "offset": 0, "decimals": 2}
+          ]
+        }
+
+    ``type`` ist einer aus modbus_manager.DATA_TYPES, ``byte_order`` einer aus
+    BYTE_ORDERS (Standard ABCD; ``"word_swap": true`` gilt als CDAB).
+    ``scale``/``offset`` rechnen den Rohwert um (Rohwert x scale + offset),
+    ``decimals`` rundet. Ein Feld mit ``default`` ist optional: fehlt sein Wert,
+    wird der Default gesendet statt die ganze Messung zu verwerfen.
+    """
+
+    def __init__(self, sensor_type, spec):
+        self.sensor_type = sensor_type
+        self.name = spec.get('name', sensor_type)
+        self.probe_register = int(str(spec.get('probe_register', SensorBase.PROBE_REGISTER)), 0)
+        self.registers = []
+        self.fields = []
+        for register in spec['registers']:
+            data_type = register.get('type', 'uint16')
+            byte_order = register.get('byte_order', 'CDAB' if register.get('word_swap') else 'ABCD').upper()
+            if data_type not in DATA_TYPES:
+                raise ValueError(f"Profil {sensor_type}: unbekannter Datentyp {data_type} für {register['name']}")
+            if byte_order not in BYTE_ORDERS:
+                raise ValueError(f"Profil {sensor_type}: unbekannte Byte-Reihenfolge {byte_order} für {register['name']}")
+            self.registers.append(RegisterRead(
+                register['name'], int(str(register['address']), 0), DATA_TYPES[data_type][1], data_type, byte_order
+            ))
+            self.fields.append(ProfileField(register))
+        self.registers = tuple(self.registers)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            spec = json.load(f)
+        return cls(os.path.splitext(os.path.basename(path))[0], spec)
+
+    @classmethod
+    def load_all(cls, directory=DEFAULT_PROFILE_DIR):
+        """Lädt alle Profile eines Verzeichnisses, Schlüssel ist der Dateiname (= Sensortyp)"""
+        profiles = {}
+        logger = logging.getLogger('SensorProfile')
+        if not os.path.isdir(directory):
+            logger.warning(f"Profilverzeichnis {directory} nicht gefunden")
+            return profiles
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                profile = cls.load(os.path.join(directory, filename))
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"Profil {filename} fehlerhaft, wird ignoriert: {e}")
+                continue
+            profiles[profile.sensor_type] = profile
+        return profiles
+
+class ProfileSensor(SensorBase):
+    """Sensor, dessen Register und Umrechnung vollständig aus einem SensorProfile stammen.
+
+    Der ReadPlanner fasst die Register beim Start zu Blöcken zusammen, jeder
+    Block dekodiert seine Antwort mit einem vorkompilierten struct.Struct.
+    """
+
+    def __init__(self, device_id, device_manager, profile):
+        self.profile = profile
+        self.REGISTERS = profile.registers
+        self.PROBE_REGISTER = profile.probe_register
+        super().__init__(device_id, device_manager)
+        self.logger = logging.getLogger(f'Sensor_{profile.sensor_type}_{device_id}')
+
+    def process(self, values):
+        """Rechnet die Rohwerte laut Profil um (None, wenn ein Pflichtwert fehlt)"""
+        try:
+            result = {}
+            for field in self.profile.fields:
+                raw = values.get(field.name)
+                if raw is None:
+                    if field.required:
+                        self.logger.error(f"Fehler beim Lesen von {field.name} von Gerät {self.device_id}")
+                        return None
+                    result[field.name] = field.default
+                    continue
+                result[field.name] = field.convert(raw)
+            self.logger.debug(f"{self.profile.name} {self.device_id}: {result}")
+            return result
+        except Exception as e:
+            self.logger.error(f"Fehler beim Verarbeiten von {self.profile.name} (ID: {self.device_id}): {e}")
+            return None
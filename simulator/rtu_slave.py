@@ -0,0 +1,352 @@
+# -----------------------------------------------------------------------------
+# Company: KARIM Technologies
+# Author: Sayed Amir Karim
+# Copyright: 2024 KARIM Technologies
+#
+# License: All Rights Reserved
+#
+# Module: RTU Slave Simulator V0.2
+# Description: Pty-basierter Modbus-RTU-Slave für Tests und Benchmarks ohne Hardware
+#
+# Beispiel (Port wird ausgegeben und kann an DeviceManager/RS485Scanner übergeben werden):
+#   python -m simulator.rtu_slave --device 1:radar --device 2:turbidity --device 40:flow
+# -----------------------------------------------------------------------------
+
+import os
+import tty
+import termios
+import math
+import time
+import struct
+import select
+import logging
+import argparse
+import threading
+from modbus_crc import crc16
+
+logger = logging.getLogger('RtuSlaveSimulator')
+
+# --- Wertverläufe ------------------------------------------------------------
+# Ein Verlauf ist eine Funktion der Zeit seit Simulationsstart (Sekunden).
+
+def constant(value):
+    return lambda t: value
+
+def sine(offset, amplitude, period):
+    return lambda t: offset + amplitude * math.sin(2 * math.pi * t / period)
+
+def ramp(start, slope, minimum=None, maximum=None):
+    def curve(t):
+        value = start + slope * t
+        if minimum is not None:
+            value = max(minimum, value)
+        if maximum is not None:
+            value = min(maximum, value)
+        return value
+    return curve
+
+def sequence(values, step):
+    """Durchläuft ``values`` zyklisch, jeder Wert gilt ``step`` Sekunden"""
+    values = list(values)
+    return lambda t: values[int(t / step) % len(values)]
+
+def as_curve(value):
+    return value if callable(value) else constant(value)
+
+# --- Registerkodierung -------------------------------------------------------
+
+def encode_uint16(value):
+    return (int(value) & 0xFFFF,)
+
+def encode_float_abcd(value):
+    return struct.unpack('>HH', struct.pack('>f', value))
+
+def encode_float_cdab(value):
+    high, low = struct.unpack('>HH', struct.pack('>f', value))
+    return low, high
+
+ENCODERS = {
+    'uint16': (1, encode_uint16),
+    'float_abcd': (2, encode_float_abcd),
+    'float_cdab': (2, encode_float_cdab),
+}
+
+# Registerlayouts unserer Geräte: Profil -> [(Name, Adresse, Kodierung, Standardwert)]
+PROFILES = {
+    # VEGAPULS Radar: Luftstrecke in mm als U16
+    'radar': [
+        ('status', 0x0000, 'uint16', 0),
+        ('measured_air_distance', 0x0001, 'uint16', 3000),
+    ],
+    # pH- und Trübungssonden: Float-Paare mit Wort-Tausch
+    'ph': [
+        ('ph_value', 0x0001, 'float_cdab', 7.0),
+        ('temperature', 0x0003, 'float_cdab', 20.0),
+    ],
+    'turbidity': [
+        ('turbidity', 0x0001, 'float_cdab', 10.0),
+        ('temperature', 0x0003, 'float_cdab', 20.0),
+    ],
+    # FT10 Durchflusssensor: Floats ohne Wort-Tausch. 0x0003-0x0004 sind nicht
+    # belegt - Anfragen darüber beantwortet der Simulator mit Exception 0x02
+    'flow': [
+        ('flow_rate', 0x0001, 'float_abcd', 0.0),
+        ('velocity', 0x0005, 'float_abcd', 0.0),
+        ('total_flow', 0x0009, 'float_abcd', 0.0),
+    ],
+}
+
+# Adressregister der Geräte (siehe device_config/*_sensor_config.py)
+ADDRESS_REGISTERS = {
+    'radar': 0x2006,
+    'ph': 0x0019,
+    'turbidity': 0x0019,
+    'flow': 0x0062,
+}
+
+class SimulatedDevice:
+    """Registerabbild eines simulierten Geräts.
+
+    Statische Register stehen in ``registers``; Felder aus einem Profil liefern
+    ihre Werte zum Anfragezeitpunkt aus einem Wertverlauf. ``online = False``
+    lässt das Gerät verstummen (z.B. für Circuit-Breaker-Tests),
+    ``exception_code`` beantwortet jede Anfrage mit dieser Modbus-Exception und
+    ``reply_as`` antwortet unter einer anderen Slave-ID (Adresskonflikt).
+    """
+
+    def __init__(self, registers=None, fields=(), response_delay=None, address_register=None):
+        self.registers = dict(registers or {})
+        self.fields = {}
+        self.response_delay = response_delay
+        # Register, in dem das Gerät seine eigene Slave-Adresse meldet
+        self.address_register = address_register
+        self.online = True
+        self.exception_code = None
+        self.reply_as = None
+        for name, address, encoding, curve in fields:
+            self.set_field(name, address, encoding, curve)
+
+    @classmethod
+    def from_profile(cls, profile, response_delay=None, **values):
+        """Gerät nach Profil; ``values`` überschreibt Werte/Verläufe einzelner Felder"""
+        fields = [(name, address, encoding, values.get(name, default))
+                  for name, address, encoding, default in PROFILES[profile]]
+        return cls(fields=fields, response_delay=response_delay, address_register=ADDRESS_REGISTERS.get(profile))
+
+    def set_field(self, name, address, encoding, curve):
+        count, encoder = ENCODERS[encoding]
+        self.fields[name] = (address, count, encoder, as_curve(curve))
+
+    def set_value(self, name, curve):
+        address, count, encoder, _ = self.fields[name]
+        self.fields[name] = (address, count, encoder, as_curve(curve))
+
+    def snapshot(self, t):
+        """Aktuelle Registerwerte inklusive aller Felder zum Zeitpunkt t"""
+        registers = dict(self.registers)
+        for address, count, encoder, curve in self.fields.values():
+            for offset, value in enumerate(encoder(curve(t))):
+                registers[address + offset] = value
+        return registers
+
+    def read(self, address, count, t):
+        registers = self.snapshot(t)
+        values = [registers.get(address + offset) for offset in range(count)]
+        return None if None in values else values
+
+    def write(self, address, values):
+        for offset, value in enumerate(values):
+            self.registers[address + offset] = value
+
+class RtuSlaveSimulator:
+    """Emuliert einen oder mehrere Modbus-RTU-Slaves auf einem Pseudo-Terminal.
+
+    ``devices`` bildet Slave-ID auf ``SimulatedDevice`` oder ein einfaches
+    ``{Registeradresse: 16-Bit-Wert}``-Dict ab. ``port`` kann direkt an
+    ``DeviceManager(port=...)`` oder ``RS485Scanner(port)`` übergeben werden.
+    Mit ``byte_pacing`` werden Antworten Byte für Byte im Takt der Baudrate
+    gesendet, wie auf der echten Leitung; Anfragen werden erst nach ihrer
+    Übertragungszeit bearbeitet. Mit ``check_line_settings`` werden
+    Anfragen ignoriert, wenn Baudrate, Parität oder Stoppbits des Masters nicht
+    zu denen des Simulators passen (falsch eingestellter Slave).
+    """
+
+    def __init__(self, devices=None, baudrate=9600, response_delay=0.0, parity='N', stopbits=1,
+                 byte_pacing=True, check_line_settings=False):
+        self.devices = {}
+        for slave_id, device in (devices or {}).items():
+            self.add_device(slave_id, device)
+        self.baudrate = baudrate
+        self.parity = parity
+        self.stopbits = stopbits
+        self.check_line_settings = check_line_settings
+        self.response_delay = response_delay
+        self.char_time = (1 + 8 + (0 if parity == 'N' else 1) + stopbits) / baudrate
+        self.byte_pacing = byte_pacing
+        self.crc16 = crc16
+
+        self.master_fd, self.slave_fd = os.openpty()
+        tty.setraw(self.slave_fd)
+        self.port = os.ttyname(self.slave_fd)
+
+        self.requests_handled = 0
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self._start_time = time.monotonic()
+        self._running = False
+        self._thread = None
+
+    def add_device(self, slave_id, device):
+        if not isinstance(device, SimulatedDevice):
+            device = SimulatedDevice(registers=device)
+        if device.address_register is not None:
+            device.registers.setdefault(device.address_register, slave_id)
+        self.devices[slave_id] = device
+        return device
+
+    def start(self):
+        self._start_time = time.monotonic()
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join()
+        os.close(self.master_fd)
+        os.close(self.slave_fd)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _serve(self):
+        buffer = b''
+        while self._running:
+            ready, _, _ = select.select([self.master_fd], [], [], 0.05)
+            if not ready:
+                # Ruhe auf dem Bus: unvollständige Anfragen verwerfen
+                buffer = b''
+                continue
+            data = os.read(self.master_fd, 256)
+            self.bytes_received += len(data)
+            buffer += data
+
+            request_length = self._request_length(buffer)
+            while request_length and len(buffer) >= request_length:
+                request, buffer = buffer[:request_length], buffer[request_length:]
+                # Das pty liefert die Anfrage sofort - ihre Zeit auf der Leitung wie bei
+                # Antworten nachbilden (Halbduplex: der Bus ist so lange belegt)
+                time.sleep(len(request) * self.char_time)
+                self._handle_request(request)
+                request_length = self._request_length(buffer)
+
+    @staticmethod
+    def _request_length(buffer):
+        if len(buffer) < 2:
+            return None
+        function_code = buffer[1]
+        if function_code in (0x03, 0x04, 0x06):
+            return 8
+        if function_code == 0x10:
+            return 9 + buffer[6] if len(buffer) >= 7 else None
+        # Unbekannter Funktionscode - alles verwerfen
+        return len(buffer)
+
+    def _line_settings_match(self):
+        """Vergleicht die termios-Einstellungen des Masters mit denen des Simulators"""
+        attributes = termios.tcgetattr(self.slave_fd)
+        cflag, ospeed = attributes[2], attributes[5]
+        parity = 'N' if not cflag & termios.PARENB else 'O' if cflag & termios.PARODD else 'E'
+        stopbits = 2 if cflag & termios.CSTOPB else 1
+        return (ospeed == getattr(termios, f'B{self.baudrate}', None)
+                and parity == self.parity and stopbits == self.stopbits)
+
+    def _handle_request(self, request):
+        if self.check_line_settings and not self._line_settings_match():
+            logger.debug(f"Anfrage mit falschen Schnittstellenparametern ignoriert: {request.hex()}")
+            return
+        if struct.unpack('<H', request[-2:])[0] != self.crc16(request[:-2]):
+            logger.debug(f"CRC-Fehler in Anfrage: {request.hex()}")
+            return
+        slave_id, function_code = request[0], request[1]
+        device = self.devices.get(slave_id)
+        if device is None or not device.online:
+            return
+
+        if device.exception_code is not None:
+            payload = struct.pack('>BBB', slave_id, function_code | 0x80, device.exception_code)
+        elif function_code in (0x03, 0x04):
+            address, count = struct.unpack('>HH', request[2:6])
+            values = device.read(address, count, time.monotonic() - self._start_time)
+            if values is None:
+                payload = struct.pack('>BBB', slave_id, function_code | 0x80, 0x02)
+            else:
+                payload = struct.pack(f'>BBB{count}H', slave_id, function_code, count * 2, *values)
+        elif function_code == 0x06:
+            address, value = struct.unpack('>HH', request[2:6])
+            device.write(address, [value])
+            payload = request[:6]
+        elif function_code == 0x10:
+            address, count = struct.unpack('>HH', request[2:6])
+            device.write(address, struct.unpack(f'>{count}H', request[7:7 + count * 2]))
+            payload = request[:6]
+        else:
+            payload = struct.pack('>BBB', slave_id, function_code | 0x80, 0x01)
+
+        if device.reply_as is not None:
+            payload = bytes([device.reply_as]) + payload[1:]
+        response = payload + struct.pack('<H', self.crc16(payload))
+        response_delay = self.response_delay if device.response_delay is None else device.response_delay
+        time.sleep(response_delay)
+        self._transmit(response)
+        self.requests_handled += 1
+
+    def _transmit(self, response):
+        if not self.byte_pacing:
+            time.sleep(len(response) * self.char_time)
+            os.write(self.master_fd, response)
+        else:
+            start = time.monotonic()
+            for index in range(len(response)):
+                delay = start + (index + 1) * self.char_time - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                os.write(self.master_fd, response[index:index + 1])
+        self.bytes_sent += len(response)
+
+def main():
+    parser = argparse.ArgumentParser(description='Modbus-RTU-Slave-Simulator auf einem Pseudo-Terminal')
+    parser.add_argument('--device', action='append', default=[], metavar='ID:PROFIL',
+                        help=f"Gerät hinzufügen, Profile: {', '.join(PROFILES)}")
+    parser.add_argument('--baudrate', type=int, default=9600)
+    parser.add_argument('--parity', choices=('N', 'E', 'O'), default='N')
+    parser.add_argument('--stopbits', type=int, choices=(1, 2), default=1)
+    parser.add_argument('--response-delay', type=float, default=0.005)
+    parser.add_argument('--check-line-settings', action='store_true',
+                        help='Anfragen mit abweichender Baudrate/Parität/Stoppbits ignorieren')
+    args = parser.parse_args()
+
+    devices = {}
+    for spec in args.device or ['1:radar']:
+        slave_id, profile = spec.split(':')
+        devices[int(slave_id)] = SimulatedDevice.from_profile(profile)
+
+    with RtuSlaveSimulator(devices, args.baudrate, args.response_delay, args.parity, args.stopbits,
+                           check_line_settings=args.check_line_settings) as simulator:
+        print(f"Simulator läuft auf {simulator.port} ({args.baudrate} Baud, 8{args.parity}{args.stopbits})")
+        for slave_id, spec in zip(devices, args.device or ['1:radar']):
+            print(f"  Gerät {slave_id}: {spec.split(':')[1]}")
+        print("Ctrl+C zum Beenden")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+# -----------------------------------------------------------------------------
+# Company: KARIM Technologies
+# Author: Sayed Amir Karim
+# Copyright: 2024 KARIM Technologies
+#
+# License: All Rights Reserved
+#
+# Module: Sample Aggregation
+# Description: Oversampling - Sensoren werden häufiger gelesen als gesendet,
+#              pro Sendeintervall geht eine Statistik je Messwert raus
+# -----------------------------------------------------------------------------
+
+import math
+
+STATISTICS = ('mean', 'min', 'max', 'stddev', 'last', 'count')
+# Kennzahlen in der Einheit des Messwerts, sie nutzen dessen Deadband
+VALUE_STATISTICS = ('min', 'max', 'stddev', 'last')
+# Zähler der Zusammenfassung ohne Bezug zu einem Messwert
+COUNTERS = ('sample_count', 'quality_ratio')
+
+class RunningStats:
+    """Laufende Statistik eines Messwerts nach Welford, O(1) Speicher"""
+
+    __slots__ = ('count', 'mean', 'm2', 'min', 'max', 'last')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # Summe der quadrierten Abweichungen vom Mittelwert
+        self.min = None
+        self.max = None
+        self.last = None
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        self.last = value
+
+    @property
+    def stddev(self):
+        """Stichproben-Standardabweichung (0 bei weniger als zwei Werten)"""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+class SampleAggregator:
+    """Fasst die Abfragen eines Sendeintervalls pro Messwert zusammen.
+
+    Konfiguration unter ``transmission`` in config/sensors.json::
+
+        "interval": 20,
+        "oversampling": {
+            "sample_interval": 2,
+            "statistics": ["mean", "min", "max", "stddev", "last", "count"],
+            "decimals": 3
+        }
+
+    Der Sensor wird alle ``sample_interval`` Sekunden gelesen, gesendet wird
+    weiterhin einmal pro ``interval``. Es werden nur die Kennzahlen aus
+    ``statistics`` gesendet. Der Mittelwert behält den Namen des Messwerts
+    (bestehende Dashboards greifen unverändert), die übrigen Kennzahlen
+    bekommen ein Suffix (``turbidity_max``). Dazu kommen
+    ``sample_count`` und ``quality_ratio`` (Anteil erfolgreicher Abfragen im
+    Intervall). Nicht numerische Werte (z.B. Alarme) werden als letzter Wert
+    gesendet. ``decimals`` rundet Mittelwert und Standardabweichung. Intervalle
+    ohne erfolgreiche Abfrage werden nicht gesendet.
+
+    Welches Deadband-Band für eine Kennzahl gilt, bestimmt ``band_key``.
+    """
+
+    def __init__(self, interval, sample_interval, statistics=STATISTICS, decimals=None):
+        unknown = set(statistics) - set(STATISTICS)
+        if unknown:
+            raise ValueError(f"Unbekannte Kennzahlen für Oversampling: {', '.join(sorted(unknown))}")
+        if sample_interval <= 0:
+            raise ValueError(f"sample_interval muss größer als 0 sein: {sample_interval}")
+        self.interval = interval
+        # Seltener als gesendet wird nie abgefragt
+        self.sample_interval = min(sample_interval, interval)
+        self.with_mean = 'mean' in statistics
+        self.statistics = tuple(name for name in statistics if name != 'mean')
+        self.decimals = decimals
+        self._reset(None)
+
+    @classmethod
+    def from_config(cls, transmission):
+        """Erzeugt den Aggregator aus dem transmission-Block oder None, wenn nicht konfiguriert"""
+        settings = transmission.get('oversampling')
+        if not settings:
+            return None
+        return cls(
+            transmission['interval'],
+            settings['sample_interval'],
+            settings.get('statistics', STATISTICS),
+            settings.get('decimals')
+        )
+
+    @staticmethod
+    def band_key(key):
+        """Messwert, dessen Deadband-Band für einen Schlüssel der Zusammenfassung gilt.
+
+        ``turbidity_max`` -> ``turbidity``; None für Zähler (``turbidity_count``,
+        ``sample_count``, ``quality_ratio``), die ohne eigenes Band nur bei
+        Änderung gesendet werden.
+        """
+        if key in COUNTERS:
+            return None
+        base, _, statistic = key.rpartition('_')
+        if base and statistic == 'count':
+            return None
+        if base and statistic in VALUE_STATISTICS:
+            return base
+        return key
+
+    def _reset(self, window_start):
+        self.window_start = window_start
+        self.channels = {}  # Messwert -> RunningStats
+        self.other = {}  # Nicht numerische Messwerte -> letzter Wert
+        self.samples = 0
+        self.failures = 0
+        self.last_acquired_at = None  # Wandzeit (ms) der letzten erfolgreichen Abfrage
+
+    def add(self, sensor_data, acquired_at=None):
+        """Nimmt eine erfolgreiche Abfrage auf, ``acquired_at`` in ms seit Epoch"""
+        self.samples += 1
+        self.last_acquired_at = acquired_at
+        for name, value in sensor_data.items():
+            if value is None or isinstance(value, bool) or not isinstance(value, (int, float)):
+                self.other[name] = value
+                continue
+            stats = self.channels.get(name)
+            if stats is None:
+                stats = self.channels[name] = RunningStats()
+            stats.add(value)
+
+    def add_failure(self):
+        """Zählt eine fehlgeschlagene Abfrage (senkt die quality_ratio)"""
+        self.failures += 1
+
+    def collect(self, now):
+        """Gibt (Statistik, Zeitstempel) des abgelaufenen Intervalls zurück und beginnt ein neues.
+
+        Bei jeder fälligen Abfrage zum Zeitpunkt ``now`` (geplanter Zeitpunkt,
+        monotone Uhr) vor deren Aufnahme aufrufen, auch wenn sie ausfällt. Der
+        Zeitstempel ist der der letzten Abfrage im Intervall, nicht der
+        Versandzeitpunkt. Gibt None zurück, solange das Intervall läuft und wenn
+        es keine erfolgreiche Abfrage enthielt.
+        """
+        if self.window_start is None:
+            self.window_start = now
+            return None
+        # Kleine Toleranz: der Scheduler plant im Raster, Gleitkommafehler dürfen kein Intervall verschieben
+        if now - self.window_start < self.interval - 1e-6:
+            return None
+        # Ohne Abfragen gibt es keine Statistik; Ausfälle meldet der Circuit Breaker
+        window = (self.summary(), self.last_acquired_at) if self.samples else None
+        self._reset(now)
+        return window
+
+    def summary(self):
+        attempts = self.samples + self.failures
+        result = {}
+        for name, stats in self.channels.items():
+            if self.with_mean:
+                result[name] = self._round(stats.mean)
+            for statistic in self.statistics:
+                value = getattr(stats, statistic)
+                result[f"{name}_{statistic}"] = self._round(value) if statistic == 'stddev' else value
+        result.update(self.other)
+        result['sample_count'] = self.samples
+        result['quality_ratio'] = round(self.samples / attempts, 3) if attempts else 0.0
+        return result
+
+    def _round(self, value):
+        return round(value, self.decimals) if self.decimals is not None else value
@@ -0,0 +1,95 @@
+# -----------------------------------------------------------------------------
+# Company: KARIM Technologies
+# Author: Sayed Amir Karim
+# Copyright: 2024 KARIM Technologies
+#
+# License: All Rights Reserved
+#
+# Module: Deadband Filter
+# Description: Report-by-Exception - nur geänderte Messwerte oder Werte mit
+#              abgelaufenem Heartbeat werden gesendet
+# -----------------------------------------------------------------------------
+
+import time
+
+# Band für Zähler ohne eigenes Band: senden, sobald sich der Wert ändert
+CHANGE_ONLY = {'absolute': 0}
+
+class DeadbandFilter:
+    """Deadband-Filter pro Messwert eines Sensors.
+
+    Konfiguration unter ``transmission`` in config/sensors.json::
+
+        "deadband": {
+            "ph_value": {"absolute": 0.02},
+            "temperature": {"absolute": 0.2, "percent": 1.0},
+            "default": {"percent": 0.5}
+        },
+        "heartbeat": 300
+
+    Ein Wert gilt als geändert, wenn die Abweichung zum zuletzt gesendeten Wert
+    eines der konfigurierten Bänder überschreitet. Messwerte ohne eigenes Band
+    nutzen ``default``; ohne ``default`` werden sie immer gesendet. Nicht
+    numerische Werte (z.B. Alarme) werden bei jeder Änderung gesendet. Nach
+    ``heartbeat`` Sekunden ohne Versand wird ein Wert unabhängig vom Band erneut
+    gesendet.
+
+    ``band_key`` (beim Oversampling ``SampleAggregator.band_key``) bildet
+    Schlüssel ohne eigenes Band auf den Messwert ab, dessen Band gilt
+    (``turbidity_max`` nutzt das Band von ``turbidity``); gibt er None zurück,
+    wird der Wert nur bei Änderung gesendet.
+    """
+
+    def __init__(self, bands, heartbeat=None, clock=time.monotonic, band_key=None):
+        self.bands = dict(bands)
+        self.default_band = self.bands.pop('default', None)
+        self.heartbeat = heartbeat
+        self.clock = clock
+        self.band_key = band_key
+        self._last_sent = {}  # Messwert -> (Wert, Zeitpunkt)
+        self.suppressed = 0
+
+    @classmethod
+    def from_config(cls, transmission, band_key=None):
+        """Erzeugt den Filter aus dem transmission-Block oder None, wenn nicht konfiguriert"""
+        if 'deadband' not in transmission:
+            return None
+        return cls(transmission['deadband'], transmission.get('heartbeat'), band_key=band_key)
+
+    def filter(self, sensor_data):
+        """Gibt nur die zu sendenden Messwerte zurück und merkt sie sich als gesendet"""
+        now = self.clock()
+        changed = {}
+        for name, value in sensor_data.items():
+            last = self._last_sent.get(name)
+            if last is None or self._heartbeat_expired(last[1], now) or self._exceeds_band(name, value, last[0]):
+                changed[name] = value
+                self._last_sent[name] = (value, now)
+            else:
+                self.suppressed += 1
+        return changed
+
+    def _heartbeat_expired(self, sent_at, now):
+        return self.heartbeat is not None and now - sent_at >= self.heartbeat
+
+    def _band(self, name):
+        if name in self.bands or self.band_key is None:
+            return self.bands.get(name, self.default_band)
+        base = self.band_key(name)
+        if base is None:
+            return CHANGE_ONLY
+        return self.bands.get(base, self.default_band)
+
+    def _exceeds_band(self, name, value, last_value):
+        band = self._band(name)
+        if band is None:
+            return True
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not isinstance(last_value, (int, float)):
+            return value != last_value
+
+        delta = abs(value - last_value)
+        if 'absolute' in band and delta > band['absolute']:
+            return True
+        if 'percent' in band and delta > abs(last_value) * band['percent'] / 100:
+            return True
+        return False
@@ -0,0 +1,86 @@
+# -----------------------------------------------------------------------------
+# Company: KARIM Technologies
+# Author: Sayed Amir Karim
+# Copyright: 2024 KARIM Technologies
+#
+# License: All Rights Reserved
+#
+# Module: Telemetry Payload
+# Description: Beim Laden vorkompilierte Telemetrie-Strukturen pro Sensor und
+#              schneller JSON-Encoder
+# -----------------------------------------------------------------------------
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def dumps(data):
+    """Kompakte JSON-Serialisierung, mit orjson falls installiert"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(data, separators=(',', ':'))
+
+def loads(text):
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+class SensorPayload:
+    """Vorkompilierte Telemetrie-Struktur eines Sensors.
+
+    Schlüssel (``<sensor_id>_<messwert>``) und die statischen Teile des
+    JSON-Formats (info, metadata) werden einmal beim Laden erzeugt und pro
+    Messung nur noch referenziert. Mit ``transmission.static_metadata =
+    "attributes"`` werden die statischen Teile einmalig als ThingsBoard-Attribute
+    gesendet (siehe ``attributes``) und das JSON-Format enthält nur noch die
+    Messwerte.
+    """
+
+    def __init__(self, sensor_id, config):
+        self.sensor_id = sensor_id
+        transmission = config['transmission']
+        self.simple = 'simple' in transmission['formats']
+        self.json = 'json' in transmission['formats']
+        self.metadata_as_attributes = transmission.get('static_metadata') == 'attributes'
+
+        self.json_key = f"{sensor_id}_data"
+        self._keys = {}
+
+        info = {
+            "name": config['name'],
+            "location": config['location'],
+            "type": config['type'],
+            "device_id": config['device_id']
+        }
+        metadata = config.get('metadata', {})
+        self.static_fields = {"info": info, "metadata": metadata}
+        self.attributes = {f"{sensor_id}_info": self.static_fields}
+
+    def key(self, name):
+        """Telemetrie-Schlüssel für einen Messwert (einmal gebaut, danach aus dem Cache)"""
+        key = self._keys.get(name)
+        if key is None:
+            key = self._keys[name] = f"{self.sensor_id}_{name}"
+        return key
+
+    def format(self, sensor_data, timestamp):
+        formatted_data = {}
+
+        if self.simple:
+            key = self.key
+            formatted_data['simple'] = {key(k): v for k, v in sensor_data.items()}
+
+        if self.json:
+            if self.metadata_as_attributes:
+                entry = {}
+            else:
+                entry = dict(self.static_fields)
+            entry["measurements"] = sensor_data
+            entry["timestamp"] = timestamp
+            entry["status"] = "active"
+            formatted_data['json'] = {self.json_key: entry}
+
+        return formatted_data
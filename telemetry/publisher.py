@@ -0,0 +1,289 @@
+# -----------------------------------------------------------------------------
+# Company: KARIM Technologies
+# Author: Sayed Amir Karim
+# Copyright: 2024 KARIM Technologies
+#
+# License: All Rights Reserved
+#
+# Module: Telemetry Publisher
+# Description: Entkoppelt den MQTT-Versand von der RS485-Abfrage über eine
+#              begrenzte Queue und einen eigenen Sende-Thread
+# -----------------------------------------------------------------------------
+
+import time
+import logging
+import threading
+from collections import deque
+
+OVERFLOW_DROP_OLDEST = 'drop_oldest'
+OVERFLOW_COALESCE = 'coalesce'
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_COALESCE)
+
+# Rückgabecode von TBPublishInfo.get(), wenn paho die Nachricht angenommen hat
+TB_ERR_SUCCESS = 0
+
+class TelemetryEntry:
+    """Ein Eintrag der Sende-Queue: Schlüssel (z.B. Sensor-ID), Daten und Erfassungszeit"""
+
+    __slots__ = ('key', 'data', 'ts', 'enqueued_at')
+
+    def __init__(self, key, data, ts=None):
+        self.key = key
+        self.data = data
+        self.ts = int(time.time() * 1000) if ts is None else ts
+        self.enqueued_at = time.monotonic()
+
+class TelemetryPublisher:
+    """Sendet Telemetrie in einem Hintergrund-Thread an ThingsBoard.
+
+    ``publish`` blockiert nie: Ist die Queue voll, wird je nach
+    ``overflow_policy`` der älteste Eintrag verworfen (``drop_oldest``) oder ein
+    noch wartender Eintrag mit gleichem Schlüssel durch den neuen ersetzt
+    (``coalesce``, Fallback: ältesten verwerfen). Ein Versand gilt erst als
+    erfolgreich, wenn paho die Nachricht als veröffentlicht meldet (bei QoS 1
+    nach dem PUBACK des Brokers), spätestens nach ``ack_timeout`` Sekunden;
+    sonst wird er wiederholt. Kommt die Bestätigung zu spät, kann eine Nachricht
+    doppelt ankommen - verloren geht sie nicht.
+
+    Mit ``batch_size`` > 1 werden Einträge gesammelt und als eine
+    ThingsBoard-Nachricht ``[{"ts": ..., "values": {...}}, ...]`` gesendet,
+    sobald ``batch_size`` Einträge vorliegen oder der älteste Eintrag
+    ``batch_interval`` Sekunden wartet.
+
+    Mit einem ``store`` (TelemetryStore) ersetzt die persistente Queue die
+    Queue im Speicher: Einträge werden erst nach bestätigtem Versand gelöscht
+    und bei Verbindungsausfall nicht verworfen, sondern nach ``retry_delay``
+    erneut versucht. ``drain_rate`` begrenzt dabei die Nachrichten pro Sekunde,
+    mit denen ein Rückstau abgebaut wird (0 = unbegrenzt). ``max_queue_size``
+    und ``overflow_policy`` gelten dann nicht - die Grenzen setzt der Store
+    (``max_entries``, ``max_bytes``, älteste zuerst verworfen).
+
+    ``failed`` zählt Einträge, deren Versand fehlschlug, jeden nur einmal -
+    auch wenn ein gespeicherter Eintrag mehrfach erneut versucht wird.
+    """
+
+    def __init__(self, client=None, max_queue_size=1000, overflow_policy=OVERFLOW_DROP_OLDEST,
+                 max_retries=3, retry_delay=1.0, latency_window=100, batch_size=1, batch_interval=0.0,
+                 store=None, drain_rate=0.0, ack_timeout=10.0):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unbekannte Overflow-Policy: {overflow_policy}")
+
+        self.client = client
+        self.max_queue_size = max_queue_size
+        self.overflow_policy = overflow_policy
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.batch_size = max(1, batch_size)
+        self.batch_interval = batch_interval
+        self.store = store
+        self.drain_rate = drain_rate
+        self.ack_timeout = ack_timeout
+        self.logger = logging.getLogger('TelemetryPublisher')
+
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+
+        # Metriken
+        self.published = 0
+        self.failed = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self._failed_row_id = 0  # Höchste bereits als fehlgeschlagen gezählte Row-ID des Stores
+        self._latencies = deque(maxlen=latency_window)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='TelemetryPublisher', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Beendet den Sende-Thread, wartende Einträge werden bis ``timeout`` noch gesendet"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def publish(self, data, key=None, ts=None):
+        """Stellt Telemetrie ({'simple': {...}, 'json': {...}}) zum Versand ein.
+
+        ``ts`` ist der Erfassungszeitpunkt in ms (Standard: jetzt).
+        """
+        if not data:
+            return
+        entry = TelemetryEntry(key, data, ts)
+        if self.store is not None:
+            # SQLite-Commit ohne die Condition - der Sende-Thread wird nicht aufgehalten
+            self.store.append(entry)
+            with self._condition:
+                self._condition.notify()
+            return
+        with self._condition:
+            if len(self._queue) >= self.max_queue_size:
+                self._handle_overflow(entry)
+            else:
+                self._queue.append(entry)
+            self._condition.notify()
+
+    def _handle_overflow(self, entry):
+        if self.overflow_policy == OVERFLOW_COALESCE and entry.key is not None:
+            for index, pending in enumerate(self._queue):
+                if pending.key == entry.key:
+                    self._queue[index] = entry
+                    self.coalesced += 1
+                    return
+        self._queue.popleft()
+        self._queue.append(entry)
+        self.dropped += 1
+
+    def metrics(self):
+        """Queue-Tiefe, Zähler und Versandlatenz (Einstellen bis Bestätigung) in ms"""
+        with self._condition:
+            queue_depth = self._pending_count()
+        latencies = sorted(self._latencies)
+        metrics = {
+            'telemetry_queue_depth': queue_depth,
+            'telemetry_published': self.published,
+            'telemetry_failed': self.failed,
+            'telemetry_dropped': self.dropped,
+            'telemetry_coalesced': self.coalesced,
+        }
+        if self.store is not None:
+            metrics['telemetry_stored_bytes'] = self.store.bytes
+            metrics['telemetry_evicted'] = self.store.evicted
+        if latencies:
+            metrics['telemetry_latency_p50_ms'] = round(latencies[len(latencies) // 2] * 1000, 1)
+            metrics['telemetry_latency_p95_ms'] = round(latencies[int(len(latencies) * 0.95)] * 1000, 1)
+            metrics['telemetry_latency_max_ms'] = round(latencies[-1] * 1000, 1)
+        return metrics
+
+    def _pending_count(self):
+        return len(self.store) if self.store is not None else len(self._queue)
+
+    def _batch_wait_time(self):
+        """Sekunden bis der nächste Versand fällig ist (0 = sofort, None = Queue leer)"""
+        pending = self._pending_count()
+        if not pending:
+            return None
+        if pending >= self.batch_size:
+            return 0.0
+        if self.store is not None:
+            oldest_enqueued_at = self.store.oldest_enqueued_at()
+        else:
+            oldest_enqueued_at = self._queue[0].enqueued_at
+        return max(0.0, oldest_enqueued_at + self.batch_interval - time.monotonic())
+
+    def _next_entries(self):
+        if self.store is not None:
+            return self.store.peek(self.batch_size)
+        return [self._queue.popleft() for _ in range(min(len(self._queue), self.batch_size))]
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running:
+                    wait_time = self._batch_wait_time()
+                    if wait_time == 0.0:
+                        break
+                    self._condition.wait(wait_time)
+                # Persistierte Einträge bleiben beim Beenden für den nächsten Start liegen
+                if not self._pending_count() or (self.store is not None and not self._running):
+                    return
+                entries = self._next_entries()
+
+            if self.batch_size > 1:
+                sent = self._send_with_retry(entries, self._send_batch)
+            else:
+                sent = self._send_with_retry(entries[0].data, self._send)
+
+            if sent:
+                self.published += len(entries)
+                now = time.monotonic()
+                self._latencies.extend(now - entry.enqueued_at for entry in entries)
+                if self.store is not None:
+                    self.store.ack(entries)
+                if self.drain_rate > 0 and self._pending_count():
+                    # Rückstau gedrosselt abbauen
+                    time.sleep(1.0 / self.drain_rate)
+            else:
+                self.failed += self._count_failed(entries)
+                if self.store is not None and self._running:
+                    # Einträge bleiben gespeichert - später erneut versuchen
+                    time.sleep(self.retry_delay)
+
+    def _count_failed(self, entries):
+        """Anzahl der Einträge, die zum ersten Mal fehlschlagen.
+
+        Gespeicherte Einträge werden in Row-ID-Reihenfolge wiederholt, gezählt
+        werden nur die mit höherer Row-ID als beim letzten Fehlschlag.
+        """
+        if self.store is None:
+            return len(entries)
+        new_failures = [entry for entry in entries if entry.row_id > self._failed_row_id]
+        if new_failures:
+            self._failed_row_id = max(entry.row_id for entry in new_failures)
+        return len(new_failures)
+
+    def _send_with_retry(self, data, send):
+        for attempt in range(self.max_retries):
+            try:
+                send(data)
+                return True
+            except Exception as e:
+                if attempt < self.max_retries - 1:
+                    self.logger.warning(f"Fehler beim Senden der Telemetrie (Versuch {attempt + 1}): {e}")
+                    if not self._running:
+                        continue
+                    time.sleep(self.retry_delay)
+                else:
+                    self.logger.error(f"Fehler beim Senden der Telemetrie nach {self.max_retries} Versuchen: {e}")
+        return False
+
+    def _send(self, data):
+        if not self.client:
+            raise ConnectionError("Kein ThingsBoard-Client verbunden")
+
+        # Sende Simple-Format Daten
+        if data.get("simple"):
+            self._send_payload(data["simple"])
+            self.logger.debug("Simple format Telemetrie erfolgreich gesendet")
+
+        # Sende JSON-Format Daten - einzeln pro Sensor
+        if data.get("json"):
+            for sensor_data_key, sensor_data in data["json"].items():
+                self._send_payload({sensor_data_key: sensor_data})
+                self.logger.debug(f"JSON format Telemetrie für {sensor_data_key} erfolgreich gesendet")
+
+    def _send_batch(self, entries):
+        if not self.client:
+            raise ConnectionError("Kein ThingsBoard-Client verbunden")
+
+        batch = []
+        for entry in entries:
+            values = {}
+            values.update(entry.data.get("simple") or {})
+            values.update(entry.data.get("json") or {})
+            batch.append({"ts": entry.ts, "values": values})
+        self._send_payload(batch)
+        self.logger.debug(f"Telemetrie-Batch mit {len(batch)} Einträgen erfolgreich gesendet")
+
+    def _send_payload(self, payload):
+        # get() wartet höchstens 1 s und liefert auch für nur eingereihte
+        # Nachrichten SUCCESS - maßgeblich ist is_published() der paho-Nachrichten
+        publish_info = self.client.send_telemetry(payload)
+        rc = publish_info.get()
+        if rc != TB_ERR_SUCCESS:
+            raise ConnectionError(f"Versand nicht angenommen (rc={rc})")
+        messages = publish_info.message_info
+        if not isinstance(messages, list):
+            messages = [messages]
+        deadline = time.monotonic() + self.ack_timeout
+        for message in messages:
+            # Wirft ValueError/RuntimeError, wenn paho die Nachricht verworfen hat
+            message.wait_for_publish(max(0.0, deadline - time.monotonic()))
+            if not message.is_published():
+                raise TimeoutError(f"Keine Broker-Bestätigung nach {self.ack_timeout} s (mid={message.mid})")
@@ -0,0 +1,134 @@
+# -----------------------------------------------------------------------------
+# Company: KARIM Technologies
+# Author: Sayed Amir Karim
+# Copyright: 2024 KARIM Technologies
+#
+# License: All Rights Reserved
+#
+# Module: Telemetry Store
+# Description: Persistente Sende-Queue (SQLite, WAL) für Store-and-Forward
+#              bei Ausfällen der ThingsBoard-Verbindung
+# -----------------------------------------------------------------------------
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from .payload import dumps, loads
+
+class StoredEntry:
+    """Eintrag aus der persistenten Queue (gleiche Felder wie TelemetryEntry plus Row-ID)"""
+
+    __slots__ = ('row_id', 'key', 'data', 'ts', 'enqueued_at')
+
+    def __init__(self, row_id, key, data, ts, enqueued_at):
+        self.row_id = row_id
+        self.key = key
+        self.data = data
+        self.ts = ts
+        self.enqueued_at = enqueued_at
+
+class TelemetryStore:
+    """Persistente FIFO-Queue für Telemetrie in einer SQLite-Datenbank (WAL-Modus).
+
+    Jeder Eintrag wird beim Einstellen committet und übersteht damit Neustarts
+    des Prozesses (z.B. durch powerWatchdog.py). Einträge werden erst nach
+    bestätigtem Versand mit ``ack`` gelöscht. Überschreitet die Queue
+    ``max_entries`` oder ``max_bytes`` (Summe der Nutzdaten), werden die ältesten
+    Einträge verworfen.
+
+    Thread-sicher über eine eigene Sperre: Bus-Threads speichern, während der
+    Sende-Thread liest und löscht, ohne dass einer die Sperre des anderen hält.
+    """
+
+    def __init__(self, path, max_entries=100000, max_bytes=50 * 1024 * 1024, synchronous='NORMAL'):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.logger = logging.getLogger('TelemetryStore')
+        self.evicted = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(f'PRAGMA synchronous={synchronous}')
+        self._db.execute('''
+            CREATE TABLE IF NOT EXISTS telemetry (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                key TEXT,
+                ts INTEGER NOT NULL,
+                created REAL NOT NULL,
+                data TEXT NOT NULL
+            )
+        ''')
+
+        self.count, self.bytes = self._db.execute(
+            'SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM telemetry').fetchone()
+        if self.count:
+            self.logger.info(f"{self.count} gespeicherte Telemetrie-Einträge aus vorherigem Lauf gefunden")
+
+    def __len__(self):
+        return self.count
+
+    def append(self, entry):
+        """Speichert einen TelemetryEntry dauerhaft"""
+        data = dumps(entry.data)
+        key = None if entry.key is None else str(entry.key)
+        with self._lock:
+            self._db.execute('INSERT INTO telemetry (key, ts, created, data) VALUES (?, ?, ?, ?)',
+                             (key, entry.ts, time.time(), data))
+            self.count += 1
+            self.bytes += len(data)
+            self._evict()
+
+    def oldest_enqueued_at(self):
+        """Einstellzeitpunkt des ältesten Eintrags auf der time.monotonic()-Skala"""
+        with self._lock:
+            row = self._db.execute('SELECT created FROM telemetry ORDER BY id LIMIT 1').fetchone()
+        if row is None:
+            return None
+        return self._to_monotonic(row[0])
+
+    def peek(self, limit):
+        """Liefert die ältesten ``limit`` Einträge, ohne sie zu entfernen"""
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT id, key, data, ts, created FROM telemetry ORDER BY id LIMIT ?', (limit,)).fetchall()
+        return [StoredEntry(row_id, key, loads(data), ts, self._to_monotonic(created))
+                for row_id, key, data, ts, created in rows]
+
+    def ack(self, entries):
+        """Entfernt bestätigt gesendete Einträge"""
+        if not entries:
+            return
+        ids = [entry.row_id for entry in entries]
+        placeholders = ','.join('?' * len(ids))
+        with self._lock:
+            removed_count, removed_bytes = self._db.execute(
+                f'SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM telemetry WHERE id IN ({placeholders})',
+                ids).fetchone()
+            self._db.execute(f'DELETE FROM telemetry WHERE id IN ({placeholders})', ids)
+            self.count -= removed_count
+            self.bytes -= removed_bytes
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _evict(self):
+        while self.count > 0 and (self.count > self.max_entries or self.bytes > self.max_bytes):
+            row_id, size = self._db.execute(
+                'SELECT id, LENGTH(data) FROM telemetry ORDER BY id LIMIT 1').fetchone()
+            self._db.execute('DELETE FROM telemetry WHERE id = ?', (row_id,))
+            self.count -= 1
+            self.bytes -= size
+            self.evicted += 1
+
+    @staticmethod
+    def _to_monotonic(created):
+        return time.monotonic() - max(0.0, time.time() - created)